@@ -0,0 +1,54 @@
+"""Cold-start time and resident memory of FileStorage with inline JSON histories versus a mapped archive.
+
+Usage: python -m benchmarks.archive_load [--books 100000] [--operations 1000000]
+"""
+import argparse
+import gc
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.workload import Workload
+from bookstore.storage import FileStorage
+
+
+def cold_start(directory: str, archive: bool) -> tuple[float, int, int]:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        storage = FileStorage(directory, archive=archive)
+        bookstore = storage.load()
+        loaded = time.perf_counter() - start
+        traced = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    sold = sum(book.copies_sold() for book in bookstore.catalog.values())
+    storage.close()
+    return loaded, traced, sold
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--books', type=int, default=100_000)
+    parser.add_argument('--operations', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    workload = Workload(args.books, args.operations, args.seed)
+    print(f'books: {args.books}  transactions: {args.operations}')
+    for archive in (False, True):
+        with tempfile.TemporaryDirectory() as directory:
+            storage = FileStorage(directory, archive=archive)
+            bookstore = storage.load()
+            bookstore.add_books(workload.rows())
+            workload.replay(bookstore, days=365)
+            storage.compact()
+            storage.close()
+            loaded, traced, sold = cold_start(directory, archive)
+            label = 'mapped archive' if archive else 'inline JSON'
+            print(f'{label:15} load {loaded:7.2f} s  {traced / 2**20:8.1f} MiB traced  ({sold} copies sold)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Rows per second loading a catalog feed with Bookstore.add_books versus add_book.
+
+Usage: python -m benchmarks.bulk_load [--rows 500000]
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+
+from bookstore.loaders import FIELDS, read_csv
+from bookstore.model import Bookstore
+
+
+def write_feed(path: str, rows: int):
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELDS)
+        for i in range(rows):
+            # Every 50th row repeats an earlier ISBN to exercise the skip path.
+            isbn = f'978{(i - 1 if i % 50 == 49 else i):010d}'
+            writer.writerow((isbn, f'Title {i}', 10.0 + i % 40, 5.0 + i % 20, i % 30))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'feed.csv')
+        write_feed(path, args.rows)
+
+        rows = list(read_csv(path))
+        start = time.perf_counter()
+        store = Bookstore()
+        for row in rows:
+            store.add_book(*row)
+        one_by_one = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = Bookstore().add_books(rows)
+        bulk = time.perf_counter() - start
+
+        start = time.perf_counter()
+        streamed = Bookstore().add_books(read_csv(path))
+        end_to_end = time.perf_counter() - start
+
+    assert result == streamed
+    print(f'rows: {args.rows}  inserted: {result.inserted}  skipped: {result.skipped}')
+    print(f'add_book loop        {args.rows / one_by_one:>12,.0f} rows/s')
+    print(f'add_books            {args.rows / bulk:>12,.0f} rows/s')
+    print(f'read_csv + add_books {args.rows / end_to_end:>12,.0f} rows/s')
+
+
+if __name__ == '__main__':
+    main()
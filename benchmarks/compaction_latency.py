@@ -0,0 +1,55 @@
+"""Latency of the sales that trigger a FileStorage compaction, against the time a compaction takes.
+
+Usage: python -m benchmarks.compaction_latency [--books 100000] [--operations 300000] [--compact-every 100000]
+"""
+import argparse
+import gc
+import statistics
+import tempfile
+import time
+
+from benchmarks.workload import Workload
+from bookstore.storage import FileStorage
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--books', type=int, default=100_000)
+    parser.add_argument('--operations', type=int, default=300_000)
+    parser.add_argument('--compact-every', type=int, default=100_000)
+    parser.add_argument('--archive', action='store_true')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    workload = Workload(args.books, args.operations, args.seed)
+    sales = [(isbn, copies) for sell, isbn, copies in workload.operations if sell]
+    with tempfile.TemporaryDirectory() as directory:
+        storage = FileStorage(directory, compact_every=args.compact_every, archive=args.archive)
+        bookstore = storage.load()
+        bookstore.add_books(workload.rows())
+        bookstore.supply_many((workload.isbn(index), 1000) for index in range(args.books))
+        storage.compact()
+
+        start = time.perf_counter()
+        storage.compact()
+        full = time.perf_counter() - start
+
+        # Keep full garbage collections over the loaded catalog out of the sale latencies.
+        gc.freeze()
+        latencies = []
+        for isbn, copies in sales:
+            start = time.perf_counter()
+            bookstore.sell_book(isbn, copies)
+            latencies.append(time.perf_counter() - start)
+        storage.close()
+
+    latencies.sort()
+    print(f'books: {args.books}  sales: {len(sales)}  compact_every: {args.compact_every}')
+    print(f'compact() (full snapshot): {full * 1e3:10.1f} ms')
+    print(f'sell_book median:          {statistics.median(latencies) * 1e6:10.1f} us')
+    print(f'sell_book p99.9:           {latencies[int(len(latencies) * 0.999)] * 1e6:10.1f} us')
+    print(f'sell_book slowest:         {latencies[-1] * 1e3:10.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Sales throughput of ThreadSafeBookstore as the number of selling threads grows, against a plain Bookstore.
+
+Every sale updates the shared indexes under one lock and all threads share the GIL, so
+the figures stay near the single-thread rate; the plain Bookstore line is that ceiling.
+
+Usage: python -m benchmarks.concurrency [--books 10000] [--sales 200000] [--threads 1 2 4 8]
+"""
+import argparse
+import random
+import threading
+import time
+
+from bookstore.locking import ThreadSafeBookstore
+from bookstore.model import Bookstore
+
+
+def run(books: int, sales: int, threads: int, seed: int, factory: type[Bookstore] = ThreadSafeBookstore) \
+        -> tuple[float, bool]:
+    bookstore = factory()
+    isbns = [f'978{i:010d}' for i in range(books)]
+    stock = sales // books + 10
+    for isbn in isbns:
+        bookstore.add_book(isbn, f'Title {isbn}', 20.0, 10.0, stock)
+    rng = random.Random(seed)
+    per_thread = [[rng.choice(isbns) for _ in range(sales // threads)] for _ in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def sell(sample):
+        barrier.wait()
+        for isbn in sample:
+            bookstore.sell_book(isbn, 1)
+
+    workers = [threading.Thread(target=sell, args=(sample,)) for sample in per_thread]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    consistent = all(book.quantity >= 0 and book.quantity + book.copies_sold() == stock
+                     for book in bookstore.catalog.values())
+    return sum(len(sample) for sample in per_thread) / elapsed, consistent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--books', type=int, default=10_000)
+    parser.add_argument('--sales', type=int, default=200_000)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    throughput, _ = run(args.books, args.sales, 1, args.seed, Bookstore)
+    print(f'plain Bookstore, one thread: {throughput:,.0f} sales/s')
+    print(f"{'threads':>7} {'sales/s':>12} {'invariants':>11}")
+    for threads in args.threads:
+        throughput, consistent = run(args.books, args.sales, threads, args.seed)
+        print(f"{threads:>7} {throughput:>12,.0f} {'ok' if consistent else 'VIOLATED':>11}")
+
+
+if __name__ == '__main__':
+    main()
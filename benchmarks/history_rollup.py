@@ -0,0 +1,53 @@
+"""Memory reclaimed by Bookstore.compact_history on years of synthetic sales.
+
+Usage: python -m benchmarks.history_rollup [--books 10000] [--operations 1000000] [--days 3650] [--horizon 90]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import timedelta
+
+from benchmarks.workload import Workload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--books', type=int, default=10_000)
+    parser.add_argument('--operations', type=int, default=1_000_000)
+    parser.add_argument('--days', type=int, default=3650, help='days the operations are spread over')
+    parser.add_argument('--horizon', type=int, default=90, help='days of history kept as is')
+    parser.add_argument('--period', choices=('day', 'month'), default='day')
+    parser.add_argument('--compact-ledger', action='store_true')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    workload = Workload(args.books, args.operations, args.seed)
+    tracemalloc.start()
+    bookstore = workload.bookstore(args.compact_ledger)
+    workload.replay(bookstore, days=args.days)
+    del workload
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    transactions = sum(len(book.transactions) for book in bookstore.catalog.values())
+    sold = [book.copies_sold() for book in bookstore.catalog.values()]
+    top = [book.isbn for book in bookstore.top_sellers(10)]
+
+    start = time.perf_counter()
+    result = bookstore.compact_history(timedelta(days=args.horizon), args.period)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert sold == [book.copies_sold() for book in bookstore.catalog.values()]
+    assert top == [book.isbn for book in bookstore.top_sellers(10)]
+    print(f'books: {args.books}  transactions: {transactions}  over {args.days} days  '
+          f'horizon: {args.horizon} days  period: {args.period}')
+    print(f'rolled up: {result.transactions} transactions of {result.books} books in {elapsed:.2f} s')
+    print(f'reclaimed: {result.bytes_reclaimed / 2**20:.1f} MiB estimated, '
+          f'{(before - after) / 2**20:.1f} MiB traced ({before / 2**20:.1f} -> {after / 2**20:.1f} MiB)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Catalog dict memory and lookup latency with str ISBN keys versus packed int keys.
+
+Usage: python -m benchmarks.isbn_keys [--books 1000000] [--lookups 500000]
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from bookstore.isbn import CanonicalISBNBookstore, normalize, to_int
+from bookstore.model import Book, Bookstore
+
+
+def valid_isbn(index: int) -> str:
+    body = f'978{index:09d}'
+    check = -(sum(map(int, body[::2])) + 3 * sum(map(int, body[1::2]))) % 10
+    return body + str(check)
+
+
+def traced(build) -> tuple[object, int]:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        return result, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def per_lookup(lookup, keys: list) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        lookup(key)
+    return (time.perf_counter() - start) / len(keys) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--books', type=int, default=1_000_000)
+    parser.add_argument('--lookups', type=int, default=500_000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    books = [Book(valid_isbn(i), f'Title {i}', 20.0, 10.0, 5) for i in range(args.books)]
+    by_str, str_bytes = traced(lambda: {book.isbn: book for book in books})
+    by_int, int_bytes = traced(lambda: {int(book.isbn): book for book in books})
+    print(f'books: {args.books}')
+    print(f'str keys: {str_bytes / args.books:6.1f} bytes/entry  (keys shared with Book.isbn)')
+    print(f'int keys: {int_bytes / args.books:6.1f} bytes/entry  (one int object per key)')
+
+    rng = random.Random(args.seed)
+    # Lookups arrive as freshly parsed strings, e.g. from a request or a scanner.
+    typed = [valid_isbn(rng.randrange(args.books)) for _ in range(args.lookups)]
+    hyphenated = [f'{isbn[:3]}-{isbn[3]}-{isbn[4:7]}-{isbn[7:12]}-{isbn[12]}' for isbn in typed]
+    print(f'str key, as typed:        {per_lookup(by_str.get, typed):7.0f} ns/lookup')
+    print(f'int key, int(str):        {per_lookup(lambda isbn: by_int.get(int(isbn)), typed):7.0f} ns/lookup')
+    print(f'int key, to_int(str):     {per_lookup(lambda isbn: by_int.get(to_int(isbn)), typed):7.0f} ns/lookup')
+    print(f'str key, normalize(str):  {per_lookup(lambda isbn: by_str.get(normalize(isbn)), hyphenated):7.0f} ns/lookup')
+
+    del by_str, by_int
+    plain = Bookstore()
+    plain.add_books((book.isbn, book.title, 20.0, 10.0, 5) for book in books)
+    canonical = CanonicalISBNBookstore()
+    canonical.add_books((book.isbn, book.title, 20.0, 10.0, 5) for book in books)
+    print(f'Bookstore.search_by_isbn:                        {per_lookup(plain.search_by_isbn, typed):7.0f} ns/lookup')
+    print(f'CanonicalISBNBookstore.search_by_isbn:           {per_lookup(canonical.search_by_isbn, typed):7.0f} ns/lookup')
+    print(f'CanonicalISBNBookstore.search_by_isbn, hyphens:  '
+          f'{per_lookup(canonical.search_by_isbn, hyphenated):7.0f} ns/lookup')
+
+
+if __name__ == '__main__':
+    main()
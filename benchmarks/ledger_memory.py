@@ -0,0 +1,45 @@
+"""Memory used by N transactions kept as list[Transaction] versus a TransactionLedger.
+
+Usage: python -m benchmarks.ledger_memory [--sizes 1000000 10000000]
+"""
+import argparse
+import gc
+import tracemalloc
+from datetime import datetime, timedelta
+
+from bookstore.model import Transaction, TransactionLedger
+
+
+def transactions(n: int):
+    start = datetime(2015, 1, 1)
+    for i in range(n):
+        kind = Transaction.SUPPLY if i % 10 == 0 else Transaction.SELL
+        yield Transaction(kind, 1 + i % 7, start + timedelta(seconds=37 * i))
+
+
+def measure(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    container = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del container
+    gc.collect()
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    args = parser.parse_args()
+
+    print(f"{'transactions':>12} {'list (MiB)':>12} {'ledger (MiB)':>13} {'B/txn list':>11} {'B/txn ledger':>13} {'ratio':>6}")
+    for n in args.sizes:
+        as_list = measure(lambda: list(transactions(n)))
+        as_ledger = measure(lambda: TransactionLedger(transactions(n)))
+        print(f"{n:>12} {as_list / 2**20:>12.1f} {as_ledger / 2**20:>13.1f} "
+              f"{as_list / n:>11.1f} {as_ledger / n:>13.1f} {as_list / as_ledger:>6.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Bytes per Transaction and per Book, slotted classes versus the former __dict__ layout.
+
+Usage: python -m benchmarks.object_memory [--count 200000]
+"""
+import argparse
+import gc
+import tracemalloc
+from datetime import datetime
+
+from bookstore.model import Book, Transaction
+
+
+class DictTransaction:
+    # Same attributes as Transaction before it declared __slots__.
+
+    def __init__(self, type: int, copies: int, date: datetime):
+        self.type = type
+        self.copies = copies
+        self.date = date
+
+
+class DictBook:
+    # Same attributes as Book before it declared __slots__.
+
+    def __init__(self, isbn: str, title: str, sale_price: float, purchase_price: float, quantity: int):
+        self.isbn = isbn
+        self.title = title
+        self.sale_price = sale_price
+        self.purchase_price = purchase_price
+        self.quantity = quantity
+        self.transactions = []
+        self._copies_sold = 0
+        self._copies_supplied = 0
+        self._revenue = 0.0
+        self._cost = 0.0
+        self._listeners = ()
+
+
+def bytes_per_object(factory, count: int) -> float:
+    # Field values are built before tracing starts, so only the objects themselves are counted.
+    gc.collect()
+    tracemalloc.start()
+    objects = [factory(i) for i in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    list_overhead = objects.__sizeof__()
+    del objects
+    gc.collect()
+    return (size - list_overhead) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=200_000)
+    args = parser.parse_args()
+
+    date = datetime.now()
+    isbns = [f'978{i:010d}' for i in range(args.count)]
+    title = 'A Reasonably Long Book Title'
+    rows = [
+        ('Transaction', lambda i: DictTransaction(Transaction.SELL, 1, date),
+         lambda i: Transaction(Transaction.SELL, 1, date)),
+        ('Book', lambda i: DictBook(isbns[i], title, 10.0, 5.0, 10),
+         lambda i: Book(isbns[i], title, 10.0, 5.0, 10)),
+    ]
+    print(f"{'object':<12} {'__dict__ (B)':>13} {'__slots__ (B)':>14} {'saved':>7}")
+    for name, before, after in rows:
+        dict_size = bytes_per_object(before, args.count)
+        slot_size = bytes_per_object(after, args.count)
+        print(f"{name:<12} {dict_size:>13.1f} {slot_size:>14.1f} {1 - slot_size / dict_size:>7.0%}")
+    print("Book sizes include the empty transactions list; shared field values are not counted.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Load generator for bookstore.server: p50/p99 latency and requests per second.
+
+Starts a server in-process on a free localhost port unless --port is given.
+
+Usage: python -m benchmarks.server_load [--clients 16] [--requests 20000] [--pipeline 32]
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from bookstore.server import BookstoreServer
+
+
+def request_mix(rng: random.Random, isbns: list[str], count: int, first_id: int) -> list[bytes]:
+    requests = []
+    for i in range(first_id, first_id + count):
+        isbn = rng.choice(isbns)
+        roll = rng.random()
+        if roll < 0.6:
+            request = {'id': i, 'op': 'search_by_isbn', 'args': [isbn]}
+        elif roll < 0.9:
+            request = {'id': i, 'op': 'sell_book', 'args': [isbn, 1]}
+        elif roll < 0.98:
+            request = {'id': i, 'op': 'supply_book', 'args': [isbn, 5]}
+        else:
+            request = {'id': i, 'op': 'best_selling_book'}
+        requests.append(json.dumps(request).encode() + b'\n')
+    return requests
+
+
+async def client(host: str, port: int, requests: list[bytes], pipeline: int, latencies: list[float]):
+    # Keeps up to `pipeline` requests in flight on one connection.
+    reader, writer = await asyncio.open_connection(host, port)
+    sent_at: dict[int, float] = {}
+    window = asyncio.Semaphore(pipeline)
+
+    async def send():
+        for line in requests:
+            await window.acquire()
+            sent_at[json.loads(line)['id']] = time.perf_counter()
+            writer.write(line)
+            await writer.drain()
+
+    async def receive():
+        for _ in requests:
+            response = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - sent_at.pop(response['id']))
+            window.release()
+
+    await asyncio.gather(send(), receive())
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run(args) -> None:
+    server = None
+    port = args.port
+    if port is None:
+        server = BookstoreServer()
+        await server.start(port=0)
+        port = server.port
+
+    rng = random.Random(args.seed)
+    isbns = [f'978{i:010d}' for i in range(args.books)]
+    setup = [json.dumps({'id': i, 'op': 'add_book', 'args': [isbn, f'Title {i}', 20.0, 10.0, 1000]}).encode() + b'\n'
+             for i, isbn in enumerate(isbns)]
+    await client(args.host, port, setup, args.pipeline, [])
+
+    per_client = args.requests // args.clients
+    workloads = [request_mix(rng, isbns, per_client, c * per_client) for c in range(args.clients)]
+    latencies: list[float] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(args.host, port, work, args.pipeline, latencies) for work in workloads))
+    elapsed = time.perf_counter() - start
+
+    if server is not None:
+        await server.close()
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f'clients: {args.clients}  pipeline: {args.pipeline}  requests: {len(latencies)}')
+    print(f'throughput: {len(latencies) / elapsed:,.0f} req/s')
+    print(f'latency p50: {quantiles[49] * 1000:.3f} ms  p99: {quantiles[98] * 1000:.3f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, help='connect to a running server instead of starting one')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=20_000)
+    parser.add_argument('--pipeline', type=int, default=32)
+    parser.add_argument('--books', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Throughput of ShardedBookstore from 1 to 8 worker processes, against one Bookstore.
+
+Sales are sent as sell_many baskets, so every shard works on its part of a basket at
+the same time; single-ISBN calls are also timed to show the round-trip cost.
+
+Usage: python -m benchmarks.sharding [--books 200000] [--sales 400000] [--basket 2000]
+"""
+import argparse
+import random
+import time
+
+from bookstore.model import Bookstore
+from bookstore.sharding import ShardedBookstore
+
+
+def workload(store, rows, baskets, point_sales) -> tuple[float, float]:
+    store.add_books(rows)
+    start = time.perf_counter()
+    for basket in baskets:
+        store.sell_many(basket)
+    store.best_selling_book()
+    batched = sum(len(basket) for basket in baskets) / (time.perf_counter() - start)
+    start = time.perf_counter()
+    for isbn in point_sales:
+        store.sell_book(isbn, 1)
+    point = len(point_sales) / (time.perf_counter() - start)
+    return batched, point
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--books', type=int, default=200_000)
+    parser.add_argument('--sales', type=int, default=400_000)
+    parser.add_argument('--basket', type=int, default=2000)
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    isbns = [f'978{i:010d}' for i in range(args.books)]
+    rows = [(isbn, f'Title {i}', 20.0, 10.0, 1_000) for i, isbn in enumerate(isbns)]
+    sales = [(rng.choice(isbns), 1) for _ in range(args.sales)]
+    baskets = [sales[i:i + args.basket] for i in range(0, len(sales), args.basket)]
+    point_sales = [isbn for isbn, _ in sales[:10_000]]
+
+    print(f"{'store':<18} {'basket sales/s':>15} {'point sales/s':>14}")
+    batched, point = workload(Bookstore(), rows, baskets, point_sales)
+    print(f"{'Bookstore':<18} {batched:>15,.0f} {point:>14,.0f}")
+    for shards in args.shards:
+        with ShardedBookstore(shards) as store:
+            batched, point = workload(store, rows, baskets, point_sales)
+        print(f"{f'{shards} shard(s)':<18} {batched:>15,.0f} {point:>14,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Cost of Bookstore.snapshot() and what a live snapshot adds to sales and additions.
+
+Usage: python -m benchmarks.snapshot [--books 1000000] [--operations 500000]
+"""
+import argparse
+import time
+
+from benchmarks.workload import Workload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--books', type=int, default=1_000_000)
+    parser.add_argument('--operations', type=int, default=500_000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    workload = Workload(args.books, args.operations, args.seed)
+    sales = [(isbn, copies) for sell, isbn, copies in workload.operations if sell]
+    bookstore = workload.bookstore()
+
+    def sell_all() -> float:
+        start = time.perf_counter()
+        for isbn, copies in sales:
+            bookstore.sell_book(isbn, copies)
+        return (time.perf_counter() - start) / len(sales) * 1e9
+
+    start = time.perf_counter()
+    snapshot = bookstore.snapshot()
+    taken = time.perf_counter() - start
+    snapshot.close()
+    print(f'books: {args.books}  sales: {len(sales)}')
+    print(f'snapshot():                 {taken * 1e6:10.1f} us')
+    print(f'sell_book, no snapshot:     {sell_all():10.0f} ns/op')
+
+    snapshot = bookstore.snapshot()
+    print(f'sell_book, live snapshot:   {sell_all():10.0f} ns/op  ({len(snapshot._frozen)} books frozen)')
+    start = time.perf_counter()
+    bookstore.add_book('new', 'New Book', 10.0, 5.0, 1)
+    print(f'first add_book (dict copy): {(time.perf_counter() - start) * 1e3:10.1f} ms')
+
+    # A full report over the snapshot, with sales going on every 100 books.
+    live = iter(sales * 2)
+    start = time.perf_counter()
+    stock_value = 0.0
+    for i, book in enumerate(snapshot.books()):
+        stock_value += book.quantity * book.purchase_price
+        if i % 100 == 0:
+            bookstore.sell_book(*next(live))
+    print(f'report over snapshot:       {(time.perf_counter() - start) * 1e3:10.1f} ms  '
+          f'(stock value {stock_value:,.2f})')
+    snapshot.close()
+
+
+if __name__ == '__main__':
+    main()
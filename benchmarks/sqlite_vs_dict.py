@@ -0,0 +1,87 @@
+"""Dict-backed Bookstore versus SQLiteBookstore on the test scenarios and a scaled workload.
+
+Usage: python -m benchmarks.sqlite_vs_dict [--books 100000] [--operations 200000] [--db PATH]
+"""
+import argparse
+import random
+import time
+
+from bookstore.model import Bookstore
+from bookstore.sqlite_store import SQLiteBookstore
+
+
+def test_scenarios(bookstore):
+    # The operations exercised by tests/test_model_pytest.py against bookstore_with_books.
+    bookstore.add_book('1234', 'Test Book', 10.0, 5.0, 10)
+    bookstore.add_book('5678', 'Test Book 2', 20.0, 10.0, 20)
+    bookstore.add_book('1234', 'Test Book', 10.0, 5.0, 10)
+    bookstore.search_by_isbn('1234')
+    bookstore.search_by_isbn('12345')
+    bookstore.sell_book('12345', 5)
+    bookstore.sell_book('1234', 11)
+    bookstore.sell_book('1234', 5)
+    bookstore.sell_book('1234', 3)
+    bookstore.sell_book('5678', 10)
+    bookstore.supply_book('5678', 5)
+    bookstore.best_selling_book()
+    bookstore.delete_book('1234')
+
+
+def timed(label: str, count: int, action):
+    start = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - start
+    print(f'  {label:<28} {elapsed:>9.3f} s {count / elapsed:>14,.0f} ops/s')
+
+
+def scaled_workload(factory, books: int, operations: int, seed: int):
+    rng = random.Random(seed)
+    isbns = [f'978{i:010d}' for i in range(books)]
+    bookstore = factory()
+    sample = [rng.choice(isbns) for _ in range(operations)]
+
+    def add():
+        for i, isbn in enumerate(isbns):
+            bookstore.add_book(isbn, f'Title {i}', 20.0, 10.0, 50)
+
+    def sell():
+        for isbn in sample:
+            bookstore.sell_book(isbn, 1)
+
+    def supply():
+        for isbn in sample[: operations // 10]:
+            bookstore.supply_book(isbn, 5)
+
+    def search():
+        for isbn in sample:
+            bookstore.search_by_isbn(isbn)
+
+    def best():
+        for _ in range(100):
+            bookstore.best_selling_book()
+
+    timed('add_book', books, add)
+    timed('sell_book', operations, sell)
+    timed('supply_book', operations // 10, supply)
+    timed('search_by_isbn', operations, search)
+    timed('best_selling_book x100', 100, best)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--books', type=int, default=100_000)
+    parser.add_argument('--operations', type=int, default=200_000)
+    parser.add_argument('--db', default=':memory:', help='SQLite database path (default: in memory)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    # The small scenarios always start from an empty store, so they run in memory.
+    backends = [('dict', Bookstore, Bookstore), ('sqlite', SQLiteBookstore, lambda: SQLiteBookstore(args.db))]
+    for name, empty, factory in backends:
+        print(f'{name}:')
+        timed('test scenarios x1000', 1000, lambda: [test_scenarios(empty()) for _ in range(1000)])
+        scaled_workload(factory, args.books, args.operations, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,393 @@
+"""Times every Bookstore operation and Book.copies_sold on a seeded workload.
+
+Usage:
+  python -m benchmarks.suite run [--books 100000] [--operations 200000] [--output results.json]
+  python -m benchmarks.suite compare baseline.json results.json [--threshold 0.10]
+
+`run` writes per-operation timings (best of --repeat runs) and tracemalloc peaks as
+JSON. `compare` lines two result files up and exits with status 1 when an operation got
+slower, or a memory peak grew, by more than the threshold.
+"""
+import argparse
+import fnmatch
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
+
+from benchmarks.workload import Workload
+from bookstore.model import Book, Bookstore
+
+# name -> function(workload, shared bookstore) -> (operations timed, seconds)
+CASES: dict[str, Callable[[Workload, 'Shared'], tuple[int, float]]] = {}
+
+
+def case(name: str):
+    def register(function):
+        CASES[name] = function
+        return function
+    return register
+
+
+class Shared:
+    # The read-only cases share one catalog, loaded once with the workload replayed over
+    # the last 90 days.
+
+    def __init__(self, workload: Workload):
+        self.workload = workload
+        self._bookstore = None
+
+    @property
+    def bookstore(self):
+        if self._bookstore is None:
+            self._bookstore = self.workload.bookstore()
+            self.workload.replay(self._bookstore, days=90)
+        return self._bookstore
+
+
+def timed(function, *args) -> float:
+    # Like timeit, with the cyclic GC off: a full collection over a large catalog
+    # landing in one case would otherwise swamp its timing.
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        function(*args)
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def lookups(workload: Workload) -> list[str]:
+    return workload.sample(max(len(workload.operations), 1))
+
+
+@case('Bookstore.add_book')
+def add_book(workload, shared):
+    bookstore = Bookstore()
+    rows = list(workload.rows())
+
+    def run():
+        for row in rows:
+            bookstore.add_book(*row)
+    return len(rows), timed(run)
+
+
+@case('Bookstore.add_books')
+def add_books(workload, shared):
+    bookstore = Bookstore()
+    rows = list(workload.rows())
+    return len(rows), timed(bookstore.add_books, rows)
+
+
+@case('Bookstore.insert_book')
+def insert_book(workload, shared):
+    bookstore = Bookstore()
+    books = [Book(*row) for row in workload.rows()]
+
+    def run():
+        for book in books:
+            bookstore.insert_book(book)
+    return len(books), timed(run)
+
+
+@case('Bookstore.delete_book')
+def delete_book(workload, shared):
+    bookstore = workload.bookstore()
+    isbns = list(bookstore.catalog)
+
+    def run():
+        for isbn in isbns:
+            bookstore.delete_book(isbn)
+    return len(isbns), timed(run)
+
+
+@case('Bookstore.sell_book')
+def sell_book(workload, shared):
+    bookstore = workload.bookstore()
+    lines = [(isbn, copies) for sell, isbn, copies in workload.operations if sell]
+
+    def run():
+        for isbn, copies in lines:
+            bookstore.sell_book(isbn, copies)
+    return len(lines), timed(run)
+
+
+@case('Bookstore.supply_book')
+def supply_book(workload, shared):
+    bookstore = workload.bookstore()
+    lines = [(isbn, copies) for sell, isbn, copies in workload.operations if not sell]
+
+    def run():
+        for isbn, copies in lines:
+            bookstore.supply_book(isbn, copies)
+    return len(lines), timed(run)
+
+
+def baskets(workload: Workload, sell: bool, size: int = 10) -> list[list[tuple[str, int]]]:
+    lines = [(isbn, copies) for is_sell, isbn, copies in workload.operations if is_sell == sell]
+    return [lines[i:i + size] for i in range(0, len(lines), size)]
+
+
+@case('Bookstore.sell_many')
+def sell_many(workload, shared):
+    bookstore = workload.bookstore()
+    batches = baskets(workload, True)
+
+    def run():
+        for basket in batches:
+            bookstore.sell_many(basket)
+    return len(batches), timed(run)
+
+
+@case('Bookstore.supply_many')
+def supply_many(workload, shared):
+    bookstore = workload.bookstore()
+    batches = baskets(workload, False)
+
+    def run():
+        for basket in batches:
+            bookstore.supply_many(basket)
+    return len(batches), timed(run)
+
+
+@case('Bookstore.search_by_isbn')
+def search_by_isbn(workload, shared):
+    bookstore = shared.bookstore
+    isbns = lookups(workload)
+
+    def run():
+        for isbn in isbns:
+            bookstore.search_by_isbn(isbn)
+    return len(isbns), timed(run)
+
+
+@case('Bookstore.search_by_title')
+def search_by_title(workload, shared):
+    bookstore = shared.bookstore
+    queries = workload.title_queries(1000)
+
+    def run():
+        for query in queries:
+            bookstore.search_by_title(query)
+    return len(queries), timed(run)
+
+
+@case('Bookstore.search_by_title_prefix')
+def search_by_title_prefix(workload, shared):
+    bookstore = shared.bookstore
+    prefixes = [query[:3] for query in workload.title_queries(1000)]
+
+    def run():
+        for prefix in prefixes:
+            bookstore.search_by_title_prefix(prefix)
+    return len(prefixes), timed(run)
+
+
+@case('Bookstore.best_selling_book')
+def best_selling_book(workload, shared):
+    bookstore = shared.bookstore
+    calls = 10_000
+
+    def run():
+        for _ in range(calls):
+            bookstore.best_selling_book()
+    return calls, timed(run)
+
+
+@case('Bookstore.top_sellers')
+def top_sellers(workload, shared):
+    bookstore = shared.bookstore
+    calls = 1000
+
+    def run():
+        for _ in range(calls):
+            bookstore.top_sellers(10)
+    return calls, timed(run)
+
+
+@case('Bookstore.rank_of')
+def rank_of(workload, shared):
+    bookstore = shared.bookstore
+    isbns = lookups(workload)[:10_000]
+
+    def run():
+        for isbn in isbns:
+            bookstore.rank_of(isbn)
+    return len(isbns), timed(run)
+
+
+def windows(count: int) -> list[tuple[date, date]]:
+    # Windows of one to four weeks ending on each of the last days.
+    today = datetime.now().date()
+    return [(today - timedelta(days=i % 30 + 7 * (1 + i % 4)), today - timedelta(days=i % 30)) for i in range(count)]
+
+
+@case('Bookstore.best_selling_book_between')
+def best_selling_book_between(workload, shared):
+    bookstore = shared.bookstore
+    spans = windows(50)
+
+    def run():
+        for since, until in spans:
+            bookstore.best_selling_book_between(since, until)
+    return len(spans), timed(run)
+
+
+@case('Bookstore.top_sellers_between')
+def top_sellers_between(workload, shared):
+    bookstore = shared.bookstore
+    spans = windows(50)
+
+    def run():
+        for since, until in spans:
+            bookstore.top_sellers_between(10, since, until)
+    return len(spans), timed(run)
+
+
+@case('Bookstore.top_sellers_by_week')
+def top_sellers_by_week(workload, shared):
+    bookstore = shared.bookstore
+    calls = 10
+    return calls, timed(lambda: [bookstore.top_sellers_by_week(10) for _ in range(calls)])
+
+
+@case('Bookstore.daily_sales')
+def daily_sales(workload, shared):
+    bookstore = shared.bookstore
+    isbns = lookups(workload)[:10_000]
+
+    def run():
+        for isbn in isbns:
+            bookstore.daily_sales(isbn)
+    return len(isbns), timed(run)
+
+
+@case('Book.copies_sold')
+def copies_sold(workload, shared):
+    catalog = shared.bookstore.catalog
+    books = [catalog[isbn] for isbn in lookups(workload)]
+
+    def run():
+        for book in books:
+            book.copies_sold()
+    return len(books), timed(run)
+
+
+def measure_memory(workload: Workload) -> dict[str, int]:
+    # Peak traced allocations while loading the catalog, then while replaying the
+    # workload on it, and what the loaded store retains at the end.
+    tracemalloc.start()
+    try:
+        bookstore = workload.bookstore()
+        _, catalog_peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        workload.replay(bookstore, days=90)
+        retained, workload_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'catalog_peak_bytes': catalog_peak, 'workload_peak_bytes': workload_peak, 'retained_bytes': retained}
+
+
+def run(args) -> dict:
+    workload = Workload(args.books, args.operations, args.seed, args.skew, args.sell_ratio)
+    shared = Shared(workload)
+    results = {}
+    for name, function in CASES.items():
+        if args.only and not any(fnmatch.fnmatch(name, pattern) for pattern in args.only):
+            continue
+        runs = [function(workload, shared) for _ in range(args.repeat)]
+        count = runs[0][0]
+        best = min(seconds for _, seconds in runs)
+        results[name] = {'operations': count, 'seconds': best, 'ns_per_op': best / max(count, 1) * 1e9,
+                         'runs': [seconds for _, seconds in runs]}
+        print(f'{name:<40} {results[name]["ns_per_op"]:>12.0f} ns/op  ({count} ops)', file=sys.stderr)
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'books': args.books,
+            'operations': args.operations,
+            'seed': args.seed,
+            'skew': args.skew,
+            'sell_ratio': args.sell_ratio,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if not args.no_memory:
+        report['memory'] = measure_memory(workload)
+        for name, value in report['memory'].items():
+            print(f'{name:<40} {value / 2**20:>12.1f} MiB', file=sys.stderr)
+    return report
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> tuple[list[str], int]:
+    # Returns report lines and the number of regressions.
+    lines = []
+    regressions = 0
+    for key in ('books', 'operations', 'seed', 'skew', 'sell_ratio'):
+        if baseline['meta'].get(key) != current['meta'].get(key):
+            lines.append(f'warning: {key} differs ({baseline["meta"].get(key)} vs {current["meta"].get(key)})')
+    pairs = [(name, old['ns_per_op'], current['results'][name]['ns_per_op'], 'ns/op')
+             for name, old in baseline['results'].items() if name in current['results']]
+    pairs += [(name, old, current['memory'][name], 'bytes')
+              for name, old in baseline.get('memory', {}).items() if name in current.get('memory', {})]
+    for name, old, new, unit in pairs:
+        change = new / old - 1 if old else 0.0
+        if change > threshold:
+            verdict = 'REGRESSION'
+            regressions += 1
+        elif change < -threshold:
+            verdict = 'improved'
+        else:
+            verdict = ''
+        lines.append(f'{name:<40} {old:>14.0f} {new:>14.0f} {unit:<5} {change:>+8.1%}  {verdict}')
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='run the suite and write JSON results')
+    run_parser.add_argument('--books', type=int, default=100_000)
+    run_parser.add_argument('--operations', type=int, default=200_000)
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent of book popularity')
+    run_parser.add_argument('--sell-ratio', type=float, default=0.9, help='share of sells among operations')
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--only', action='append', help='glob of case names to run (repeatable)')
+    run_parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc pass')
+    run_parser.add_argument('--output', help='results file (stdout by default)')
+    compare_parser = commands.add_parser('compare', help='compare two result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10, help='relative change flagged (0.10 = 10%%)')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        text = json.dumps(run(args), indent=2)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as file:
+                file.write(text + '\n')
+        else:
+            print(text)
+        return
+    with open(args.baseline, encoding='utf-8') as file:
+        baseline = json.load(file)
+    with open(args.current, encoding='utf-8') as file:
+        current = json.load(file)
+    lines, regressions = compare(baseline, current, args.threshold)
+    print(f'{"case":<40} {"baseline":>14} {"current":>14}')
+    print('\n'.join(lines))
+    print(f'{regressions} regression(s) above {args.threshold:.0%}')
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Hit rate and latency of BookViewCache under a Zipf-distributed lookup workload.
+
+Usage: python -m benchmarks.view_cache [--books 100000] [--lookups 500000] [--skew 1.1] [--maxsize 4096]
+"""
+import argparse
+import itertools
+import random
+import time
+
+from bookstore.cache import BookViewCache
+from bookstore.model import Bookstore
+
+
+def zipf_sample(rng: random.Random, population: list[str], skew: float, count: int) -> list[str]:
+    weights = list(itertools.accumulate(1 / rank ** skew for rank in range(1, len(population) + 1)))
+    return rng.choices(population, cum_weights=weights, k=count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--books', type=int, default=100_000)
+    parser.add_argument('--lookups', type=int, default=500_000)
+    parser.add_argument('--skew', type=float, default=1.1)
+    parser.add_argument('--maxsize', type=int, default=4096)
+    parser.add_argument('--sell-every', type=int, default=50, help='sell a looked-up book every N lookups')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    isbns = [f'978{i:010d}' for i in range(args.books)]
+    lookups = zipf_sample(rng, isbns, args.skew, args.lookups)
+
+    def run(render) -> float:
+        bookstore = Bookstore()
+        bookstore.add_books((isbn, f'Title {i}', 20.0, 10.0, 10 ** 9) for i, isbn in enumerate(isbns))
+        lookup = render(bookstore)
+        start = time.perf_counter()
+        for i, isbn in enumerate(lookups):
+            lookup(isbn)
+            if i % args.sell_every == 0:
+                bookstore.sell_book(isbn, 1)
+        return time.perf_counter() - start
+
+    uncached = run(lambda bookstore: lambda isbn: str(bookstore.search_by_isbn(isbn)))
+    caches = []
+    cached = run(lambda bookstore: caches.append(BookViewCache(bookstore, args.maxsize)) or caches[0].text)
+
+    stats = caches[0].stats()
+    print(f'lookups: {args.lookups}  books: {args.books}  skew: {args.skew}  maxsize: {args.maxsize}')
+    print(f'hit rate: {stats["hit_rate"]:.1%}')
+    print(f'uncached: {uncached / args.lookups * 1e6:.2f} us/lookup')
+    print(f'cached:   {cached / args.lookups * 1e6:.2f} us/lookup  ({uncached / cached:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
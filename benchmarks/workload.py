@@ -0,0 +1,94 @@
+"""Seeded synthetic catalogs and sell/supply workloads shared by the benchmarks.
+
+Everything is derived from the seed, so two runs with the same arguments replay the
+same catalog and the same operations. Popularity follows a Zipf law: the book of
+popularity rank r is picked with probability proportional to 1 / r ** skew, and ranks
+are scattered over the catalog so that the best sellers are not simply the first
+books added.
+"""
+import random
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+
+from bookstore.model import Bookstore, Transaction
+
+WORDS = ('river', 'silent', 'garden', 'night', 'glass', 'empire', 'winter', 'shadow', 'paper', 'stone',
+         'ocean', 'letters', 'city', 'fire', 'house', 'music', 'north', 'machine', 'story', 'light')
+
+# Prime multiplier scattering popularity ranks over catalog positions.
+_SCATTER = 2654435761
+
+
+class Workload:
+
+    def __init__(self, books: int, operations: int, seed: int = 42, skew: float = 1.1, sell_ratio: float = 0.9):
+        self.books: int = books
+        self.seed: int = seed
+        self.skew: float = skew
+        self.sell_ratio: float = sell_ratio
+        rng = random.Random(seed)
+        # (sell?, isbn, copies): mostly small sales with occasional larger restocks.
+        self.operations: list[tuple[bool, str, int]] = [
+            (True, isbn, rng.choice((1, 1, 1, 2, 2, 3))) if rng.random() < sell_ratio
+            else (False, isbn, rng.randint(10, 100))
+            for isbn in self.sample(operations, rng)
+        ]
+
+    @staticmethod
+    def isbn(index: int) -> str:
+        return f'978{index:010d}'
+
+    def rows(self) -> Iterator[tuple[str, str, float, float, int]]:
+        # Catalog rows for Bookstore.add_books, generated on demand so that catalogs of
+        # millions of books are not held twice.
+        rng = random.Random(self.seed ^ 0x5EED)
+        for index in range(self.books):
+            title = ' '.join(rng.choices(WORDS, k=rng.randint(2, 4)))
+            purchase_price = round(rng.uniform(3.0, 30.0), 2)
+            sale_price = round(purchase_price * rng.uniform(1.2, 2.0), 2)
+            yield self.isbn(index), f'{title.title()} {index}', sale_price, purchase_price, rng.randint(0, 50)
+
+    def sample(self, count: int, rng: random.Random | None = None) -> list[str]:
+        # ISBNs drawn by popularity, by inverting the continuous Zipf distribution so that
+        # no per-book weight table is needed.
+        rng = rng or random.Random(self.seed + count)
+        books, skew = self.books, self.skew
+        isbns = []
+        for _ in range(count):
+            u = rng.random()
+            if skew == 1.0:
+                rank = books ** u
+            else:
+                rank = ((books ** (1 - skew) - 1) * u + 1) ** (1 / (1 - skew))
+            rank = min(int(rank), books) - 1
+            isbns.append(self.isbn(rank * _SCATTER % books))
+        return isbns
+
+    def title_queries(self, count: int) -> list[str]:
+        rng = random.Random(self.seed + 7)
+        return [' '.join(rng.sample(WORDS, rng.randint(1, 2))) for _ in range(count)]
+
+    def bookstore(self, compact_ledger: bool = False) -> Bookstore:
+        bookstore = Bookstore(compact_ledger)
+        bookstore.add_books(self.rows())
+        return bookstore
+
+    def replay(self, bookstore: Bookstore, days: int | None = None) -> int:
+        # Applies every operation and returns the number that succeeded. By default they
+        # go through sell_book/supply_book and are dated now; with days, they are spread
+        # evenly over that many days up to now, which gives the windowed queries and the
+        # history rollup something to work on.
+        if days is None:
+            return sum(bookstore.sell_book(isbn, copies) if sell else bookstore.supply_book(isbn, copies)
+                       for sell, isbn, copies in self.operations)
+        catalog = bookstore.catalog
+        start = datetime.now() - timedelta(days=days)
+        step = timedelta(days=days) / max(len(self.operations), 1)
+        done = 0
+        for i, (sell, isbn, copies) in enumerate(self.operations):
+            book = catalog.get(isbn)
+            if book is None or (sell and copies > book.quantity):
+                continue
+            book.replay(Transaction(Transaction.SELL if sell else Transaction.SUPPLY, copies, start + i * step))
+            done += 1
+        return done
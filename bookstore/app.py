@@ -1,9 +1,55 @@
+import argparse
+import sys
+
+from bookstore.batch import BatchRunner, format_summary
+from bookstore.isbn import CanonicalISBNBookstore
+from bookstore.metrics import metrics
+from bookstore.model import Bookstore
+from bookstore.storage import FileStorage
 from bookstore.view import UIConsole
 
 
 def main():
-    app = UIConsole()
-    app.run()
+    parser = argparse.ArgumentParser(description='Bookstore App')
+    parser.add_argument('--data', help='directory where the catalog and its transactions are persisted')
+    parser.add_argument('--archive', action='store_true',
+                        help='with --data, keep transaction histories in a memory-mapped archive that is '
+                             'read on demand instead of loaded at startup')
+    parser.add_argument('--script', help="replay commands from a file ('-' for stdin) instead of the menu")
+    parser.add_argument('--quiet', action='store_true', help='with --script, print only the summary')
+    parser.add_argument('--strict-isbn', action='store_true',
+                        help='accept only valid ISBN-10/13s and treat their hyphenated and 10-digit forms as one book')
+    parser.add_argument('--metrics', help='record operation metrics and write them to this file on exit '
+                                          '(Prometheus text for .prom, JSON otherwise)')
+    args = parser.parse_args()
+
+    if args.metrics is not None:
+        metrics.enable()
+
+    bookstore = CanonicalISBNBookstore() if args.strict_isbn else Bookstore()
+    storage = None if args.data is None else FileStorage(args.data, archive=args.archive)
+    if storage is not None:
+        storage.load(bookstore)
+    try:
+        if args.script is None:
+            UIConsole(bookstore).run()
+        else:
+            run_script(bookstore, args.script, args.quiet)
+    finally:
+        if storage is not None:
+            storage.close()
+        if args.metrics is not None:
+            metrics.dump(args.metrics)
+
+
+def run_script(bookstore: Bookstore, script: str, quiet: bool):
+    runner = BatchRunner(bookstore, None if quiet else sys.stdout)
+    if script == '-':
+        summary = runner.run(sys.stdin)
+    else:
+        with open(script, newline='', encoding='utf-8') as file:
+            summary = runner.run(file)
+    print(format_summary(summary))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,127 @@
+import itertools
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from bookstore.model import Transaction, TransactionLedger, date_to_micros, micros_to_date
+
+
+class TransactionArchive:
+    # Read-only file of fixed-width transaction records, memory-mapped so that only the
+    # pages actually read become resident. Layout, all fields int64 in the byte order
+    # named in the header:
+    #   header   magic, byte order, record count, entry count
+    #   records  (type, copies, micros) per transaction, each history stored contiguously
+    #   index    (first record, record count, copies sold, copies supplied) per history
+    # Histories are numbered in the order they were written; the caller keeps the
+    # ISBN -> entry mapping (FileStorage keeps it in its snapshot).
+
+    MAGIC = b'BKARCH01'
+    HEADER = struct.Struct('<8s8sqq')
+    RECORD = 3
+    ENTRY = 4
+
+    def __init__(self, path: str | Path):
+        self.path: Path = Path(path)
+        with open(self.path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, byteorder, records, entries = self.HEADER.unpack_from(self._map)
+        if magic != self.MAGIC:
+            raise ValueError(f'{self.path} is not a transaction archive')
+        if byteorder.rstrip(b'\0').decode() != sys.byteorder:
+            raise ValueError(f'{self.path} was written on a {byteorder.decode()}-endian machine')
+        self._view = memoryview(self._map)
+        self._words = self._view[self.HEADER.size:].cast('q')
+        self._records = self._words[:records * self.RECORD]
+        self._index = self._words[records * self.RECORD:records * self.RECORD + entries * self.ENTRY]
+
+    def __len__(self) -> int:
+        return len(self._index) // self.ENTRY
+
+    def entry(self, number: int) -> tuple[int, int, int, int]:
+        # (first record, record count, copies sold, copies supplied) of a history.
+        offset = number * self.ENTRY
+        return tuple(self._index[offset:offset + self.ENTRY])
+
+    def history(self, number: int) -> 'ArchivedHistory':
+        return ArchivedHistory(self, number)
+
+    def records(self, start: int, stop: int) -> Iterator[tuple[int, int, int]]:
+        fields = self._records[start * self.RECORD:stop * self.RECORD]
+        return zip(fields[0::3], fields[1::3], fields[2::3])
+
+    def close(self):
+        # Histories still reading from the archive fail once it is closed.
+        for view in (self._records, self._index, self._words, self._view):
+            view.release()
+        self._map.close()
+
+    @classmethod
+    def write(cls, path: str | Path, histories: Iterable[list[Transaction] | TransactionLedger],
+              lengths: Iterable[int] | None = None) -> int:
+        # Writes the histories in order, entry i holding the i-th one, and returns the
+        # number of entries. With lengths, only the first lengths[i] transactions of
+        # history i are written, e.g. the part a FrozenBook covers. The file is fsync'ed
+        # before this returns.
+        index = array('q')
+        records = 0
+        with open(path, 'wb') as file:
+            file.write(bytes(cls.HEADER.size))
+            for history, length in zip(histories, itertools.repeat(None) if lengths is None else lengths):
+                if isinstance(history, TransactionLedger):
+                    fields = array('q', (field for record in history.records(length) for field in record))
+                else:
+                    fields = array('q', (field for t in itertools.islice(history, length)
+                                         for field in (t.type, t.copies, date_to_micros(t.date))))
+                file.write(fields.tobytes())
+                count = len(fields) // cls.RECORD
+                types, copies = fields[0::3], fields[1::3]
+                sold = sum(c for t, c in zip(types, copies) if t == Transaction.SELL)
+                supplied = sum(c for t, c in zip(types, copies) if t == Transaction.SUPPLY)
+                index.extend((records, count, sold, supplied))
+                records += count
+            file.write(index.tobytes())
+            file.seek(0)
+            file.write(cls.HEADER.pack(cls.MAGIC, sys.byteorder.encode(), records, len(index) // cls.ENTRY))
+            file.flush()
+            os.fsync(file.fileno())
+        return len(index) // cls.ENTRY
+
+
+class ArchivedHistory(TransactionLedger):
+    # Book history whose first transactions are read from a TransactionArchive, with
+    # the ones recorded since kept in the ledger arrays. Transaction objects are only
+    # built when the history is indexed or iterated, and totals come from the
+    # archive's index, so copies_sold() and recount() never read the records.
+
+    def __init__(self, archive: TransactionArchive, entry: int):
+        super().__init__()
+        self._archive = archive
+        self._start, self._archived, self._sold, self._supplied = archive.entry(entry)
+
+    def __len__(self) -> int:
+        return self._archived + len(self._types)
+
+    def total(self, type: int) -> int:
+        archived = self._sold if type == Transaction.SELL else self._supplied if type == Transaction.SUPPLY else 0
+        return archived + super().total(type)
+
+    def records(self, stop: int | None = None) -> Iterator[tuple[int, int, int]]:
+        stop = len(self) if stop is None else min(stop, len(self))
+        archived = min(stop, self._archived)
+        yield from self._archive.records(self._start, self._start + archived)
+        yield from super().records(stop - archived)
+
+    def _at(self, index: int) -> Transaction:
+        if index >= self._archived:
+            return super()._at(index - self._archived)
+        type, copies, micros = next(self._archive.records(self._start + index, self._start + index + 1))
+        return Transaction(type, copies, micros_to_date(micros))
+
+    def __iter__(self) -> Iterator[Transaction]:
+        for type, copies, micros in self.records():
+            yield Transaction(type, copies, micros_to_date(micros))
@@ -0,0 +1,120 @@
+import csv
+import time
+from collections import Counter
+from collections.abc import Iterable
+from typing import TextIO
+
+from bookstore.model import Bookstore
+
+# A script holds one command per line, as CSV so that titles may contain commas.
+# Commands are named or use the UIConsole menu number:
+#   add,<isbn>,<title>,<sale price>,<purchase price>,<quantity>     (or 1,...)
+#   sell,<isbn>,<copies>                                            (or 2,...)
+#   supply,<isbn>,<copies>                                          (or 3,...)
+#   search,<isbn>                                                   (or 4,...)
+#   delete,<isbn>                                                   (or 5,...)
+#   best                                                            (or 6)
+#   title,<query>                                                   (or 7,...)
+# Blank lines and lines starting with # are ignored.
+ALIASES = {'1': 'add', '2': 'sell', '3': 'supply', '4': 'search', '5': 'delete', '6': 'best', '7': 'title'}
+
+
+class BatchRunner:
+    # Replays a command script against a Bookstore without the interactive menu. The
+    # messages UIConsole would print are collected and written flush_every lines at a
+    # time, and whatever is left once the script ends or a command raises, so a long
+    # script neither holds all its output in memory nor loses it.
+
+    def __init__(self, bookstore: Bookstore, out: TextIO | None = None, flush_every: int = 1000):
+        self.bookstore: Bookstore = bookstore
+        self.out: TextIO | None = out
+        self.flush_every: int = flush_every
+        self.commands = {
+            'add': self.add_book,
+            'sell': self.sell_book,
+            'supply': self.supply_book,
+            'search': self.search_by_isbn,
+            'delete': self.delete_book,
+            'best': self.best_seller,
+            'title': self.search_by_title,
+        }
+
+    def run(self, lines: Iterable[str]) -> Counter:
+        # Returns per-command counts plus 'ok', 'failed' and 'invalid' totals.
+        summary: Counter = Counter()
+        pending: list[str] = []
+        start = time.perf_counter()
+        reader = csv.reader(lines)
+        try:
+            for row in reader:
+                if not row or not row[0].strip() or row[0].lstrip().startswith('#'):
+                    continue
+                name = ALIASES.get(row[0].strip(), row[0].strip())
+                command = self.commands.get(name)
+                try:
+                    if command is None:
+                        raise ValueError(f'unknown command {row[0]!r}')
+                    ok, message = command(*row[1:])
+                except (TypeError, ValueError) as error:
+                    summary['invalid'] += 1
+                    ok, message = None, f'line {reader.line_num}: invalid command ({error})'
+                else:
+                    summary[name] += 1
+                    summary['ok' if ok else 'failed'] += 1
+                if self.out is not None:
+                    pending.append(message)
+                    if len(pending) >= self.flush_every:
+                        self._write(pending)
+        finally:
+            if pending:
+                self._write(pending)
+        summary['seconds'] = time.perf_counter() - start
+        return summary
+
+    def _write(self, messages: list[str]):
+        messages.append('')
+        self.out.write('\n'.join(messages))
+        messages.clear()
+
+    def add_book(self, isbn: str, title: str, sale_price: str, purchase_price: str, quantity: str) -> tuple[bool, str]:
+        if self.bookstore.search_by_isbn(isbn) is not None:
+            return False, f'Book {isbn} already exists'
+        self.bookstore.add_book(isbn, title, float(sale_price), float(purchase_price), int(quantity))
+        return True, f'Book {isbn} added'
+
+    def sell_book(self, isbn: str, copies: str) -> tuple[bool, str]:
+        if self.bookstore.sell_book(isbn, int(copies)):
+            return True, 'Book sold successfully'
+        return False, 'Book not found or not enough quantity'
+
+    def supply_book(self, isbn: str, copies: str) -> tuple[bool, str]:
+        if self.bookstore.supply_book(isbn, int(copies)):
+            return True, 'Book supplied successfully'
+        return False, 'Book not found'
+
+    def search_by_isbn(self, isbn: str) -> tuple[bool, str]:
+        book = self.bookstore.search_by_isbn(isbn)
+        return (True, str(book)) if book else (False, 'Book not found')
+
+    def delete_book(self, isbn: str) -> tuple[bool, str]:
+        if self.bookstore.delete_book(isbn):
+            return True, 'Book deleted successfully'
+        return False, 'Book not found'
+
+    def best_seller(self) -> tuple[bool, str]:
+        book = self.bookstore.best_selling_book()
+        return (True, str(book)) if book else (False, 'No book sold yet')
+
+    def search_by_title(self, query: str) -> tuple[bool, str]:
+        books = self.bookstore.search_by_title(query) or self.bookstore.search_by_title_prefix(query)
+        return (True, '\n\n'.join(str(book) for book in books)) if books else (False, 'Book not found')
+
+
+def format_summary(summary: Counter) -> str:
+    seconds = summary['seconds']
+    operations = summary['ok'] + summary['failed']
+    rate = operations / seconds if seconds else 0.0
+    counts = ', '.join(f'{name}: {summary[name]}' for name in ALIASES.values() if summary[name])
+    return f'{operations} operations in {seconds:.3f} s ({rate:,.0f} ops/s) - ' \
+           f'ok: {summary["ok"]}, failed: {summary["failed"]}, invalid: {summary["invalid"]}' \
+           + (f'\n{counts}' if counts else '')
@@ -0,0 +1,80 @@
+import time
+from collections import OrderedDict
+
+from bookstore.model import Book, Bookstore, CatalogObserver, Transaction
+
+
+class BookViewCache(CatalogObserver):
+    # Bounded LRU cache of rendered books, as the str(book) text and the as_dict() form,
+    # with an optional time to live in seconds. The cache observes the bookstore: a sale,
+    # supply or deletion of a book drops its entry, so a view is never stale with
+    # respect to those operations. Changing a book's attributes directly is not observed.
+
+    def __init__(self, bookstore: Bookstore, maxsize: int = 4096, ttl: float | None = None):
+        self.bookstore: Bookstore = bookstore
+        self.maxsize: int = maxsize
+        self.ttl: float | None = ttl
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries: OrderedDict[str, tuple[str, dict, float]] = OrderedDict()
+        bookstore.add_observer(self, existing=False)
+
+    def text(self, isbn: str) -> str | None:
+        entry = self._lookup(isbn)
+        return None if entry is None else entry[0]
+
+    def as_dict(self, isbn: str) -> dict | None:
+        entry = self._lookup(isbn)
+        return None if entry is None else dict(entry[1])
+
+    def _lookup(self, isbn: str) -> tuple[str, dict, float] | None:
+        # Entries are keyed by the book's own ISBN, the one invalidation sees, since a
+        # store such as CanonicalISBNBookstore finds a book under several spellings. An
+        # ISBN that is not a key as typed is resolved through the store.
+        entries = self._entries
+        key = isbn
+        entry = entries.get(key)
+        if entry is None:
+            book = self.bookstore.search_by_isbn(isbn)
+            if book is None:
+                self.misses += 1
+                return None
+            key = book.isbn
+            entry = entries.get(key)
+        if entry is not None and (self.ttl is None or entry[2] > time.monotonic()):
+            entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        self.misses += 1
+        book = self.bookstore.search_by_isbn(key)
+        if book is None:
+            entries.pop(key, None)
+            return None
+        expires = time.monotonic() + self.ttl if self.ttl is not None else 0.0
+        entry = entries[key] = (str(book), book.as_dict(), expires)
+        entries.move_to_end(key)
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, isbn: str):
+        book = self.bookstore.search_by_isbn(isbn)
+        self._entries.pop(isbn if book is None else book.isbn, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def book_removed(self, book: Book):
+        self._entries.pop(book.isbn, None)
+
+    def transaction_recorded(self, book: Book, transaction: Transaction):
+        self._entries.pop(book.isbn, None)
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.misses
+        return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def close(self):
+        self.bookstore.remove_observer(self)
+        self._entries.clear()
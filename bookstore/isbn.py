@@ -0,0 +1,104 @@
+import operator
+from collections.abc import Iterable
+from datetime import date
+
+from bookstore.model import Book, Bookstore, LoadResult
+
+
+class InvalidISBN(ValueError):
+    pass
+
+
+_SEPARATORS = str.maketrans('', '', '- ')
+
+
+def normalize(isbn: str) -> str:
+    # Canonical form of an ISBN-10 or ISBN-13: the 13 digits of its ISBN-13, without
+    # hyphens or spaces. Raises InvalidISBN if the length, digits or check digit are wrong.
+    digits = isbn.translate(_SEPARATORS).upper()
+    if len(digits) == 13 and digits.isdigit() and digits[:3] in ('978', '979'):
+        if _isbn13_sum(digits) % 10 == 0:
+            return digits
+    elif len(digits) == 10 and digits[:9].isdigit() and (digits[9].isdigit() or digits[9] == 'X'):
+        total = sum(map(operator.mul, map(int, digits[:9]), range(10, 1, -1)))
+        if (total + (10 if digits[9] == 'X' else int(digits[9]))) % 11 == 0:
+            body = '978' + digits[:9]
+            return body + str(-_isbn13_sum(body) % 10)
+    raise InvalidISBN(f'invalid ISBN: {isbn!r}')
+
+
+def _isbn13_sum(digits: str) -> int:
+    # Weighted sum of ISBN-13 digits, alternately by 1 and 3.
+    return sum(map(int, digits[::2])) + 3 * sum(map(int, digits[1::2]))
+
+
+def is_valid(isbn: str) -> bool:
+    try:
+        normalize(isbn)
+    except InvalidISBN:
+        return False
+    return True
+
+
+def to_int(isbn: str) -> int:
+    # An ISBN-13 packed into a 64-bit integer, for fixed-width binary formats.
+    return int(normalize(isbn))
+
+
+def from_int(key: int) -> str:
+    return f'{key:013d}'
+
+
+class CanonicalISBNBookstore(Bookstore):
+    # Bookstore that only accepts valid ISBN-10/13s and keys the catalog by their
+    # canonical ISBN-13, so "978-0-13-110362-7", "9780131103627" and "0131103628" are
+    # the same book. Every method still takes ISBNs as typed: add_book and insert_book
+    # raise InvalidISBN for an invalid one, while lookups, sales and the other
+    # operations treat it as a book that is not in the catalog.
+    #
+    # The keys stay str rather than packed ints: each key is the Book's own isbn
+    # object, so the dict holds no key objects of its own, and an int key would add one
+    # per entry (see benchmarks/isbn_keys.py).
+
+    def _key(self, isbn: str) -> str:
+        # Every key is canonical, so an ISBN found as typed needs no normalizing.
+        if isbn in self.catalog:
+            return isbn
+        try:
+            return normalize(isbn)
+        except InvalidISBN:
+            return isbn
+
+    def add_book(self, isbn: str, title: str, sale_price: float, purchase_price: float, quantity: int):
+        super().add_book(normalize(isbn), title, sale_price, purchase_price, quantity)
+
+    def add_books(self, rows: Iterable[tuple[str, str, float, float, int]]) -> LoadResult:
+        return super().add_books((normalize(isbn), *rest) for isbn, *rest in rows)
+
+    def insert_book(self, book: Book) -> bool:
+        book.isbn = normalize(book.isbn)
+        return super().insert_book(book)
+
+    def delete_book(self, isbn: str):
+        return super().delete_book(self._key(isbn))
+
+    def search_by_isbn(self, isbn: str) -> Book | None:
+        return self.catalog.get(self._key(isbn))
+
+    def sell_book(self, isbn: str, copies: int) -> bool:
+        return super().sell_book(self._key(isbn), copies)
+
+    def supply_book(self, isbn: str, copies: int) -> bool:
+        return super().supply_book(self._key(isbn), copies)
+
+    def sell_many(self, lines: Iterable[tuple[str, int]], atomic: bool = False) -> list[bool]:
+        return super().sell_many([(self._key(isbn), copies) for isbn, copies in lines], atomic)
+
+    def supply_many(self, lines: Iterable[tuple[str, int]], atomic: bool = False) -> list[bool]:
+        return super().supply_many([(self._key(isbn), copies) for isbn, copies in lines], atomic)
+
+    def rank_of(self, isbn: str) -> int | None:
+        return super().rank_of(self._key(isbn))
+
+    def daily_sales(self, isbn: str, since: date | None = None, until: date | None = None) -> list[tuple[date, int, int]]:
+        return super().daily_sales(self._key(isbn), since, until)
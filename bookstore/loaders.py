@@ -0,0 +1,43 @@
+import csv
+import json
+from collections.abc import Iterator
+from pathlib import Path
+
+FIELDS = ('isbn', 'title', 'sale_price', 'purchase_price', 'quantity')
+
+Row = tuple[str, str, float, float, int]
+
+
+def read_csv(path: str | Path) -> Iterator[Row]:
+    # Streams rows from a CSV file whose header names the FIELDS columns, in any order.
+    with open(path, newline='', encoding='utf-8') as file:
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header is None:
+            return
+        try:
+            isbn, title, sale_price, purchase_price, quantity = (header.index(field) for field in FIELDS)
+        except ValueError:
+            raise ValueError(f'CSV header must contain the columns {", ".join(FIELDS)}') from None
+        for row in reader:
+            if row:
+                yield row[isbn], row[title], float(row[sale_price]), float(row[purchase_price]), int(row[quantity])
+
+
+def read_jsonl(path: str | Path) -> Iterator[Row]:
+    # Streams rows from a file holding one JSON object with the FIELDS keys per line.
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                record = json.loads(line)
+                yield (str(record['isbn']), record['title'], float(record['sale_price']),
+                       float(record['purchase_price']), int(record['quantity']))
+
+
+def read_catalog(path: str | Path) -> Iterator[Row]:
+    suffix = Path(path).suffix.lower()
+    if suffix == '.csv':
+        return read_csv(path)
+    if suffix in ('.jsonl', '.ndjson'):
+        return read_jsonl(path)
+    raise ValueError(f'Unsupported catalog file type: {suffix}')
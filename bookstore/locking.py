@@ -0,0 +1,161 @@
+import functools
+import threading
+from collections.abc import Callable, Iterable
+from contextlib import ExitStack
+from datetime import datetime
+
+from bookstore.model import Book, Bookstore, CatalogObserver, CatalogSnapshot, LoadResult, Transaction
+
+
+class ThreadSafeBookstore(Bookstore):
+    # Bookstore that can be shared by threads, e.g. several POS terminals.
+    #
+    # Each ISBN maps to one of `stripes` locks, which makes the check-then-decrement in
+    # Book.sell and every other change to that book atomic without making sales of books
+    # on other stripes wait for it. The shared indexes are updated under a separate
+    # lock that is held only for the index update itself; locks are always taken stripe
+    # first, then index, and stripes in ascending order. search_by_isbn takes no lock at
+    # all, a dict lookup being atomic.
+    #
+    # The stripes make concurrent sales safe, not faster. Every sale also updates the
+    # shared indexes (best sellers, timeline, storage log) under the index lock, and
+    # all threads share the GIL, so throughput stays at the single-thread rate however
+    # many threads sell: 60-70k sales/s from 1 to 8 threads against 110k/s for a plain
+    # Bookstore, per python -m benchmarks.concurrency. Use ShardedBookstore to spread
+    # sales over processes.
+    #
+    # Only changes made through the Bookstore methods are synchronized: calling sell or
+    # supply on a Book obtained from search_by_isbn bypasses the stripe lock.
+    #
+    # Work that needs a settled catalog (a storage compaction, say) cannot take every
+    # lock from an observer callback, which runs with a stripe held. Observers queue it
+    # with _after_change instead, and the method that made the change runs the queue
+    # with every lock held once it has released its own.
+
+    def __init__(self, compact_ledger: bool = False, stripes: int = 64):
+        super().__init__(compact_ledger)
+        self._stripes: list[threading.Lock] = [threading.Lock() for _ in range(stripes)]
+        self._index_lock: threading.Lock = threading.Lock()
+        self._deferred: list[Callable[[], None]] = []
+
+    def _stripe(self, isbn: str) -> threading.Lock:
+        return self._stripes[hash(isbn) % len(self._stripes)]
+
+    def _locked_stripes(self, isbns: Iterable[str] | None = None) -> ExitStack:
+        # Takes the stripes of the given ISBNs, or all of them, in ascending order.
+        if isbns is None:
+            indexes = range(len(self._stripes))
+        else:
+            indexes = sorted({hash(isbn) % len(self._stripes) for isbn in isbns})
+        stack = ExitStack()
+        for index in indexes:
+            stack.enter_context(self._stripes[index])
+        return stack
+
+    def add_observer(self, observer: CatalogObserver, existing: bool = True):
+        with self._locked_stripes(), self._index_lock:
+            super().add_observer(observer, existing)
+
+    def remove_observer(self, observer: CatalogObserver):
+        with self._index_lock:
+            super().remove_observer(observer)
+
+    def add_book(self, isbn: str, title: str, sale_price: float, purchase_price: float, quantity: int):
+        with self._stripe(isbn):
+            super().add_book(isbn, title, sale_price, purchase_price, quantity)
+
+    def add_books(self, rows: Iterable[tuple[str, str, float, float, int]]) -> LoadResult:
+        with self._locked_stripes(), self._index_lock:
+            return super().add_books(rows)
+
+    def insert_book(self, book: Book) -> bool:
+        with self._stripe(book.isbn):
+            return super().insert_book(book)
+
+    def _insert(self, book: Book):
+        with self._index_lock:
+            super()._insert(book)
+
+    def _on_transaction(self, book: Book, transaction: Transaction):
+        with self._index_lock:
+            super()._on_transaction(book, transaction)
+
+    def delete_book(self, isbn: str):
+        with self._stripe(isbn), self._index_lock:
+            return super().delete_book(isbn)
+
+    def _compact_book(self, isbn: str, cutoff: datetime, period: str) -> tuple[int, int]:
+        with self._stripe(isbn):
+            return super()._compact_book(isbn, cutoff, period)
+
+    def _settled(self, action: Callable[[], None]):
+        with self._locked_stripes(), self._index_lock:
+            action()
+
+    def _after_change(self, action: Callable[[], None]):
+        # Called with the index lock held.
+        if action not in self._deferred:
+            self._deferred.append(action)
+
+    def _run_deferred(self):
+        if self._deferred:
+            with self._locked_stripes(), self._index_lock:
+                deferred, self._deferred = self._deferred, []
+                for action in deferred:
+                    action()
+
+    def snapshot(self) -> CatalogSnapshot:
+        # Taken with every lock held, so that no change is caught halfway.
+        with self._locked_stripes(), self._index_lock:
+            return super().snapshot()
+
+    def _snapshot_lock(self) -> Callable[[str], threading.Lock]:
+        return self._stripe
+
+    def sell_book(self, isbn: str, copies: int) -> bool:
+        with self._stripe(isbn):
+            return super().sell_book(isbn, copies)
+
+    def supply_book(self, isbn: str, copies: int) -> bool:
+        with self._stripe(isbn):
+            return super().supply_book(isbn, copies)
+
+    def sell_many(self, lines: Iterable[tuple[str, int]], atomic: bool = False) -> list[bool]:
+        lines = list(lines)
+        with self._locked_stripes(isbn for isbn, _ in lines):
+            return super().sell_many(lines, atomic)
+
+    def supply_many(self, lines: Iterable[tuple[str, int]], atomic: bool = False) -> list[bool]:
+        lines = list(lines)
+        with self._locked_stripes(isbn for isbn, _ in lines):
+            return super().supply_many(lines, atomic)
+
+
+def _reading_indexes(method):
+    # Index queries may reorganize their structures (e.g. dropping stale heap entries).
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        with self._index_lock:
+            return method(self, *args, **kwargs)
+    return locked
+
+
+for _name in ('best_selling_book', 'top_sellers', 'rank_of', 'search_by_title', 'search_by_title_prefix',
+              'best_selling_book_between', 'top_sellers_between', 'top_sellers_by_week', 'daily_sales',
+              '_index_history'):
+    setattr(ThreadSafeBookstore, _name, _reading_indexes(getattr(Bookstore, _name)))
+
+
+def _running_deferred(method):
+    @functools.wraps(method)
+    def changing(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._run_deferred()
+    return changing
+
+
+for _name in ('add_book', 'add_books', 'insert_book', 'delete_book', 'sell_book', 'supply_book', 'sell_many',
+              'supply_many'):
+    setattr(ThreadSafeBookstore, _name, _running_deferred(ThreadSafeBookstore.__dict__[_name]))
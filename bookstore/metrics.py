@@ -0,0 +1,236 @@
+import functools
+import json
+import threading
+import time
+from pathlib import Path
+
+from bookstore.model import Book, Bookstore
+
+# (class, method, whether a False/None result counts as a miss)
+INSTRUMENTED = (
+    (Bookstore, 'add_book', False),
+    (Bookstore, 'sell_book', True),
+    (Bookstore, 'supply_book', True),
+    (Bookstore, 'search_by_isbn', True),
+    (Bookstore, 'delete_book', True),
+    (Bookstore, 'best_selling_book', True),
+    (Book, 'copies_sold', False),
+)
+
+
+def _overriding(owner: type, name: str) -> list[type]:
+    # owner and every subclass, however deep, that defines name itself.
+    classes, pending = [], [owner]
+    while pending:
+        cls = pending.pop()
+        if name in cls.__dict__ and cls not in classes:
+            classes.append(cls)
+        pending.extend(cls.__subclasses__())
+    return classes
+
+
+class Histogram:
+    # HDR-style log-linear latency histogram over integer nanoseconds: every power of two
+    # is split into 2**SUB_BITS linear buckets, so any recorded value is known within
+    # 1/2**SUB_BITS (12.5%) of its true value at a constant cost per record.
+
+    SUB_BITS = 3
+
+    def __init__(self):
+        self.counts: dict[int, int] = {}
+        self.count: int = 0
+        self.total: int = 0
+        self.max: int = 0
+
+    def record(self, value: int):
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    @classmethod
+    def _index(cls, value: int) -> int:
+        exponent = value.bit_length() - cls.SUB_BITS - 1
+        if exponent <= 0:
+            return value
+        return (exponent << cls.SUB_BITS) + (value >> exponent)
+
+    @classmethod
+    def upper_bound(cls, index: int) -> int:
+        # Largest value that falls in the bucket.
+        exponent = (index >> cls.SUB_BITS) - 1
+        if exponent <= 0:
+            return index
+        return (((index & ((1 << cls.SUB_BITS) - 1)) + (1 << cls.SUB_BITS) + 1) << exponent) - 1
+
+    def percentile(self, percent: float) -> int:
+        if not self.count:
+            return 0
+        rank = max(1, round(self.count * percent / 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self.upper_bound(index), self.max)
+        return self.max
+
+
+class OperationStats:
+
+    def __init__(self):
+        self.calls: int = 0
+        self.errors: int = 0
+        self.misses: int = 0
+        self.latency: Histogram = Histogram()
+
+    def as_dict(self) -> dict:
+        latency = self.latency
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'misses': self.misses,
+            'latency_ns': {
+                'mean': latency.total / latency.count if latency.count else 0.0,
+                'p50': latency.percentile(50),
+                'p90': latency.percentile(90),
+                'p99': latency.percentile(99),
+                'max': latency.max,
+            },
+        }
+
+
+class Metrics:
+    # Opt-in instrumentation of the public Bookstore and Book operations listed in
+    # INSTRUMENTED. enable() swaps timing wrappers into the classes and disable() puts the
+    # original functions back, so a disabled registry costs nothing. Subclasses that
+    # override an operation (ThreadSafeBookstore, CanonicalISBNBookstore, ...) get their
+    # own wrapper recorded under the same name, so that their work, lock waits included,
+    # is measured too; only subclasses already defined when enable() runs are covered.
+    # Only the outermost instrumented call is recorded: the search_by_isbn done inside
+    # sell_book, say, is part of the sell_book latency rather than a search of its own.
+    # A False or None result counts as a miss (book not found, not enough stock,
+    # nothing sold yet).
+
+    def __init__(self):
+        self.operations: dict[str, OperationStats] = {}
+        self._originals: dict[tuple[type, str], object] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._originals)
+
+    def enable(self):
+        if self.enabled:
+            return
+        for owner, name, counts_misses in INSTRUMENTED:
+            key = f'{owner.__name__}.{name}'
+            for cls in _overriding(owner, name):
+                original = cls.__dict__[name]
+                self._originals[(cls, name)] = original
+                setattr(cls, name, self._wrap(key, original, counts_misses))
+
+    def disable(self):
+        for (owner, name), original in self._originals.items():
+            setattr(owner, name, original)
+        self._originals.clear()
+
+    def reset(self):
+        with self._lock:
+            for stats in self.operations.values():
+                stats.__init__()
+
+    def _wrap(self, key: str, function, counts_misses: bool):
+        local = self._local
+        stats = self.operations.setdefault(key, OperationStats())
+        lock = self._lock
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            if getattr(local, 'active', False):
+                return function(*args, **kwargs)
+            local.active = True
+            start = time.perf_counter_ns()
+            try:
+                result = function(*args, **kwargs)
+            except Exception:
+                elapsed = time.perf_counter_ns() - start
+                with lock:
+                    stats.calls += 1
+                    stats.errors += 1
+                    stats.latency.record(elapsed)
+                raise
+            finally:
+                local.active = False
+            elapsed = time.perf_counter_ns() - start
+            with lock:
+                stats.calls += 1
+                if counts_misses and (result is False or result is None):
+                    stats.misses += 1
+                stats.latency.record(elapsed)
+            return result
+        return timed
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {key: stats.as_dict() for key, stats in self.operations.items() if stats.calls}
+
+    def to_json(self) -> str:
+        return json.dumps(self.as_dict(), indent=2)
+
+    # (name, type, help) of the Prometheus families, in output order.
+    FAMILIES = (
+        ('bookstore_operation_calls_total', 'counter', 'Calls of bookstore operations.'),
+        ('bookstore_operation_errors_total', 'counter', 'Calls that raised an exception.'),
+        ('bookstore_operation_misses_total', 'counter', 'Calls that returned False or None.'),
+        ('bookstore_operation_seconds', 'histogram', 'Latency of bookstore operations.'),
+    )
+
+    def to_prometheus(self) -> str:
+        # One block per family, its samples right under its HELP and TYPE lines, as the
+        # text exposition format requires.
+        samples: dict[str, list[str]] = {name: [] for name, _, _ in self.FAMILIES}
+        with self._lock:
+            for key, stats in self.operations.items():
+                if not stats.calls:
+                    continue
+                label = f'operation="{key}"'
+                samples['bookstore_operation_calls_total'].append(f'{{{label}}} {stats.calls}')
+                samples['bookstore_operation_errors_total'].append(f'{{{label}}} {stats.errors}')
+                samples['bookstore_operation_misses_total'].append(f'{{{label}}} {stats.misses}')
+                seconds = samples['bookstore_operation_seconds']
+                histogram = stats.latency
+                cumulative = 0
+                for index in sorted(histogram.counts):
+                    cumulative += histogram.counts[index]
+                    bound = (Histogram.upper_bound(index) + 1) / 1e9
+                    seconds.append(f'_bucket{{{label},le="{bound:.9g}"}} {cumulative}')
+                seconds.append(f'_bucket{{{label},le="+Inf"}} {histogram.count}')
+                seconds.append(f'_sum{{{label}}} {histogram.total / 1e9:.9g}')
+                seconds.append(f'_count{{{label}}} {histogram.count}')
+        lines = []
+        for name, kind, text in self.FAMILIES:
+            lines.append(f'# HELP {name} {text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(name + sample for sample in samples[name])
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path: str | Path):
+        # Prometheus text for .prom/.txt files, JSON otherwise.
+        path = Path(path)
+        text = self.to_prometheus() if path.suffix in ('.prom', '.txt') else self.to_json()
+        path.write_text(text, encoding='utf-8')
+
+    def summary(self) -> str:
+        rows = [f"{'operation':<28} {'calls':>9} {'misses':>8} {'errors':>7} {'p50 us':>9} {'p99 us':>9} {'max us':>9}"]
+        for key, stats in sorted(self.as_dict().items()):
+            latency = stats['latency_ns']
+            rows.append(f"{key:<28} {stats['calls']:>9} {stats['misses']:>8} {stats['errors']:>7} "
+                        f"{latency['p50'] / 1e3:>9.1f} {latency['p99'] / 1e3:>9.1f} {latency['max'] / 1e3:>9.1f}")
+        return '\n'.join(rows)
+
+
+metrics = Metrics()
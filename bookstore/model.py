@@ -1,4 +1,1191 @@
-from datetime import datetime
+import bisect
+import functools
+import gc
+import heapq
+import itertools
+import math
+import re
+import sys
+import threading
+import unicodedata
+import weakref
+from array import array
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import AbstractContextManager
+from datetime import date, datetime, timedelta
+from typing import NamedTuple
 
 
-# TODO: Add code here
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_DAY = _EPOCH.date()
+_MICROSECOND = timedelta(microseconds=1)
+_MICROS_PER_DAY = 86_400_000_000
+
+
+def date_to_micros(date: datetime) -> int:
+    # Exact integer encoding of a (naive) transaction date, used by the compact formats.
+    return (date - _EPOCH) // _MICROSECOND
+
+
+def micros_to_date(micros: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=micros)
+
+
+# Start of the day or month containing a date: the periods history can be rolled up into.
+PERIODS: dict[str, Callable[[datetime], datetime]] = {
+    'day': lambda date: datetime(date.year, date.month, date.day),
+    'month': lambda date: datetime(date.year, date.month, 1),
+}
+
+
+class Transaction:
+    __slots__ = ('type', 'copies', 'date')
+
+    SELL: int = 1
+    SUPPLY: int = 2
+
+    def __init__(self, type: int, copies: int, date: datetime | None = None):
+        self.type: int = type
+        self.copies: int = copies
+        self.date: datetime = datetime.now() if date is None else date
+
+
+class TransactionLedger:
+    # Compact alternative to list[Transaction]: type, copies and date are kept in
+    # parallel typed arrays (dates as microseconds since the epoch) and Transaction
+    # objects are only built when the ledger is indexed or iterated.
+
+    def __init__(self, transactions: Iterable[Transaction] = ()):
+        self._types = array('b')
+        self._copies = array('q')
+        self._dates = array('q')
+        for transaction in transactions:
+            self.append(transaction)
+
+    def append(self, transaction: Transaction):
+        self._types.append(transaction.type)
+        self._copies.append(transaction.copies)
+        self._dates.append(date_to_micros(transaction.date))
+
+    def total(self, type: int) -> int:
+        return sum(copies for kind, copies in zip(self._types, self._copies) if kind == type)
+
+    def records(self, stop: int | None = None) -> Iterator[tuple[int, int, int]]:
+        # (type, copies, micros) of the first `stop` transactions, without building
+        # Transaction objects.
+        return itertools.islice(zip(self._types, self._copies, self._dates), stop)
+
+    def _at(self, index: int) -> Transaction:
+        return Transaction(self._types[index], self._copies[index], micros_to_date(self._dates[index]))
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    def __getitem__(self, index: int | slice) -> Transaction | list[Transaction]:
+        if isinstance(index, slice):
+            return [self._at(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('ledger index out of range')
+        return self._at(index)
+
+    def __iter__(self) -> Iterator[Transaction]:
+        for i in range(len(self)):
+            yield self._at(i)
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + sum(sys.getsizeof(column) for column in (self._types, self._copies, self._dates))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, TransactionLedger):
+            return len(self) == len(other) and all(a == b for a, b in zip(self.records(), other.records()))
+        if isinstance(other, list):
+            return len(other) == len(self) and all(
+                a.type == b.type and a.copies == b.copies and a.date == b.date for a, b in zip(self, other))
+        return NotImplemented
+
+
+@functools.cache
+def _slots(cls: type) -> tuple[tuple[str, object], ...]:
+    # (name, descriptor) of the slots of cls and its bases. Going through the slot's own
+    # descriptor reaches it even where a subclass shadows the name, as FrozenBook does
+    # with its transactions property.
+    return tuple((name, base.__dict__[name]) for base in cls.__mro__ for name in base.__dict__.get('__slots__', ()))
+
+
+class Book:
+    __slots__ = ('isbn', 'title', 'sale_price', 'purchase_price', 'quantity', 'transactions',
+                 '_copies_sold', '_copies_supplied', '_revenue', '_cost', '_counted', '_listeners')
+
+    def __init__(self, isbn: str, title: str, sale_price: float, purchase_price: float, quantity: int):
+        self.isbn: str = isbn
+        self.title: str = title
+        self.sale_price: float = sale_price
+        self.purchase_price: float = purchase_price
+        self.quantity: int = quantity
+        self.transactions: list[Transaction] | TransactionLedger = []
+        # Running totals kept in step with transactions by sell and supply, and the
+        # number of transactions they cover. transactions stays a plain public list: a
+        # direct edit that changes its length (an append, a removal, a new list) is
+        # noticed by the next query, which recounts. Edits that keep the length, such as
+        # replacing an item in place, need an explicit recount().
+        self._copies_sold: int = 0
+        self._copies_supplied: int = 0
+        self._revenue: float = 0.0
+        self._cost: float = 0.0
+        self._counted: int = 0
+        self._listeners: tuple[Callable[['Book', Transaction], None], ...] = ()
+
+    def __getstate__(self) -> dict:
+        # Listeners belong to whatever currently holds the book and are not copied with it.
+        state = {}
+        for name, slot in _slots(type(self)):
+            if name != '_listeners':
+                try:
+                    state[name] = slot.__get__(self)
+                except AttributeError:
+                    # Never set, e.g. the transactions slot of a FrozenBook.
+                    pass
+        return state
+
+    def __setstate__(self, state: dict):
+        for name, slot in _slots(type(self)):
+            if name in state:
+                slot.__set__(self, state[name])
+        self._listeners = ()
+
+    def subscribe(self, listener: Callable[['Book', Transaction], None]):
+        # Listeners are called with (book, transaction) after every sale or supply.
+        self._listeners = self._listeners + (listener,)
+
+    def unsubscribe(self, listener: Callable[['Book', Transaction], None]):
+        self._listeners = tuple(item for item in self._listeners if item != listener)
+
+    def sell(self, copies: int) -> bool:
+        if copies > self.quantity:
+            return False
+        self.quantity -= copies
+        self._record(Transaction(Transaction.SELL, copies))
+        return True
+
+    def supply(self, copies: int):
+        self.quantity += copies
+        self._record(Transaction(Transaction.SUPPLY, copies))
+
+    def replay(self, transaction: Transaction):
+        # Applies an already accepted transaction, e.g. one read back from storage,
+        # without the stock check done by sell.
+        if transaction.type == Transaction.SELL:
+            self.quantity -= transaction.copies
+        elif transaction.type == Transaction.SUPPLY:
+            self.quantity += transaction.copies
+        self._record(transaction)
+
+    def _record(self, transaction: Transaction):
+        self.transactions.append(transaction)
+        if transaction.type == Transaction.SELL:
+            self._copies_sold += transaction.copies
+            self._revenue += transaction.copies * self.sale_price
+        elif transaction.type == Transaction.SUPPLY:
+            self._copies_supplied += transaction.copies
+            self._cost += transaction.copies * self.purchase_price
+        self._counted += 1
+        for listener in self._listeners:
+            listener(self, transaction)
+
+    def _sync(self):
+        if len(self.transactions) != self._counted:
+            self.recount()
+
+    def copies_sold(self) -> int:
+        # The check of _sync, inlined on the hottest query.
+        if len(self.transactions) != self._counted:
+            self.recount()
+        return self._copies_sold
+
+    def copies_supplied(self) -> int:
+        self._sync()
+        return self._copies_supplied
+
+    def revenue(self) -> float:
+        self._sync()
+        return self._revenue
+
+    def cost(self) -> float:
+        self._sync()
+        return self._cost
+
+    def gross_margin(self) -> float:
+        self._sync()
+        return self._revenue - self._copies_sold * self.purchase_price
+
+    def _totals(self) -> tuple[int, int, float, float]:
+        # Totals recomputed from transactions, which remain the source of truth. Money is
+        # valued at the current prices, as the transactions don't record the price paid.
+        if isinstance(self.transactions, TransactionLedger):
+            sold = self.transactions.total(Transaction.SELL)
+            supplied = self.transactions.total(Transaction.SUPPLY)
+        else:
+            sold = sum(t.copies for t in self.transactions if t.type == Transaction.SELL)
+            supplied = sum(t.copies for t in self.transactions if t.type == Transaction.SUPPLY)
+        return sold, supplied, sold * self.sale_price, supplied * self.purchase_price
+
+    def recount(self):
+        self._copies_sold, self._copies_supplied, self._revenue, self._cost = self._totals()
+        self._counted = len(self.transactions)
+
+    def counters_match(self) -> bool:
+        sold, supplied, revenue, cost = self._totals()
+        return sold == self._copies_sold and supplied == self._copies_supplied \
+            and math.isclose(revenue, self._revenue) and math.isclose(cost, self._cost)
+
+    def compact(self, before: datetime, period: str = 'day') -> int:
+        # Rolls the transactions dated before `before` up into one SELL and one SUPPLY
+        # transaction per day or month, dated at the start of the period, ahead of the
+        # later transactions, which are kept as they are. Totals, and copies sold or
+        # supplied per period, are unchanged, so listeners are not notified. Returns the
+        # number of transactions folded away; the history is left alone if that is zero.
+        self._sync()
+        start_of = PERIODS[period]
+        summaries: dict[tuple[datetime, int], int] = {}
+        recent: list[Transaction] = []
+        old = 0
+        for transaction in self.transactions:
+            if transaction.date < before:
+                key = (start_of(transaction.date), transaction.type)
+                summaries[key] = summaries.get(key, 0) + transaction.copies
+                old += 1
+            else:
+                recent.append(transaction)
+        folded = old - len(summaries)
+        if folded:
+            history = [Transaction(type, copies, day) for (day, type), copies in sorted(summaries.items())]
+            history += recent
+            self.transactions = TransactionLedger(history) if isinstance(self.transactions, TransactionLedger) \
+                else history
+            self._counted = len(self.transactions)
+        return folded
+
+    def as_dict(self) -> dict:
+        return {'isbn': self.isbn, 'title': self.title, 'sale_price': self.sale_price,
+                'purchase_price': self.purchase_price, 'quantity': self.quantity}
+
+    def __str__(self) -> str:
+        return f"ISBN: {self.isbn}\n" \
+               f"Title: {self.title}\n" \
+               f"Sale Price: {self.sale_price}\n" \
+               f"Purchase Price: {self.purchase_price}\n" \
+               f"Quantity: {self.quantity}"
+
+
+class FrozenBook(Book):
+    # Read-only copy of a book's state, as handed out by a CatalogSnapshot. It shares
+    # the history of the book it was copied from and only sees the transactions that
+    # were recorded at the time.
+
+    __slots__ = ('_history', '_length')
+
+    @classmethod
+    def of(cls, book: Book) -> 'FrozenBook':
+        book._sync()
+        frozen = cls.__new__(cls)
+        frozen.isbn = book.isbn
+        frozen.title = book.title
+        frozen.sale_price = book.sale_price
+        frozen.purchase_price = book.purchase_price
+        frozen.quantity = book.quantity
+        frozen._copies_sold = book._copies_sold
+        frozen._copies_supplied = book._copies_supplied
+        frozen._revenue = book._revenue
+        frozen._cost = book._cost
+        frozen._listeners = ()
+        frozen._history = book.transactions
+        frozen._length = frozen._counted = len(book.transactions)
+        return frozen
+
+    def _sync(self):
+        # The counters were copied in step with the history.
+        pass
+
+    def copies_sold(self) -> int:
+        return self._copies_sold
+
+    @property
+    def transactions(self) -> list[Transaction]:
+        return self._history[:self._length]
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('books of a catalog snapshot are read-only')
+
+    sell = supply = replay = compact = recount = subscribe = _read_only
+
+
+class CatalogObserver:
+    # Base class for structures that a Bookstore keeps in sync with its catalog.
+
+    def book_added(self, book: Book):
+        pass
+
+    def book_removed(self, book: Book):
+        pass
+
+    def transaction_recorded(self, book: Book, transaction: Transaction):
+        pass
+
+
+class SortedKeys:
+    # Sorted list of distinct keys that answers "how many keys are smaller" in
+    # O(log n). The keys are split into chunks of at most 2 * LOAD, found by bisecting
+    # the chunk maxima, and a Fenwick tree over the chunk lengths counts the keys in
+    # the chunks before. Adding or removing a key moves at most one chunk's worth of
+    # pointers, so it stays cheap at any size, unlike insort into one flat list.
+
+    LOAD = 512
+
+    def __init__(self, keys: Iterable[int] = ()):
+        keys = sorted(keys)
+        self._chunks: list[list[int]] = [keys[i:i + self.LOAD] for i in range(0, len(keys), self.LOAD)]
+        self._maxes: list[int] = [chunk[-1] for chunk in self._chunks]
+        self._tree: list[int] = [0]
+        self._len: int = len(keys)
+        self._rebuild()
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, key: int):
+        self._len += 1
+        if not self._chunks:
+            self._chunks.append([key])
+            self._maxes.append(key)
+            self._rebuild()
+            return
+        i = bisect.bisect_left(self._maxes, key)
+        if i == len(self._chunks):
+            i -= 1
+            self._chunks[i].append(key)
+            self._maxes[i] = key
+        else:
+            bisect.insort(self._chunks[i], key)
+        chunk = self._chunks[i]
+        if len(chunk) > 2 * self.LOAD:
+            self._chunks[i:i + 1] = [chunk[:self.LOAD], chunk[self.LOAD:]]
+            self._maxes[i:i + 1] = [chunk[self.LOAD - 1], chunk[-1]]
+            self._rebuild()
+        else:
+            self._grow(i, 1)
+
+    def remove(self, key: int):
+        i = bisect.bisect_left(self._maxes, key)
+        chunk = self._chunks[i] if i < len(self._chunks) else []
+        j = bisect.bisect_left(chunk, key)
+        if j == len(chunk) or chunk[j] != key:
+            raise KeyError(key)
+        del chunk[j]
+        self._len -= 1
+        if chunk:
+            self._maxes[i] = chunk[-1]
+            self._grow(i, -1)
+        else:
+            del self._chunks[i], self._maxes[i]
+            self._rebuild()
+
+    def move(self, old: int, new: int):
+        # remove(old) then add(new), as a sale does to a book's key. The Fenwick tree
+        # is left alone when the key stays in its chunk, which hot books mostly do.
+        i = bisect.bisect_left(self._maxes, old)
+        chunk = self._chunks[i] if i < len(self._chunks) else []
+        j = bisect.bisect_left(chunk, old)
+        if j == len(chunk) or chunk[j] != old:
+            raise KeyError(old)
+        if len(chunk) == 1:
+            self.remove(old)
+            self.add(new)
+            return
+        del chunk[j]
+        self._maxes[i] = chunk[-1]
+        k = bisect.bisect_left(self._maxes, new)
+        if k == len(self._chunks):
+            k -= 1
+            self._chunks[k].append(new)
+            self._maxes[k] = new
+        else:
+            bisect.insort(self._chunks[k], new)
+        if len(self._chunks[k]) > 2 * self.LOAD:
+            chunk = self._chunks[k]
+            self._chunks[k:k + 1] = [chunk[:self.LOAD], chunk[self.LOAD:]]
+            self._maxes[k:k + 1] = [chunk[self.LOAD - 1], chunk[-1]]
+            self._rebuild()
+        elif k != i:
+            # +1 on the path from k, -1 on the path from i; past the node where the
+            # two paths meet, the updates cancel out.
+            tree = self._tree
+            size = len(tree)
+            up, down = k + 1, i + 1
+            while up != down:
+                if up < down:
+                    if up >= size:
+                        break
+                    tree[up] += 1
+                    up += up & -up
+                else:
+                    if down >= size:
+                        break
+                    tree[down] -= 1
+                    down += down & -down
+
+    def rank(self, key: int) -> int:
+        # Number of keys smaller than key.
+        i = bisect.bisect_left(self._maxes, key)
+        if i == len(self._chunks):
+            return self._len
+        count = bisect.bisect_left(self._chunks[i], key)
+        tree = self._tree
+        while i:
+            count += tree[i]
+            i &= i - 1
+        return count
+
+    def _grow(self, chunk: int, delta: int):
+        tree = self._tree
+        size = len(tree)
+        i = chunk + 1
+        while i < size:
+            tree[i] += delta
+            i += i & -i
+
+    def _rebuild(self):
+        tree = [0]
+        tree += map(len, self._chunks)
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+
+class BestSellerIndex(CatalogObserver):
+    # Running copies-sold counter per ISBN plus a lazy max-heap of (-sold, order, isbn).
+    # Entries are pushed on every sale and stale ones are discarded when they reach
+    # the top, so a lookup is O(1) amortized and a sale is O(log n). Ties are broken
+    # by the order in which books were added to the catalog, the earliest one first.
+    # From the first rank() on, the books that have sold are also kept in SortedKeys
+    # under the key order - (sold << 40), which sorts like (-sold, order) but compares
+    # faster, so rank() is O(log n). Stores that never ask for ranks never pay for
+    # keeping them.
+
+    def __init__(self):
+        self._sold: dict[str, int] = {}
+        self._order: dict[str, int] = {}
+        self._heap: list[tuple[int, int, str]] = []
+        self._ranks: SortedKeys | None = None
+        self._next_order: int = 0
+        self._stale_visits: int = 0
+        # Books that have sold, i.e. the live entries in the heap.
+        self._selling: int = 0
+
+    def book_added(self, book: Book):
+        self._order[book.isbn] = self._next_order
+        self._next_order += 1
+        self._sold[book.isbn] = 0
+        sold = book.copies_sold()
+        if sold:
+            self._update(book.isbn, sold)
+
+    def book_removed(self, book: Book):
+        # Heap entries of a removed book become stale and are dropped lazily.
+        sold = self._sold.pop(book.isbn, None)
+        order = self._order.pop(book.isbn, None)
+        if sold:
+            self._selling -= 1
+            if self._ranks is not None:
+                self._ranks.remove(order - (sold << 40))
+
+    def transaction_recorded(self, book: Book, transaction: Transaction):
+        if transaction.type == Transaction.SELL and transaction.copies and book.isbn in self._sold:
+            self._update(book.isbn, transaction.copies)
+
+    def copies_sold(self, isbn: str) -> int:
+        return self._sold.get(isbn, 0)
+
+    def order(self, isbn: str) -> int:
+        return self._order[isbn]
+
+    def rank(self, isbn: str) -> int | None:
+        # 1-based position in top() order, or None for a book that has not sold.
+        sold = self._sold.get(isbn)
+        if not sold:
+            return None
+        return self.ahead_of(sold, self._order[isbn]) + 1
+
+    def ahead_of(self, sold: int, order: int) -> int:
+        # Number of books ranked before a book with these copies sold and add order,
+        # which need not be in the index.
+        if self._ranks is None:
+            orders = self._order
+            self._ranks = SortedKeys(orders[other] - (count << 40) for other, count in self._sold.items() if count)
+        return self._ranks.rank(order - (sold << 40))
+
+    def best(self) -> str | None:
+        heap = self._heap
+        while heap and not self._is_live(heap[0]):
+            heapq.heappop(heap)
+        return heap[0][2] if heap else None
+
+    def top(self, n: int) -> list[str]:
+        # Walks the heap as a tree, so the cost is O(n log n) whatever the catalog size,
+        # plus the stale entries met on the way. Those pile up under the best sellers
+        # (each sale pushes a new entry that outranks the rest of the catalog), and
+        # repeated walks meet the same ones again, so the stale visits are counted
+        # across calls and the heap is compacted once they add up to its size.
+        heap = self._heap
+        result: list[str] = []
+        seen: set[str] = set()
+        stale = 0
+        frontier = [(heap[0], 0)] if heap else []
+        while frontier and len(result) < n:
+            entry, position = heapq.heappop(frontier)
+            if self._is_live(entry) and entry[2] not in seen:
+                seen.add(entry[2])
+                result.append(entry[2])
+            else:
+                stale += 1
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+        self._stale_visits += stale
+        if self._stale_visits > len(heap):
+            self._compact()
+        return result
+
+    def _update(self, isbn: str, copies: int):
+        previous = self._sold[isbn]
+        sold = previous + copies
+        self._sold[isbn] = sold
+        order = self._order[isbn]
+        if not previous:
+            self._selling += 1
+        if self._ranks is not None:
+            if previous:
+                self._ranks.move(order - (previous << 40), order - (sold << 40))
+            else:
+                self._ranks.add(order - (sold << 40))
+        heapq.heappush(self._heap, (-sold, order, isbn))
+        if len(self._heap) > 2 * self._selling + 64:
+            self._compact()
+
+    def _is_live(self, entry: tuple[int, int, str]) -> bool:
+        neg_sold, order, isbn = entry
+        return neg_sold < 0 and self._sold.get(isbn) == -neg_sold and self._order.get(isbn) == order
+
+    def _compact(self):
+        # Every book that has sold has exactly one live entry, so filtering the heap
+        # costs O(heap) however many books have not sold.
+        self._heap = [entry for entry in self._heap if self._is_live(entry)]
+        heapq.heapify(self._heap)
+        self._stale_visits = 0
+
+
+class TitleIndex(CatalogObserver):
+    # Title lookups without scanning the catalog. Titles are normalized (case and
+    # accents folded) and split into word tokens for an inverted index, and kept in a
+    # sorted list of (title, isbn) for prefix searches and common-word searches. New
+    # titles are merged into the sorted list on the next search that walks it and
+    # entries of removed books are skipped until enough of them pile up to be worth
+    # purging.
+
+    _WORDS = re.compile(r'\w+')
+    # Pending titles up to this many are inserted one by one instead of merged by a sort.
+    _INSORT = 64
+
+    def __init__(self):
+        self._titles: dict[str, str] = {}
+        self._tokens: dict[str, set[str]] = {}
+        self._sorted: list[tuple[str, str]] = []
+        self._pending: list[tuple[str, str]] = []
+        self._stale: int = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        if text.isascii():
+            return ' '.join(text.lower().split())
+        decomposed = unicodedata.normalize('NFKD', text.casefold())
+        return ' '.join(''.join(c for c in decomposed if not unicodedata.combining(c)).split())
+
+    def book_added(self, book: Book):
+        title = self.normalize(book.title)
+        self._titles[book.isbn] = title
+        for token in self._WORDS.findall(title):
+            self._tokens.setdefault(token, set()).add(book.isbn)
+        self._pending.append((title, book.isbn))
+
+    def book_removed(self, book: Book):
+        title = self._titles.pop(book.isbn, None)
+        if title is None:
+            return
+        for token in set(self._WORDS.findall(title)):
+            isbns = self._tokens[token]
+            isbns.discard(book.isbn)
+            if not isbns:
+                del self._tokens[token]
+        self._stale += 1
+
+    def search(self, query: str, limit: int) -> list[str]:
+        # ISBNs whose title contains every word of the query, in title order.
+        tokens = self._WORDS.findall(self.normalize(query))
+        if not tokens:
+            return []
+        postings = sorted((self._tokens.get(token, set()) for token in set(tokens)), key=len)
+        if len(postings[0]) ** 2 > limit * len(self._titles):
+            # Common words: walking the titles in order finds `limit` matches after
+            # about limit * len(titles) / len(postings) entries, fewer than ordering
+            # every match would take.
+            return self._walk(postings, limit)
+        matches = postings[0].intersection(*postings[1:])
+        return [isbn for _, isbn in heapq.nsmallest(limit, ((self._titles[isbn], isbn) for isbn in matches))]
+
+    def _walk(self, postings: list[set[str]], limit: int) -> list[str]:
+        self._merge()
+        result: dict[str, None] = {}
+        titles = self._titles
+        for title, isbn in self._sorted:
+            if len(result) >= limit:
+                break
+            if titles.get(isbn) == title and all(isbn in isbns for isbns in postings):
+                result[isbn] = None
+        return list(result)
+
+    def search_prefix(self, prefix: str, limit: int) -> list[str]:
+        prefix = self.normalize(prefix)
+        self._merge()
+        result: dict[str, None] = {}
+        entries = self._sorted
+        for i in range(bisect.bisect_left(entries, (prefix, '')), len(entries)):
+            title, isbn = entries[i]
+            if not title.startswith(prefix) or len(result) >= limit:
+                break
+            if self._titles.get(isbn) == title:
+                # A book removed and added again with the same title has two entries.
+                result[isbn] = None
+        return list(result)
+
+    def _merge(self):
+        if self._stale > len(self._titles) // 4:
+            self._sorted = [entry for entry in self._sorted if self._titles.get(entry[1]) == entry[0]]
+            self._pending = [entry for entry in self._pending if self._titles.get(entry[1]) == entry[0]]
+            self._stale = 0
+        if len(self._pending) <= self._INSORT:
+            # A few additions on a live catalog: inserting costs a memmove each, far
+            # less than re-sorting the whole list.
+            for entry in self._pending:
+                bisect.insort(self._sorted, entry)
+        else:
+            self._pending.sort()
+            self._sorted += self._pending
+            self._sorted.sort()
+        self._pending = []
+
+
+class SalesTimeline(CatalogObserver):
+    # Copies sold and supplied per ISBN per day. Each [sold, supplied] counter is
+    # shared by a by-day and a by-ISBN map, and the active days are kept sorted, so a
+    # window query only visits the days inside the window.
+    #
+    # The history a book already has when it is added is only indexed by the next
+    # query, so loading a catalog with its history (from storage, say) does not walk
+    # every transaction, or page in an archived history, up front.
+
+    def __init__(self):
+        self._days: dict[date, dict[str, list[int]]] = {}
+        self._series: dict[str, dict[date, list[int]]] = {}
+        self._sorted_days: list[date] = []
+        # isbn -> (history, number of its transactions recorded before the book was added)
+        self._pending: dict[str, tuple[list[Transaction] | TransactionLedger, int]] = {}
+
+    def book_added(self, book: Book):
+        count = len(book.transactions)
+        if count:
+            self._pending[book.isbn] = (book.transactions, count)
+
+    def book_removed(self, book: Book):
+        self._pending.pop(book.isbn, None)
+        for day in self._series.pop(book.isbn, {}):
+            del self._days[day][book.isbn]
+
+    def transaction_recorded(self, book: Book, transaction: Transaction):
+        self._add(book.isbn, transaction.date.date(), transaction.type, transaction.copies)
+
+    def index_pending(self):
+        pending, self._pending = self._pending, {}
+        days: dict[int, date] = {}
+        for isbn, (history, count) in pending.items():
+            self._index(isbn, history, count, days)
+
+    def _index(self, isbn: str, history: list[Transaction] | TransactionLedger, count: int, days: dict[int, date]):
+        # days caches the dates of the day numbers met so far.
+        if isinstance(history, TransactionLedger):
+            for type, copies, micros in history.records(count):
+                number = micros // _MICROS_PER_DAY
+                day = days.get(number)
+                if day is None:
+                    day = days[number] = _EPOCH_DAY + timedelta(days=number)
+                self._add(isbn, day, type, copies)
+        else:
+            for transaction in history[:count]:
+                self._add(isbn, transaction.date.date(), transaction.type, transaction.copies)
+
+    def _add(self, isbn: str, day: date, type: int, copies: int):
+        bucket = self._days.get(day)
+        if bucket is None:
+            bucket = self._days[day] = {}
+            if self._sorted_days and day < self._sorted_days[-1]:
+                bisect.insort(self._sorted_days, day)
+            else:
+                self._sorted_days.append(day)
+        counter = bucket.get(isbn)
+        if counter is None:
+            counter = bucket[isbn] = [0, 0]
+            self._series.setdefault(isbn, {})[day] = counter
+        if type == Transaction.SELL:
+            counter[0] += copies
+        elif type == Transaction.SUPPLY:
+            counter[1] += copies
+
+    def days(self, since: date | None, until: date | None) -> list[date]:
+        if self._pending:
+            self.index_pending()
+        start = 0 if since is None else bisect.bisect_left(self._sorted_days, _day(since))
+        stop = len(self._sorted_days) if until is None else bisect.bisect_right(self._sorted_days, _day(until))
+        return self._sorted_days[start:stop]
+
+    def copies_sold(self, since: date | None, until: date | None) -> dict[str, int]:
+        totals: dict[str, int] = {}
+        for day in self.days(since, until):
+            self.add_sales(day, totals)
+        return totals
+
+    def add_sales(self, day: date, totals: dict[str, int]):
+        for isbn, (sold, _) in self._days[day].items():
+            if sold:
+                totals[isbn] = totals.get(isbn, 0) + sold
+
+    def series(self, isbn: str, since: date | None, until: date | None) -> list[tuple[date, int, int]]:
+        # One (day, sold, supplied) entry per calendar day, including days without activity.
+        # Only this book's history is indexed if it is still pending.
+        pending = self._pending.pop(isbn, None)
+        if pending is not None:
+            self._index(isbn, *pending, {})
+        days = self._series.get(isbn, {})
+        first = _day(since) if since is not None else min(days, default=None)
+        last = _day(until) if until is not None else max(days, default=None)
+        if first is None or last is None:
+            return []
+        result = []
+        for offset in range((last - first).days + 1):
+            day = first + timedelta(days=offset)
+            sold, supplied = days.get(day, (0, 0))
+            result.append((day, sold, supplied))
+        return result
+
+
+def _day(value: date) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+class LoadResult(NamedTuple):
+    inserted: int
+    skipped: int
+
+
+class RollupResult(NamedTuple):
+    books: int
+    transactions: int
+    bytes_reclaimed: int
+
+
+def _history_size(transactions: list[Transaction] | TransactionLedger) -> int:
+    # Approximate bytes held by a history: the container and, for a list, each
+    # Transaction and its date (the copies are mostly small cached ints).
+    if isinstance(transactions, TransactionLedger):
+        return sys.getsizeof(transactions)
+    return sys.getsizeof(transactions) + sum(sys.getsizeof(t) + sys.getsizeof(t.date) for t in transactions)
+
+
+class CatalogSnapshot:
+    # Point-in-time view of a Bookstore's catalog, from Bookstore.snapshot(). Taking
+    # one is O(1): the snapshot keeps the catalog dict and the store moves to a copy on
+    # its next add or delete. Before the store changes a book, the snapshot freezes the
+    # book's current state, so writers pay one small copy per book they change; books
+    # left alone are frozen when read. Either way, every book read is a FrozenBook in
+    # the state it had when the snapshot was taken, and iterating is safe while sales,
+    # additions and deletions go on. Close the snapshot, or use it as a context manager,
+    # once done.
+    #
+    # Only changes made through the Bookstore methods are seen in time: calling sell on
+    # a Book obtained from search_by_isbn changes it behind the snapshot's back.
+    #
+    # A snapshot may be read from another thread than the one changing the store. The
+    # lock guards a book that is frozen on read against a writer about to change it;
+    # stores without locks of their own get one for the whole snapshot.
+
+    def __init__(self, bookstore: 'Bookstore', catalog: dict[str, Book],
+                 lock: Callable[[str], AbstractContextManager] | None = None):
+        self._bookstore = bookstore
+        self._catalog = catalog
+        self._frozen: dict[str, FrozenBook] = {}
+        guard = self._guard = threading.Lock() if lock is None else None
+        self._lock = lock or (lambda isbn: guard)
+
+    def __enter__(self) -> 'CatalogSnapshot':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._bookstore._release_snapshot(self)
+
+    def _preserve(self, book: Book):
+        if book.isbn not in self._frozen and self._catalog.get(book.isbn) is book:
+            if self._guard is None:
+                # The writer already holds the book's lock.
+                self._frozen[book.isbn] = FrozenBook.of(book)
+            else:
+                with self._guard:
+                    self._frozen[book.isbn] = FrozenBook.of(book)
+
+    def __len__(self) -> int:
+        return len(self._catalog)
+
+    def __contains__(self, isbn: str) -> bool:
+        return isbn in self._catalog
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._catalog)
+
+    def search_by_isbn(self, isbn: str) -> FrozenBook | None:
+        frozen = self._frozen.get(isbn)
+        if frozen is not None:
+            return frozen
+        book = self._catalog.get(isbn)
+        if book is None:
+            return None
+        with self._lock(isbn):
+            return self._frozen.get(isbn) or FrozenBook.of(book)
+
+    def books(self) -> Iterator[FrozenBook]:
+        # Every book, in the order they were added to the catalog.
+        for isbn in self._catalog:
+            yield self.search_by_isbn(isbn)
+
+    def best_selling_book(self) -> FrozenBook | None:
+        books = self.top_sellers(1)
+        return books[0] if books else None
+
+    def top_sellers(self, n: int) -> list[FrozenBook]:
+        # Same ranking as Bookstore.top_sellers, computed from the frozen books.
+        ranked = heapq.nsmallest(n, ((-book.copies_sold(), order, book) for order, book in enumerate(self.books())
+                                     if book.copies_sold()), key=lambda entry: entry[:2])
+        return [book for _, _, book in ranked]
+
+
+class Bookstore:
+
+    def __init__(self, compact_ledger: bool = False):
+        self.catalog: dict[str, Book] = {}
+        # When set, new books record their history in a TransactionLedger instead of a list.
+        self.compact_ledger: bool = compact_ledger
+        self._best_sellers: BestSellerIndex = BestSellerIndex()
+        self._titles: TitleIndex = TitleIndex()
+        self._timeline: SalesTimeline = SalesTimeline()
+        self._observers: list[CatalogObserver] = [self._best_sellers, self._titles, self._timeline]
+        # Live snapshots, and whether the newest one still holds the current catalog dict.
+        self._snapshots: list[weakref.ref] = []
+        self._catalog_shared: bool = False
+
+    def add_observer(self, observer: CatalogObserver, existing: bool = True):
+        # Registers an observer; with existing=True it is first told about every book
+        # already in the catalog so that it starts in sync.
+        if existing:
+            for book in self.catalog.values():
+                observer.book_added(book)
+        self._observers.append(observer)
+
+    def remove_observer(self, observer: CatalogObserver):
+        self._observers.remove(observer)
+
+    def _settled(self, action: Callable[[], None]):
+        # Runs action while no change to the catalog is in progress, e.g. to write a
+        # snapshot of every book. Must not be called from an observer callback.
+        action()
+
+    def _after_change(self, action: Callable[[], None]):
+        # For observers: runs action once the change being notified has completed, in
+        # a settled catalog. Here that is already the case once the observers run.
+        action()
+
+    def add_book(self, isbn: str, title: str, sale_price: float, purchase_price: float, quantity: int):
+        if isbn not in self.catalog:
+            book = Book(isbn, title, sale_price, purchase_price, quantity)
+            if self.compact_ledger:
+                book.transactions = TransactionLedger()
+            self._insert(book)
+
+    def add_books(self, rows: Iterable[tuple[str, str, float, float, int]]) -> LoadResult:
+        # Bulk version of add_book over (isbn, title, sale_price, purchase_price, quantity)
+        # rows. ISBNs already in the catalog, or repeated within rows, are skipped. The
+        # cyclic GC is paused meanwhile: the new objects hold no cycles, and collections
+        # triggered by millions of allocations would otherwise dominate the load time.
+        self._own_catalog()
+        catalog = self.catalog
+        listeners = (self._on_transaction,)
+        book_added = [observer.book_added for observer in self._observers]
+        compact_ledger = self.compact_ledger
+        inserted = skipped = 0
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for isbn, title, sale_price, purchase_price, quantity in rows:
+                if isbn in catalog:
+                    skipped += 1
+                    continue
+                book = Book(isbn, title, sale_price, purchase_price, quantity)
+                if compact_ledger:
+                    book.transactions = TransactionLedger()
+                book._listeners = listeners
+                catalog[isbn] = book
+                for added in book_added:
+                    added(book)
+                inserted += 1
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        return LoadResult(inserted, skipped)
+
+    def insert_book(self, book: Book) -> bool:
+        # Adds an existing Book, history included, unless its ISBN is already present.
+        if book.isbn in self.catalog:
+            return False
+        if book.transactions:
+            book.recount()
+        self._insert(book)
+        return True
+
+    def _insert(self, book: Book):
+        self._own_catalog()
+        self.catalog[book.isbn] = book
+        book.subscribe(self._on_transaction)
+        for observer in self._observers:
+            observer.book_added(book)
+
+    def _on_transaction(self, book: Book, transaction: Transaction):
+        for observer in self._observers:
+            observer.transaction_recorded(book, transaction)
+
+    def delete_book(self, isbn: str):
+        if isbn not in self.catalog:
+            return False
+        self._own_catalog()
+        book = self.catalog.pop(isbn)
+        book.unsubscribe(self._on_transaction)
+        for observer in self._observers:
+            observer.book_removed(book)
+        return True
+
+    def search_by_isbn(self, isbn: str) -> Book | None:
+        return self.catalog.get(isbn)
+
+    def search_by_title(self, query: str, limit: int = 10) -> list[Book]:
+        return [self.catalog[isbn] for isbn in self._titles.search(query, limit)]
+
+    def search_by_title_prefix(self, prefix: str, limit: int = 10) -> list[Book]:
+        return [self.catalog[isbn] for isbn in self._titles.search_prefix(prefix, limit)]
+
+    def sell_book(self, isbn: str, copies: int) -> bool:
+        book = self.search_by_isbn(isbn)
+        if book is None:
+            return False
+        if self._snapshots:
+            self._preserve(book)
+        return book.sell(copies)
+
+    def supply_book(self, isbn: str, copies: int) -> bool:
+        book = self.search_by_isbn(isbn)
+        if book is None:
+            return False
+        if self._snapshots:
+            self._preserve(book)
+        book.supply(copies)
+        return True
+
+    def sell_many(self, lines: Iterable[tuple[str, int]], atomic: bool = False) -> list[bool]:
+        # Sells a basket of (isbn, copies) lines and returns one result per line. Lines are
+        # checked in order against the stock left by the previous lines for the same ISBN,
+        # then each ISBN is sold once for the sum of its accepted lines. With atomic=True
+        # nothing is sold unless every line is accepted, i.e. the basket was applied
+        # exactly when all(results) holds.
+        results, batches = self._batch(lines, check_stock=True)
+        if atomic and not all(results):
+            return results
+        for book, copies in batches:
+            if self._snapshots:
+                self._preserve(book)
+            book.sell(copies)
+        return results
+
+    def supply_many(self, lines: Iterable[tuple[str, int]], atomic: bool = False) -> list[bool]:
+        # Same as sell_many for a restock manifest; a line only fails if its ISBN is unknown.
+        results, batches = self._batch(lines, check_stock=False)
+        if atomic and not all(results):
+            return results
+        for book, copies in batches:
+            if self._snapshots:
+                self._preserve(book)
+            book.supply(copies)
+        return results
+
+    def _batch(self, lines: Iterable[tuple[str, int]], check_stock: bool) -> tuple[list[bool], list[tuple[Book, int]]]:
+        catalog = self.catalog
+        results: list[bool] = []
+        # isbn -> [book, stock left for the next line, accepted copies]
+        pending: dict[str, list] = {}
+        for isbn, copies in lines:
+            entry = pending.get(isbn)
+            if entry is None:
+                book = catalog.get(isbn)
+                entry = pending[isbn] = [book, 0 if book is None else book.quantity, 0]
+            accepted = entry[0] is not None and (not check_stock or copies <= entry[1])
+            if accepted:
+                entry[1] -= copies
+                entry[2] += copies
+            results.append(accepted)
+        return results, [(book, copies) for book, _, copies in pending.values() if book is not None and copies]
+
+    def compact_history(self, horizon: timedelta | datetime, period: str = 'day') -> RollupResult:
+        # Rolls up every book's transactions older than the horizon (a cutoff date, or an
+        # age counted back from now) into per-day or per-month summaries; see Book.compact.
+        books = transactions = reclaimed = 0
+        for step in self.iter_compact_history(horizon, period):
+            books += step.books
+            transactions += step.transactions
+            reclaimed += step.bytes_reclaimed
+        return RollupResult(books, transactions, reclaimed)
+
+    def iter_compact_history(self, horizon: timedelta | datetime, period: str = 'day',
+                             batch: int = 1000) -> Iterator[RollupResult]:
+        # compact_history in steps of `batch` books, yielding what each step did, so
+        # that a live store can keep serving between steps. Books added meanwhile are
+        # left for the next run. The cutoff is moved back to the start of its period so
+        # that no period is split between a summary and raw transactions.
+        if period not in PERIODS:
+            raise ValueError(f'unknown rollup period: {period!r}')
+        cutoff = datetime.now() - horizon if isinstance(horizon, timedelta) else horizon
+        cutoff = PERIODS[period](cutoff)
+        self._index_history()
+        isbns = list(self.catalog)
+        for start in range(0, len(isbns), batch):
+            books = transactions = reclaimed = 0
+            for isbn in isbns[start:start + batch]:
+                folded, freed = self._compact_book(isbn, cutoff, period)
+                if folded:
+                    books += 1
+                    transactions += folded
+                    reclaimed += freed
+            yield RollupResult(books, transactions, reclaimed)
+
+    def _index_history(self):
+        # The timeline keeps histories it has not indexed yet alive; index them before
+        # they are replaced.
+        self._timeline.index_pending()
+
+    def _compact_book(self, isbn: str, cutoff: datetime, period: str) -> tuple[int, int]:
+        book = self.catalog.get(isbn)
+        if book is None:
+            return 0, 0
+        if self._snapshots:
+            self._preserve(book)
+        before = book.transactions
+        folded = book.compact(cutoff, period)
+        if not folded:
+            return 0, 0
+        return folded, _history_size(before) - _history_size(book.transactions)
+
+    def snapshot(self) -> CatalogSnapshot:
+        # Consistent read-only view of the catalog as it is now; see CatalogSnapshot.
+        return self._take_snapshot()
+
+    def _take_snapshot(self) -> CatalogSnapshot:
+        # snapshot() for callers that already run in a settled catalog, see _settled.
+        snapshot = CatalogSnapshot(self, self.catalog, self._snapshot_lock())
+        self._catalog_shared = True
+        self._snapshots.append(weakref.ref(snapshot, self._forget_snapshot))
+        return snapshot
+
+    def _snapshot_lock(self) -> Callable[[str], AbstractContextManager] | None:
+        # Lock a snapshot takes to freeze a book that a writer may be changing.
+        return None
+
+    def _release_snapshot(self, snapshot: CatalogSnapshot):
+        for ref in tuple(self._snapshots):
+            if ref() is snapshot:
+                self._forget_snapshot(ref)
+
+    def _forget_snapshot(self, ref: weakref.ref):
+        try:
+            self._snapshots.remove(ref)
+        except ValueError:
+            pass
+
+    def _preserve(self, book: Book):
+        # Called before a book changes: live snapshots freeze it first.
+        for ref in tuple(self._snapshots):
+            snapshot = ref()
+            if snapshot is not None:
+                snapshot._preserve(book)
+
+    def _own_catalog(self):
+        # Called before the catalog dict changes: if a live snapshot holds it, move to a copy.
+        if self._catalog_shared:
+            self._catalog_shared = False
+            if self._snapshots:
+                self.catalog = dict(self.catalog)
+
+    def best_selling_book(self) -> Book | None:
+        isbn = self._best_sellers.best()
+        return None if isbn is None else self.catalog[isbn]
+
+    # Best-seller rankings order books by copies sold, most first. Books with the same
+    # copies sold keep the order in which they were added to the catalog, and books that
+    # have not sold are not ranked.
+
+    def top_sellers(self, n: int) -> list[Book]:
+        return [self.catalog[isbn] for isbn in self._best_sellers.top(n)]
+
+    def rank_of(self, isbn: str) -> int | None:
+        return self._best_sellers.rank(isbn)
+
+    # Windowed sales queries. Bounds are calendar days, both inclusive, and None leaves
+    # a side of the window open. Ties are broken as in best_selling_book.
+
+    def best_selling_book_between(self, since: date | None = None, until: date | None = None) -> Book | None:
+        books = self.top_sellers_between(1, since, until)
+        return books[0] if books else None
+
+    def top_sellers_between(self, n: int, since: date | None = None, until: date | None = None) -> list[Book]:
+        return self._ranked(self._timeline.copies_sold(since, until), n)
+
+    def top_sellers_by_week(self, n: int, since: date | None = None, until: date | None = None) -> dict[date, list[Book]]:
+        # Top n books of each week, keyed by the Monday starting the week.
+        weeks: dict[date, dict[str, int]] = {}
+        for day in self._timeline.days(since, until):
+            self._timeline.add_sales(day, weeks.setdefault(day - timedelta(days=day.weekday()), {}))
+        return {week: self._ranked(totals, n) for week, totals in weeks.items()}
+
+    def daily_sales(self, isbn: str, since: date | None = None, until: date | None = None) -> list[tuple[date, int, int]]:
+        return self._timeline.series(isbn, since, until)
+
+    def _ranked(self, totals: dict[str, int], n: int) -> list[Book]:
+        order = self._best_sellers.order
+        ranked = heapq.nsmallest(n, totals.items(), key=lambda item: (-item[1], order(item[0])))
+        return [self.catalog[isbn] for isbn, _ in ranked]
@@ -0,0 +1,112 @@
+import math
+from collections.abc import Callable
+from datetime import datetime
+from typing import NamedTuple
+
+from bookstore.model import Book, CatalogObserver, Transaction
+
+
+class ReorderAlert(NamedTuple):
+    isbn: str
+    quantity: int
+    threshold: int
+    suggested: int
+    date: datetime
+
+
+class ReorderEngine(CatalogObserver):
+    # Low-stock alerts and reorder suggestions, updated from sell and supply events.
+    #
+    # An alert fires when a book's quantity drops below its threshold and is not
+    # repeated until a supply brings the book back to the threshold. Sales velocity is an
+    # exponentially decayed rate in copies per day driven by Transaction.date: every
+    # event decays the previous rate by its age and adds the new copies, so each event
+    # costs O(1) and a steady flow of r copies a day converges to a rate of r. The
+    # suggested supply covers `cover_days` of sales at that rate plus the threshold.
+    #
+    # Attach with bookstore.add_observer(engine).
+
+    def __init__(self, default_threshold: int | None = None, cover_days: float = 14.0, half_life_days: float = 7.0):
+        self.default_threshold: int | None = default_threshold
+        self.cover_days: float = cover_days
+        self._tau: float = half_life_days / math.log(2)
+        self._thresholds: dict[str, int] = {}
+        self._books: dict[str, Book] = {}
+        self._velocity: dict[str, tuple[float, datetime]] = {}
+        self._alerted: set[str] = set()
+        self._listeners: list[Callable[[ReorderAlert], None]] = []
+        self.alerts: list[ReorderAlert] = []
+
+    def subscribe(self, listener: Callable[[ReorderAlert], None]):
+        self._listeners.append(listener)
+
+    def set_threshold(self, isbn: str, threshold: int | None):
+        if threshold is None:
+            self._thresholds.pop(isbn, None)
+        else:
+            self._thresholds[isbn] = threshold
+        book = self._books.get(isbn)
+        if book is not None:
+            self._check(book, datetime.now())
+
+    def threshold(self, isbn: str) -> int | None:
+        return self._thresholds.get(isbn, self.default_threshold)
+
+    def book_added(self, book: Book):
+        self._books[book.isbn] = book
+        for transaction in book.transactions:
+            if transaction.type == Transaction.SELL:
+                self._add_sale(book.isbn, transaction.copies, transaction.date)
+        self._check(book, datetime.now())
+
+    def book_removed(self, book: Book):
+        self._books.pop(book.isbn, None)
+        self._velocity.pop(book.isbn, None)
+        self._alerted.discard(book.isbn)
+
+    def transaction_recorded(self, book: Book, transaction: Transaction):
+        if transaction.type == Transaction.SELL:
+            self._add_sale(book.isbn, transaction.copies, transaction.date)
+        self._check(book, transaction.date)
+
+    def velocity(self, isbn: str, at: datetime | None = None) -> float:
+        # Copies sold per day, decayed up to `at` (now by default).
+        rate, last = self._velocity.get(isbn, (0.0, None))
+        if last is None:
+            return 0.0
+        elapsed = max(((at or datetime.now()) - last).total_seconds() / 86400, 0.0)
+        return rate * math.exp(-elapsed / self._tau)
+
+    def suggest(self, isbn: str, at: datetime | None = None) -> int:
+        book = self._books.get(isbn)
+        if book is None:
+            return 0
+        target = math.ceil(self.velocity(isbn, at) * self.cover_days) + (self.threshold(isbn) or 0)
+        return max(target - book.quantity, 0)
+
+    def drain_alerts(self) -> list[ReorderAlert]:
+        alerts, self.alerts = self.alerts, []
+        return alerts
+
+    def _add_sale(self, isbn: str, copies: int, date: datetime):
+        rate, last = self._velocity.get(isbn, (0.0, date))
+        elapsed = (date - last).total_seconds() / 86400
+        if elapsed > 0:
+            rate *= math.exp(-elapsed / self._tau)
+        else:
+            # Out-of-order events are counted as if they happened at the latest date seen.
+            date = last
+        self._velocity[isbn] = (rate + copies / self._tau, date)
+
+    def _check(self, book: Book, date: datetime):
+        threshold = self.threshold(book.isbn)
+        if threshold is None or book.quantity >= threshold:
+            self._alerted.discard(book.isbn)
+            return
+        if book.isbn in self._alerted:
+            return
+        self._alerted.add(book.isbn)
+        alert = ReorderAlert(book.isbn, book.quantity, threshold, self.suggest(book.isbn, date), date)
+        self.alerts.append(alert)
+        for listener in self._listeners:
+            listener(alert)
@@ -0,0 +1,123 @@
+import csv
+import operator
+from collections.abc import Iterable
+from pathlib import Path
+from typing import TextIO
+
+from bookstore.model import Book, Bookstore
+
+try:
+    import numpy
+except ImportError:  # optional dependency, see the 'reports' extra
+    numpy = None
+
+COLUMNS = ('isbn', 'title', 'quantity', 'copies_sold', 'copies_supplied', 'stock_value', 'retail_value',
+           'revenue', 'gross_margin', 'margin_rate', 'sell_through', 'slow_mover')
+
+
+class InventoryReport:
+    # Valuation and profitability of every title, computed column by column from the
+    # books' running totals instead of walking their transactions:
+    #   stock_value   quantity * purchase_price (stock valued at cost)
+    #   retail_value  quantity * sale_price
+    #   revenue       realized sales
+    #   gross_margin  revenue - copies_sold * purchase_price
+    #   margin_rate   gross_margin / revenue (0 when nothing was sold)
+    #   sell_through  copies_sold / (copies_sold + quantity)
+    #   slow_mover    in stock with a sell-through below the threshold
+    # With NumPy installed the arithmetic runs on arrays; otherwise it runs on the same
+    # columns held as lists.
+
+    def __init__(self, books: Iterable[Book], slow_mover_threshold: float = 0.1):
+        books = list(books)
+        self.slow_mover_threshold: float = slow_mover_threshold
+        self.isbn: list[str] = list(map(operator.attrgetter('isbn'), books))
+        self.title: list[str] = list(map(operator.attrgetter('title'), books))
+        quantity = list(map(operator.attrgetter('quantity'), books))
+        purchase_price = list(map(operator.attrgetter('purchase_price'), books))
+        sale_price = list(map(operator.attrgetter('sale_price'), books))
+        sold = [book.copies_sold() for book in books]
+        supplied = [book.copies_supplied() for book in books]
+        revenue = [book.revenue() for book in books]
+        if numpy is not None:
+            self._compute_arrays(quantity, purchase_price, sale_price, sold, supplied, revenue)
+        else:
+            self._compute_lists(quantity, purchase_price, sale_price, sold, supplied, revenue)
+
+    @classmethod
+    def from_bookstore(cls, bookstore: Bookstore, slow_mover_threshold: float = 0.1) -> 'InventoryReport':
+        return cls(bookstore.catalog.values(), slow_mover_threshold)
+
+    def _compute_arrays(self, quantity, purchase_price, sale_price, sold, supplied, revenue):
+        self.quantity = numpy.asarray(quantity, dtype=numpy.int64)
+        self.copies_sold = numpy.asarray(sold, dtype=numpy.int64)
+        self.copies_supplied = numpy.asarray(supplied, dtype=numpy.int64)
+        purchase_price = numpy.asarray(purchase_price, dtype=numpy.float64)
+        self.stock_value = self.quantity * purchase_price
+        self.retail_value = self.quantity * numpy.asarray(sale_price, dtype=numpy.float64)
+        self.revenue = numpy.asarray(revenue, dtype=numpy.float64)
+        self.gross_margin = self.revenue - self.copies_sold * purchase_price
+        self.margin_rate = numpy.divide(self.gross_margin, self.revenue, out=numpy.zeros_like(self.revenue),
+                                        where=self.revenue != 0)
+        moved = (self.copies_sold + self.quantity).astype(numpy.float64)
+        self.sell_through = numpy.divide(self.copies_sold, moved, out=numpy.zeros_like(moved), where=moved != 0)
+        self.slow_mover = (self.quantity > 0) & (self.sell_through < self.slow_mover_threshold)
+
+    def _compute_lists(self, quantity, purchase_price, sale_price, sold, supplied, revenue):
+        self.quantity = quantity
+        self.copies_sold = sold
+        self.copies_supplied = supplied
+        self.stock_value = list(map(operator.mul, quantity, purchase_price))
+        self.retail_value = list(map(operator.mul, quantity, sale_price))
+        self.revenue = revenue
+        self.gross_margin = list(map(operator.sub, revenue, map(operator.mul, sold, purchase_price)))
+        self.margin_rate = [margin / income if income else 0.0 for margin, income in zip(self.gross_margin, revenue)]
+        self.sell_through = [s / (s + q) if s + q else 0.0 for s, q in zip(sold, quantity)]
+        threshold = self.slow_mover_threshold
+        self.slow_mover = [q > 0 and rate < threshold for q, rate in zip(quantity, self.sell_through)]
+
+    def __len__(self) -> int:
+        return len(self.isbn)
+
+    def totals(self) -> dict[str, float]:
+        columns = (self.stock_value, self.retail_value, self.revenue, self.gross_margin)
+        if numpy is not None:
+            stock_value, retail_value, revenue, gross_margin = (float(column.sum()) for column in columns)
+            slow_movers = int(numpy.count_nonzero(self.slow_mover))
+        else:
+            stock_value, retail_value, revenue, gross_margin = (float(sum(column)) for column in columns)
+            slow_movers = sum(self.slow_mover)
+        return {
+            'titles': len(self),
+            'stock_value': stock_value,
+            'retail_value': retail_value,
+            'revenue': revenue,
+            'gross_margin': gross_margin,
+            'slow_movers': slow_movers,
+        }
+
+    def slow_movers(self, limit: int | None = None) -> list[str]:
+        # ISBNs of slow movers, lowest sell-through first.
+        if numpy is not None:
+            flagged = numpy.flatnonzero(self.slow_mover)
+            isbns = [self.isbn[i] for i in flagged]
+            order = numpy.lexsort((numpy.asarray(isbns, dtype=str), self.sell_through[flagged]))
+            return [isbns[i] for i in order[:limit]]
+        flagged = [i for i, slow in enumerate(self.slow_mover) if slow]
+        flagged.sort(key=lambda i: (self.sell_through[i], self.isbn[i]))
+        return [self.isbn[i] for i in flagged[:limit]]
+
+    def rows(self) -> Iterable[tuple]:
+        columns = [getattr(self, name) for name in COLUMNS]
+        if numpy is not None:
+            columns = [column.tolist() if isinstance(column, numpy.ndarray) else column for column in columns]
+        return zip(*columns)
+
+    def write_csv(self, target: str | Path | TextIO):
+        if isinstance(target, (str, Path)):
+            with open(target, 'w', newline='', encoding='utf-8') as file:
+                self.write_csv(file)
+            return
+        writer = csv.writer(target)
+        writer.writerow(COLUMNS)
+        writer.writerows(self.rows())
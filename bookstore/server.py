@@ -0,0 +1,125 @@
+import argparse
+import asyncio
+import json
+
+from bookstore.model import Book, Bookstore
+
+# Requests and responses are JSON objects, one per line:
+#   -> {"id": 1, "op": "sell_book", "args": ["1234", 2]}
+#   <- {"id": 1, "result": true}
+#   <- {"id": 1, "error": "unknown operation: foo"}
+# Books are returned as their as_dict() form. A client may send any number of requests
+# without waiting; each connection is answered in request order.
+#
+# Operations and the types of their arguments, which are checked before the bookstore
+# sees them: a wrong type would otherwise only fail halfway through a change. Integers
+# are accepted where a float is expected.
+OPERATIONS: dict[str, tuple[type, ...]] = {
+    'add_book': (str, str, float, float, int),
+    'sell_book': (str, int),
+    'supply_book': (str, int),
+    'search_by_isbn': (str,),
+    'delete_book': (str,),
+    'best_selling_book': (),
+}
+
+MAX_LINE = 64 * 1024
+
+
+class BookstoreServer:
+    # Serves one in-memory Bookstore to many clients. Operations run on the event loop
+    # thread, so they never interleave. A connection stops being read while its
+    # responses can't be written (writer.drain), which pushes back on fast senders.
+
+    def __init__(self, bookstore: Bookstore | None = None):
+        self.bookstore: Bookstore = Bookstore() if bookstore is None else bookstore
+        self._server: asyncio.Server | None = None
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765) -> asyncio.Server:
+        self._server = await asyncio.start_server(self._serve, host, port, limit=MAX_LINE)
+        return self._server
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    def handle(self, request: dict) -> dict:
+        response = {'id': request.get('id')}
+        op = request.get('op')
+        if op not in OPERATIONS:
+            response['error'] = f'unknown operation: {op}'
+            return response
+        try:
+            args = _arguments(op, request.get('args', []))
+            result = getattr(self.bookstore, op)(*args)
+        except (TypeError, ValueError) as error:
+            response['error'] = str(error)
+            return response
+        response['result'] = result.as_dict() if isinstance(result, Book) else result
+        return response
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    writer.write(b'{"id":null,"error":"request line too long"}\n')
+                    break
+                if not line:
+                    break
+                try:
+                    response = self.handle(json.loads(line))
+                except (ValueError, AttributeError):
+                    response = {'id': None, 'error': 'malformed request'}
+                writer.write(json.dumps(response, separators=(',', ':')).encode())
+                writer.write(b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+def _arguments(op: str, args: list) -> list:
+    types = OPERATIONS[op]
+    if not isinstance(args, list) or len(args) != len(types):
+        raise TypeError(f'{op} takes {len(types)} arguments')
+    checked = []
+    for position, (arg, kind) in enumerate(zip(args, types)):
+        if kind is float and type(arg) is int:
+            arg = float(arg)
+        if type(arg) is not kind:
+            raise TypeError(f'{op} argument {position + 1} must be {kind.__name__}, not {type(arg).__name__}')
+        checked.append(arg)
+    return checked
+
+
+async def serve(host: str, port: int):
+    server = BookstoreServer()
+    await server.start(host, port)
+    print(f'Bookstore server listening on {host}:{server.port}')
+    await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a Bookstore over JSON lines')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+import bisect
+import multiprocessing
+import os
+import threading
+import zlib
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from multiprocessing.connection import Connection
+
+from bookstore.model import Book, Bookstore, LoadResult
+
+
+class ShardedBookstore:
+    # Bookstore partitioned by ISBN hash across worker processes, each owning a plain
+    # Bookstore. Point operations go to the shard that owns the ISBN; best_selling_book
+    # and top_sellers ask every shard for its local answer and merge them. Batched
+    # operations send every shard its part before waiting for any reply, so shards work
+    # in parallel; that is where extra cores pay off.
+    #
+    # Books returned by the store are copies: changing them does not change the shard.
+    # Every book carries the global order in which it was added, so best-seller ties
+    # resolve as in a single Bookstore. Orders are handed out with the shard's lock held,
+    # so each shard receives its books in global order and its own best-seller index
+    # ranks them as the whole store would: rank_of counts the books ahead in every
+    # shard's index in O(log n), and top_sellers merges (-sold, order, isbn) entries
+    # before fetching only the winning books, histories and all.
+
+    def __init__(self, shards: int | None = None, start_method: str | None = None):
+        context = multiprocessing.get_context(start_method)
+        self._connections: list[Connection] = []
+        self._locks: list[threading.Lock] = []
+        self._processes: list[multiprocessing.Process] = []
+        self._next_order: int = 0
+        self._order_lock: threading.Lock = threading.Lock()
+        for _ in range(shards or os.cpu_count() or 1):
+            parent, child = context.Pipe()
+            process = context.Process(target=_serve_shard, args=(child,), daemon=True)
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._locks.append(threading.Lock())
+            self._processes.append(process)
+
+    def __enter__(self) -> 'ShardedBookstore':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def shards(self) -> int:
+        return len(self._connections)
+
+    def shard_of(self, isbn: str) -> int:
+        # crc32 rather than hash(): str hashes are salted differently in every process.
+        return zlib.crc32(isbn.encode()) % len(self._connections)
+
+    def _call(self, shard: int, op: str, *args):
+        with self._locks[shard]:
+            self._connections[shard].send((op, args))
+            return self._receive(shard)
+
+    @contextmanager
+    def _holding(self, shards: Iterable[int]) -> Iterator[None]:
+        # Holds the locks of the given shards, taken in ascending order.
+        shards = sorted(shards)
+        for shard in shards:
+            self._locks[shard].acquire()
+        try:
+            yield
+        finally:
+            for shard in shards:
+                self._locks[shard].release()
+
+    def _scatter(self, requests: dict[int, tuple]) -> dict[int, object]:
+        # Sends {shard: (op, *args)} to the shards, then collects the replies.
+        with self._holding(requests):
+            return self._send_all(requests)
+
+    def _send_all(self, requests: dict[int, tuple]) -> dict[int, object]:
+        # _scatter for a caller that already holds the shard locks.
+        for shard, (op, *args) in requests.items():
+            self._connections[shard].send((op, tuple(args)))
+        return {shard: self._receive(shard) for shard in requests}
+
+    def _receive(self, shard: int):
+        ok, result = self._connections[shard].recv()
+        if not ok:
+            raise result
+        return result
+
+    def _orders(self, count: int) -> range:
+        with self._order_lock:
+            start = self._next_order
+            self._next_order += count
+        return range(start, start + count)
+
+    def add_book(self, isbn: str, title: str, sale_price: float, purchase_price: float, quantity: int):
+        self.add_books([(isbn, title, sale_price, purchase_price, quantity)])
+
+    def add_books(self, rows: Iterable[tuple[str, str, float, float, int]]) -> LoadResult:
+        rows = list(rows)
+        positions: dict[int, list[int]] = {}
+        for position, row in enumerate(rows):
+            positions.setdefault(self.shard_of(row[0]), []).append(position)
+        with self._holding(positions):
+            orders = self._orders(len(rows))
+            results = self._send_all({shard: ('add_books', [rows[p] for p in indexes], [orders[p] for p in indexes])
+                                      for shard, indexes in positions.items()})
+        return LoadResult(sum(r.inserted for r in results.values()), sum(r.skipped for r in results.values()))
+
+    def delete_book(self, isbn: str):
+        return self._call(self.shard_of(isbn), 'delete_book', isbn)
+
+    def search_by_isbn(self, isbn: str) -> Book | None:
+        return self._call(self.shard_of(isbn), 'search_by_isbn', isbn)
+
+    def sell_book(self, isbn: str, copies: int) -> bool:
+        return self._call(self.shard_of(isbn), 'sell_book', isbn, copies)
+
+    def supply_book(self, isbn: str, copies: int) -> bool:
+        return self._call(self.shard_of(isbn), 'supply_book', isbn, copies)
+
+    def sell_many(self, lines: Iterable[tuple[str, int]], atomic: bool = False) -> list[bool]:
+        return self._many('sell_many', lines, atomic)
+
+    def supply_many(self, lines: Iterable[tuple[str, int]], atomic: bool = False) -> list[bool]:
+        return self._many('supply_many', lines, atomic)
+
+    def _many(self, op: str, lines: Iterable[tuple[str, int]], atomic: bool) -> list[bool]:
+        lines = list(lines)
+        positions: dict[int, list[int]] = {}
+        for position, (isbn, _) in enumerate(lines):
+            positions.setdefault(self.shard_of(isbn), []).append(position)
+        parts = {shard: [lines[p] for p in indexes] for shard, indexes in positions.items()}
+        if atomic and len(parts) > 1:
+            # All-or-nothing across shards: check every part first, then apply. Holding
+            # the shard locks for both rounds keeps other callers from interleaving.
+            with self._holding(parts):
+                replies = self._send_all({shard: ('check_' + op, part) for shard, part in parts.items()})
+                if all(all(reply) for reply in replies.values()):
+                    replies = self._send_all({shard: (op, part, False) for shard, part in parts.items()})
+        else:
+            replies = self._scatter({shard: (op, part, atomic) for shard, part in parts.items()})
+        results = [False] * len(lines)
+        for shard, indexes in positions.items():
+            for position, result in zip(indexes, replies[shard]):
+                results[position] = result
+        return results
+
+    def best_selling_book(self) -> Book | None:
+        books = self.top_sellers(1)
+        return books[0] if books else None
+
+    def top_sellers(self, n: int) -> list[Book]:
+        replies = self._scatter({shard: ('top_sellers', n) for shard in range(self.shards)})
+        winners = [isbn for _, _, isbn in sorted(entry for reply in replies.values() for entry in reply)[:n]]
+        wanted: dict[int, list[str]] = {}
+        for isbn in winners:
+            wanted.setdefault(self.shard_of(isbn), []).append(isbn)
+        books = {}
+        for found in self._scatter({shard: ('search_many', isbns) for shard, isbns in wanted.items()}).values():
+            books.update((book.isbn, book) for book in found)
+        # A winner deleted in between is left out.
+        return [books[isbn] for isbn in winners if isbn in books]
+
+    def rank_of(self, isbn: str) -> int | None:
+        position = self._call(self.shard_of(isbn), 'position', isbn)
+        if position is None:
+            return None
+        replies = self._scatter({shard: ('ahead_of', *position) for shard in range(self.shards)})
+        return 1 + sum(replies.values())
+
+    def close(self):
+        for shard, connection in enumerate(self._connections):
+            with self._locks[shard]:
+                try:
+                    connection.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+                connection.close()
+        for process in self._processes:
+            process.join()
+        self._connections = []
+        self._processes = []
+
+
+def _serve_shard(connection: Connection):
+    bookstore = Bookstore()
+    best_sellers = bookstore._best_sellers
+    orders: dict[str, int] = {}
+    # The global and local add orders of every book the shard has received, both
+    # ascending since books arrive in global order.
+    global_orders: list[int] = []
+    local_orders: list[int] = []
+
+    def add_books(rows: list, row_orders: list) -> LoadResult:
+        # orders has exactly the catalog's ISBNs, so it doubles as the duplicate check.
+        fresh = []
+        for row, order in zip(rows, row_orders):
+            if row[0] not in orders:
+                orders[row[0]] = order
+                fresh.append(row)
+        bookstore.add_books(fresh)
+        for row in fresh:
+            global_orders.append(orders[row[0]])
+            local_orders.append(best_sellers.order(row[0]))
+        return LoadResult(len(fresh), len(rows) - len(fresh))
+
+    def delete_book(isbn: str):
+        orders.pop(isbn, None)
+        return bookstore.delete_book(isbn)
+
+    def top_sellers(n: int) -> list[tuple[int, int, str]]:
+        return [(-best_sellers.copies_sold(isbn), orders[isbn], isbn) for isbn in best_sellers.top(n)]
+
+    def position(isbn: str) -> tuple[int, int] | None:
+        sold = best_sellers.copies_sold(isbn)
+        return (sold, orders[isbn]) if sold else None
+
+    def ahead_of(sold: int, order: int) -> int:
+        # Books of this shard ranked before a book with these copies sold and global add
+        # order: those before the first book of the shard added at or after that order.
+        first = bisect.bisect_left(global_orders, order)
+        if first < len(local_orders):
+            return best_sellers.ahead_of(sold, local_orders[first])
+        # Added after every book of the shard.
+        return best_sellers.ahead_of(sold, local_orders[-1] + 1 if local_orders else 0)
+
+    operations = {
+        'add_books': add_books,
+        'delete_book': delete_book,
+        'search_by_isbn': bookstore.search_by_isbn,
+        'search_many': lambda isbns: [book for book in map(bookstore.search_by_isbn, isbns) if book is not None],
+        'sell_book': bookstore.sell_book,
+        'supply_book': bookstore.supply_book,
+        'sell_many': bookstore.sell_many,
+        'supply_many': bookstore.supply_many,
+        'check_sell_many': lambda lines: bookstore._batch(lines, check_stock=True)[0],
+        'check_supply_many': lambda lines: bookstore._batch(lines, check_stock=False)[0],
+        'top_sellers': top_sellers,
+        'position': position,
+        'ahead_of': ahead_of,
+    }
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        op, args = request
+        try:
+            connection.send((True, operations[op](*args)))
+        except Exception as error:
+            connection.send((False, error))
+    connection.close()
@@ -0,0 +1,109 @@
+import sqlite3
+from pathlib import Path
+
+from bookstore.model import Book, Transaction, date_to_micros, micros_to_date
+
+
+class SQLiteBookstore:
+    # Bookstore with the same public methods as bookstore.model.Bookstore, stored in
+    # SQLite. Books are keyed by ISBN (id keeps insertion order for best-seller ties)
+    # and transactions are indexed by (isbn, type, date), so copies sold and best
+    # sellers are aggregate queries and the catalog does not need to fit in memory.
+    # Books returned by search_by_isbn are detached copies: changing them does not
+    # change the store, which is only updated through these methods.
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS books (
+            id INTEGER PRIMARY KEY,
+            isbn TEXT NOT NULL UNIQUE,
+            title TEXT NOT NULL,
+            sale_price REAL NOT NULL,
+            purchase_price REAL NOT NULL,
+            quantity INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS transactions (
+            isbn TEXT NOT NULL,
+            type INTEGER NOT NULL,
+            copies INTEGER NOT NULL,
+            date INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS transactions_isbn_type_date ON transactions (isbn, type, date);
+    """
+
+    def __init__(self, path: str | Path = ':memory:'):
+        self.connection: sqlite3.Connection = sqlite3.connect(path)
+        self.connection.executescript(self.SCHEMA)
+
+    def add_book(self, isbn: str, title: str, sale_price: float, purchase_price: float, quantity: int):
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR IGNORE INTO books (isbn, title, sale_price, purchase_price, quantity) VALUES (?, ?, ?, ?, ?)',
+                (isbn, title, sale_price, purchase_price, quantity))
+
+    def delete_book(self, isbn: str):
+        with self.connection:
+            deleted = self.connection.execute('DELETE FROM books WHERE isbn = ?', (isbn,)).rowcount
+            self.connection.execute('DELETE FROM transactions WHERE isbn = ?', (isbn,))
+        return deleted > 0
+
+    def search_by_isbn(self, isbn: str) -> Book | None:
+        row = self.connection.execute(
+            'SELECT isbn, title, sale_price, purchase_price, quantity FROM books WHERE isbn = ?', (isbn,)).fetchone()
+        if row is None:
+            return None
+        book = Book(*row)
+        for kind, copies, date in self.connection.execute(
+                'SELECT type, copies, date FROM transactions WHERE isbn = ? ORDER BY rowid', (isbn,)):
+            book.transactions.append(Transaction(kind, copies, micros_to_date(date)))
+        book.recount()
+        return book
+
+    def sell_book(self, isbn: str, copies: int) -> bool:
+        transaction = Transaction(Transaction.SELL, copies)
+        with self.connection:
+            updated = self.connection.execute(
+                'UPDATE books SET quantity = quantity - ? WHERE isbn = ? AND quantity >= ?',
+                (copies, isbn, copies)).rowcount
+            if updated:
+                self._record(isbn, transaction)
+        return updated > 0
+
+    def supply_book(self, isbn: str, copies: int) -> bool:
+        transaction = Transaction(Transaction.SUPPLY, copies)
+        with self.connection:
+            updated = self.connection.execute(
+                'UPDATE books SET quantity = quantity + ? WHERE isbn = ?', (copies, isbn)).rowcount
+            if updated:
+                self._record(isbn, transaction)
+        return updated > 0
+
+    def _record(self, isbn: str, transaction: Transaction):
+        self.connection.execute('INSERT INTO transactions (isbn, type, copies, date) VALUES (?, ?, ?, ?)',
+                                (isbn, transaction.type, transaction.copies, date_to_micros(transaction.date)))
+
+    def copies_sold(self, isbn: str) -> int:
+        row = self.connection.execute('SELECT COALESCE(SUM(copies), 0) FROM transactions WHERE isbn = ? AND type = ?',
+                                      (isbn, Transaction.SELL)).fetchone()
+        return row[0]
+
+    def top_sellers(self, n: int) -> list[Book]:
+        rows = self.connection.execute(
+            'SELECT t.isbn FROM transactions t JOIN books b ON b.isbn = t.isbn WHERE t.type = ? '
+            'GROUP BY t.isbn HAVING SUM(t.copies) > 0 ORDER BY SUM(t.copies) DESC, MIN(b.id) LIMIT ?',
+            (Transaction.SELL, n)).fetchall()
+        return [self.search_by_isbn(isbn) for isbn, in rows]
+
+    def rank_of(self, isbn: str) -> int | None:
+        row = self.connection.execute(
+            'WITH sales AS (SELECT b.id AS id, b.isbn AS isbn, SUM(t.copies) AS sold FROM transactions t '
+            'JOIN books b ON b.isbn = t.isbn WHERE t.type = ? GROUP BY b.id HAVING SUM(t.copies) > 0) '
+            'SELECT (SELECT COUNT(*) FROM sales o WHERE o.sold > s.sold OR (o.sold = s.sold AND o.id < s.id)) + 1 '
+            'FROM sales s WHERE s.isbn = ?', (Transaction.SELL, isbn)).fetchone()
+        return None if row is None else row[0]
+
+    def best_selling_book(self) -> Book | None:
+        books = self.top_sellers(1)
+        return books[0] if books else None
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,325 @@
+import itertools
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from pathlib import Path
+
+from bookstore.archive import ArchivedHistory, TransactionArchive
+from bookstore.model import Book, Bookstore, CatalogObserver, CatalogSnapshot, Transaction, TransactionLedger, \
+    date_to_micros, micros_to_date
+
+
+class Storage(CatalogObserver, ABC):
+    # Persistence backend for a Bookstore. load() rebuilds the store and attaches the
+    # storage to it, after which every catalog change and transaction is written through.
+
+    @abstractmethod
+    def load(self, bookstore: Bookstore | None = None) -> Bookstore:
+        ...
+
+    def compact(self):
+        pass
+
+    def sync(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FileStorage(Storage):
+    # A snapshot file with the whole catalog plus an append-only log of the changes made
+    # since. Both carry a generation number: compaction starts log N+1, writes snapshot
+    # N+1 of the catalog as it was when log N ended and only then deletes the older
+    # logs. Loading replays every log from the snapshot's generation on, so a crash at
+    # any point leaves a consistent state.
+    #
+    # Log records are JSON arrays, one per line:
+    #   ["a", isbn, title, sale_price, purchase_price, quantity, [type, copies, micros, ...]]
+    #   ["d", isbn]
+    #   ["t", isbn, type, copies, micros]
+    # The log is fsync'ed every sync_every records and compacted into a new snapshot
+    # once it holds compact_every records, which bounds both replay time and log size.
+    # That compaction is kept off the change that triggers it: the change only starts
+    # the new log and takes a CatalogSnapshot, and a background thread writes the file
+    # from it while sales go on (python -m benchmarks.compaction_latency measures what
+    # the triggering sale still pays). compact() writes a snapshot and waits for it.
+    #
+    # With archive=True, snapshots keep the histories in a memory-mapped
+    # TransactionArchive (transactions.N.archive) and each snapshot line names its
+    # book's archive entry instead of listing the transactions. Loading then reads no
+    # transactions at all: books get an ArchivedHistory that pages records in on use,
+    # and after each compaction every book's history moves to the new archive. close()
+    # unmaps the archive, after which the archived transactions can no longer be
+    # listed (their totals still can).
+
+    SNAPSHOT = 'catalog.snapshot'
+
+    def __init__(self, directory: str | Path, sync_every: int = 256, compact_every: int = 1_000_000,
+                 archive: bool = False):
+        self.directory: Path = Path(directory)
+        self.sync_every: int = sync_every
+        self.compact_every: int = compact_every
+        self.archive: bool = archive
+        self._archive: TransactionArchive | None = None
+        self.bookstore: Bookstore | None = None
+        self._generation: int = 0
+        self._log = None
+        self._log_records: int = 0
+        self._unsynced: int = 0
+        # The background compaction, if one is under way, and what it hands back: the
+        # new archive with the (isbn, history, length) of each entry, or its failure.
+        self._writer: threading.Thread | None = None
+        self._written: bool = False
+        self._archived: tuple[TransactionArchive, list[tuple[str, list[Transaction] | TransactionLedger, int]]] | \
+            None = None
+        self._failure: Exception | None = None
+
+    def load(self, bookstore: Bookstore | None = None) -> Bookstore:
+        if self.bookstore is not None:
+            raise RuntimeError('storage is already attached to a bookstore')
+        bookstore = Bookstore() if bookstore is None else bookstore
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._generation = self._read_snapshot(bookstore)
+        self._log_records = self._replay_log(bookstore)
+        # Logs started by a compaction that did not get to replace the snapshot.
+        while self._log_path(self._generation + 1).exists():
+            self._generation += 1
+            self._log_records = self._replay_log(bookstore)
+        self._log = open(self._log_path(self._generation), 'a', encoding='utf-8')
+        self.bookstore = bookstore
+        bookstore.add_observer(self, existing=False)
+        return bookstore
+
+    def book_added(self, book: Book):
+        history = []
+        for t in book.transactions:
+            history += (t.type, t.copies, date_to_micros(t.date))
+        self._append(['a', book.isbn, book.title, book.sale_price, book.purchase_price, book.quantity, history])
+
+    def book_removed(self, book: Book):
+        self._append(['d', book.isbn])
+
+    def transaction_recorded(self, book: Book, transaction: Transaction):
+        self._append(['t', book.isbn, transaction.type, transaction.copies, date_to_micros(transaction.date)])
+
+    def sync(self):
+        if self._log is not None and self._unsynced:
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            self._unsynced = 0
+
+    def compact(self):
+        # Writes a snapshot of the catalog as it is now and returns once it is on disk,
+        # after waiting for a background compaction that is already under way.
+        if self.bookstore is not None:
+            self._wait()
+            # The snapshot must not catch a change whose log record is still to come.
+            self.bookstore._settled(self._start)
+            self._wait()
+
+    def _compact_when_due(self):
+        if self.bookstore is None:
+            return
+        if self._written:
+            self._finish()
+        if self._log_records >= self.compact_every:
+            self._start()
+
+    def _start(self):
+        # Runs in a settled catalog; the snapshot file is written by the writer thread.
+        if self._writer is not None:
+            return
+        self.sync()
+        snapshot = self.bookstore._take_snapshot()
+        self._log.close()
+        self._generation += 1
+        self._log = open(self._log_path(self._generation), 'a', encoding='utf-8')
+        self._log_records = 0
+        self._writer = threading.Thread(target=self._write, args=(snapshot, self._generation),
+                                        name='FileStorage compaction')
+        self._writer.start()
+
+    def _write(self, snapshot: CatalogSnapshot, generation: int):
+        try:
+            with snapshot:
+                self._write_snapshot(snapshot, generation)
+            self._remove_stale(generation)
+        except Exception as error:
+            # The older logs are kept, so nothing is lost; compact() and close() report it.
+            self._failure = error
+        finally:
+            self._written = True
+
+    def _finish(self):
+        # Runs in a settled catalog once the writer is done.
+        if self._writer is None or not self._written:
+            return
+        self._writer.join()
+        self._writer, self._written = None, False
+        if self._archived is not None:
+            # The histories now live in the new archive; drop their in-memory copies,
+            # keeping the transactions recorded since the snapshot.
+            archive, entries = self._archived
+            self._archived = None
+            for entry, (isbn, history, length) in enumerate(entries):
+                book = self.bookstore.catalog.get(isbn)
+                if book is not None and book.transactions is history:
+                    archived = ArchivedHistory(archive, entry)
+                    for i in range(length, len(history)):
+                        archived.append(history[i])
+                    book.transactions = archived
+            self._archive = archive
+
+    def _wait(self):
+        writer = self._writer
+        if writer is not None:
+            writer.join()
+            self.bookstore._settled(self._finish)
+        failure, self._failure = self._failure, None
+        if failure is not None:
+            raise failure
+
+    def close(self):
+        if self.bookstore is not None:
+            try:
+                self._wait()
+            finally:
+                self.sync()
+                self._log.close()
+                self.bookstore.remove_observer(self)
+                self.bookstore = None
+                self._log = None
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+    def _append(self, record: list):
+        self._log.write(json.dumps(record, separators=(',', ':')))
+        self._log.write('\n')
+        self._log_records += 1
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every:
+            self.sync()
+        if self._written or self._writer is None and self._log_records >= self.compact_every:
+            # This runs inside the change being logged; act once it has completed.
+            self.bookstore._after_change(self._compact_when_due)
+
+    def _log_path(self, generation: int) -> Path:
+        return self.directory / f'transactions.{generation}.log'
+
+    def _archive_path(self, generation: int) -> Path:
+        return self.directory / f'transactions.{generation}.archive'
+
+    def _read_snapshot(self, bookstore: Bookstore) -> int:
+        path = self.directory / self.SNAPSHOT
+        generation = 0
+        if path.exists():
+            with open(path, encoding='utf-8') as file:
+                generation = json.loads(file.readline())['generation']
+                if self._archive_path(generation).exists():
+                    self._archive = TransactionArchive(self._archive_path(generation))
+                for line in file:
+                    bookstore.insert_book(self._book(json.loads(line), bookstore))
+        self._remove_stale(generation)
+        return generation
+
+    def _remove_stale(self, generation: int):
+        # Logs older than snapshot `generation`, and archives other than its own.
+        for path in self.directory.glob('transactions.*.*'):
+            number = int(path.name.split('.')[1])
+            if number < generation if path.suffix == '.log' else number != generation:
+                try:
+                    path.unlink(missing_ok=True)
+                except OSError:
+                    # Still mapped on a platform that forbids deleting mapped files; it
+                    # is removed by a later compaction or load.
+                    pass
+
+    def _write_snapshot(self, snapshot: CatalogSnapshot, generation: int):
+        path = self.directory / self.SNAPSHOT
+        temporary = path.with_suffix('.tmp')
+        # Books are frozen one at a time rather than listed, which would keep a copy of
+        # every book alive and have the garbage collector walk them all.
+        if self.archive:
+            entries = [(book.isbn, book._history, book._length) for book in snapshot.books()]
+            TransactionArchive.write(self._archive_path(generation), (history for _, history, _ in entries),
+                                     (length for _, _, length in entries))
+        with open(temporary, 'w', encoding='utf-8') as file:
+            file.write(json.dumps({'generation': generation}))
+            file.write('\n')
+            for entry, book in enumerate(snapshot.books()):
+                if self.archive:
+                    history = entry
+                else:
+                    history = []
+                    for t in itertools.islice(book._history, book._length):
+                        history += (t.type, t.copies, date_to_micros(t.date))
+                file.write(json.dumps([book.isbn, book.title, book.sale_price, book.purchase_price, book.quantity,
+                                       history], separators=(',', ':')))
+                file.write('\n')
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+        self._fsync_directory()
+        if self.archive:
+            self._archived = (TransactionArchive(self._archive_path(generation)), entries)
+
+    def _replay_log(self, bookstore: Bookstore) -> int:
+        path = self._log_path(self._generation)
+        if not path.exists():
+            return 0
+        records = 0
+        replay: dict[str, Callable[[list], None]] = {
+            'a': lambda record: bookstore.insert_book(self._book(record[1:], bookstore)),
+            'd': lambda record: bookstore.delete_book(record[1]),
+            't': lambda record: self._logged_book(bookstore, record[1]).replay(
+                Transaction(record[2], record[3], micros_to_date(record[4]))),
+        }
+        with open(path, 'rb+') as file:
+            intact = 0
+            for line in file:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                replay[record[0]](record)
+                records += 1
+                intact += len(line)
+            # Drop a line torn by a crash mid-write so that new records follow intact ones.
+            file.truncate(intact)
+        return records
+
+    @staticmethod
+    def _logged_book(bookstore: Bookstore, isbn: str) -> Book:
+        # Looked up through the store rather than its catalog dict: a log written by a
+        # plain Bookstore, replayed into a CanonicalISBNBookstore, names books by their
+        # ISBNs as typed while the catalog keys them by the canonical ones.
+        book = bookstore.search_by_isbn(isbn)
+        if book is None:
+            raise KeyError(isbn)
+        return book
+
+    def _book(self, fields: list, bookstore: Bookstore) -> Book:
+        isbn, title, sale_price, purchase_price, quantity, history = fields
+        book = Book(isbn, title, sale_price, purchase_price, quantity)
+        if isinstance(history, int):
+            book.transactions = ArchivedHistory(self._archive, history)
+            return book
+        if bookstore.compact_ledger:
+            book.transactions = TransactionLedger()
+        for i in range(0, len(history), 3):
+            book.transactions.append(Transaction(history[i], history[i + 1], micros_to_date(history[i + 2])))
+        return book
+
+    def _fsync_directory(self):
+        if hasattr(os, 'O_DIRECTORY'):
+            descriptor = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(descriptor)
+            finally:
+                os.close(descriptor)
@@ -1,12 +1,16 @@
 import sys
 
+from bookstore.cache import BookViewCache
+from bookstore.isbn import InvalidISBN
+from bookstore.metrics import metrics
 from bookstore.model import Bookstore
 
 
 class UIConsole:
     
-    def __init__(self):
-        self.bookstore = Bookstore()
+    def __init__(self, bookstore: Bookstore | None = None):
+        self.bookstore = Bookstore() if bookstore is None else bookstore
+        self.views = BookViewCache(self.bookstore)
         self.options = {
             '1': self.add_book,
             '2': self.sell_book,
@@ -14,7 +18,10 @@ class UIConsole:
             '4': self.search_by_isbn,
             '5': self.delete_book,
             '6': self.best_seller,
-            '0': self.exit
+            '7': self.search_by_title,
+            '0': self.exit,
+            # Not listed in the menu.
+            'm': self.show_metrics,
         }
 
     def print_menu(self):
@@ -26,6 +33,7 @@ class UIConsole:
         print('4. Search by ISBN')
         print('5. Delete book')
         print('6. Best seller')
+        print('7. Search by title')
         print('0. Exit')
         print("====================================")
     
@@ -46,7 +54,10 @@ class UIConsole:
         sale_price = float(input('Enter sale price: '))
         purchase_price = float(input('Enter purchase price: '))
         quantity = int(input('Enter quantity: '))
-        self.bookstore.add_book(isbn, title, sale_price, purchase_price, quantity)
+        try:
+            self.bookstore.add_book(isbn, title, sale_price, purchase_price, quantity)
+        except InvalidISBN as error:
+            print(error)
     
     def sell_book(self):
         print(">>> Sell book ========================")
@@ -69,9 +80,18 @@ class UIConsole:
     def search_by_isbn(self):
         print(">>> Search by ISBN ========================")
         isbn = input('Enter ISBN: ')
-        book = self.bookstore.search_by_isbn(isbn)
-        if book:
-            print(book)
+        text = self.views.text(isbn)
+        if text:
+            print(text)
+        else:
+            print('Book not found')
+    
+    def search_by_title(self):
+        print(">>> Search by title ========================")
+        title = input('Enter title: ')
+        books = self.bookstore.search_by_title(title) or self.bookstore.search_by_title_prefix(title)
+        if books:
+            print('\n\n'.join(str(book) for book in books))
         else:
             print('Book not found')
     
@@ -87,10 +107,17 @@ class UIConsole:
         print(">>> Best seller ========================")
         book = self.bookstore.best_selling_book()
         if book:
-            print(book)
+            print(self.views.text(book.isbn))
         else:
             print('No book sold yet')
     
+    def show_metrics(self):
+        print(">>> Metrics ========================")
+        if not metrics.enabled:
+            print('Metrics are disabled (start the app with --metrics FILE)')
+        else:
+            print(metrics.summary())
+    
     def exit(self):
         print("\nGoodbye!")
         sys.exit(0)
@@ -0,0 +1,76 @@
+from datetime import datetime
+
+import pytest
+
+from bookstore.archive import TransactionArchive
+from bookstore.model import Book, Bookstore, Transaction, TransactionLedger
+
+
+@pytest.fixture
+def histories():
+    return [
+        [Transaction(Transaction.SUPPLY, 10, datetime(2024, 1, 1, 9)), Transaction(Transaction.SELL, 3, datetime(2024, 1, 2))],
+        [],
+        TransactionLedger([Transaction(Transaction.SELL, 1, datetime(2024, 2, 1))]),
+    ]
+
+
+@pytest.fixture
+def archive(tmp_path, histories):
+    assert TransactionArchive.write(tmp_path / 'history.archive', histories) == 3
+    archive = TransactionArchive(tmp_path / 'history.archive')
+    yield archive
+    archive.close()
+
+
+def test_transaction_archive_indexes_every_history(archive):
+    assert len(archive) == 3
+    assert archive.entry(0) == (0, 2, 3, 10)
+    assert archive.entry(1) == (2, 0, 0, 0)
+    assert archive.entry(2) == (2, 1, 1, 0)
+
+
+def test_archived_history_reads_transactions_lazily(archive, histories):
+    history = archive.history(0)
+    assert len(history) == 2
+    assert history == histories[0]
+    assert (history[1].type, history[1].copies, history[1].date) == (Transaction.SELL, 3, datetime(2024, 1, 2))
+    assert history[-2].date == datetime(2024, 1, 1, 9)
+    assert not archive.history(1)
+    with pytest.raises(IndexError):
+        history[2]
+
+
+def test_archived_history_totals_come_from_the_index(archive):
+    history = archive.history(0)
+    # Totals are answered without touching the records.
+    archive._records.release()
+    assert (history.total(Transaction.SELL), history.total(Transaction.SUPPLY)) == (3, 10)
+
+
+def test_archived_history_appends_new_transactions_in_memory(archive):
+    book = Book('1234', 'Test Book', 10.0, 5.0, 7)
+    book.transactions = archive.history(0)
+    book.recount()
+    assert book.sell(2)
+    assert book.copies_sold() == 5 and book.counters_match()
+    assert len(book.transactions) == 3
+    assert [copies for _, copies, _ in book.transactions.records()] == [10, 3, 2]
+    assert [copies for _, copies, _ in book.transactions.records(2)] == [10, 3]
+    assert [t.copies for t in book.transactions] == [10, 3, 2]
+
+
+def test_bookstore_loads_archived_books_without_reading_their_history(archive):
+    bookstore = Bookstore()
+    book = Book('1234', 'Test Book', 10.0, 5.0, 7)
+    book.transactions = archive.history(0)
+    bookstore.insert_book(book)
+    assert book.copies_sold() == 3
+    assert bookstore.best_selling_book() is book
+    assert bookstore.daily_sales('1234') == [(datetime(2024, 1, 1).date(), 0, 10), (datetime(2024, 1, 2).date(), 3, 0)]
+
+
+def test_transaction_archive_rejects_other_files(tmp_path):
+    (tmp_path / 'other').write_bytes(bytes(64))
+    with pytest.raises(ValueError):
+        TransactionArchive(tmp_path / 'other')
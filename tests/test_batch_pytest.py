@@ -0,0 +1,67 @@
+import io
+
+import pytest
+
+from bookstore.batch import BatchRunner, format_summary
+from bookstore.model import Bookstore
+
+SCRIPT = """\
+# opening stock
+add,1234,"Test Book, Vol. 1",10.0,5.0,10
+1,5678,Test Book 2,20.0,10.0,20
+add,1234,Duplicate,1.0,1.0,1
+
+sell,1234,4
+2,5678,30
+supply,0000,1
+search,1234
+best
+delete,5678
+refund,1234
+sell,1234,many
+"""
+
+
+def test_batch_runner_replays_script_and_summarizes():
+    bookstore = Bookstore()
+    out = io.StringIO()
+    summary = BatchRunner(bookstore, out).run(io.StringIO(SCRIPT))
+
+    assert bookstore.search_by_isbn('1234').quantity == 6
+    assert bookstore.search_by_isbn('5678') is None
+    assert (summary['ok'], summary['failed'], summary['invalid']) == (6, 3, 2)
+    assert (summary['add'], summary['sell'], summary['best']) == (3, 2, 1)
+    lines = out.getvalue().splitlines()
+    assert lines[:6] == ['Book 1234 added', 'Book 5678 added', 'Book 1234 already exists', 'Book sold successfully',
+                         'Book not found or not enough quantity', 'Book not found']
+    assert 'Title: Test Book, Vol. 1' in lines
+    assert lines[-2].startswith('line 12: invalid command')
+    assert '9 operations' in format_summary(summary)
+
+
+def test_batch_runner_without_output_only_counts():
+    summary = BatchRunner(Bookstore()).run(['add,1,One,1.0,1.0,1', 'sell,1,1', '6'])
+    assert summary['ok'] == 3
+
+
+def test_batch_runner_writes_output_as_it_goes():
+    class Recorder(io.StringIO):
+        def __init__(self):
+            super().__init__()
+            self.writes = 0
+
+        def write(self, text):
+            self.writes += 1
+            return super().write(text)
+
+    class Failing(Bookstore):
+        def delete_book(self, isbn):
+            raise RuntimeError('disk full')
+
+    out = Recorder()
+    runner = BatchRunner(Failing(), out, flush_every=2)
+    with pytest.raises(RuntimeError):
+        runner.run(['add,1,One,1.0,1.0,5', 'sell,1,1', 'sell,1,1', 'delete,1', 'sell,1,1'])
+    # Two lines were flushed together, and the third was still written when delete raised.
+    assert out.writes == 2
+    assert out.getvalue().splitlines() == ['Book 1 added', 'Book sold successfully', 'Book sold successfully']
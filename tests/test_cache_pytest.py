@@ -0,0 +1,58 @@
+import pytest
+
+from bookstore.cache import BookViewCache
+from bookstore.model import Bookstore
+
+
+@pytest.fixture
+def bookstore():
+    bookstore = Bookstore()
+    bookstore.add_book('1234', 'Test Book', 10.0, 5.0, 10)
+    bookstore.add_book('5678', 'Test Book 2', 20.0, 10.0, 20)
+    return bookstore
+
+
+def test_book_view_cache_renders_and_counts_hits(bookstore):
+    views = BookViewCache(bookstore)
+    assert views.text('1234') == str(bookstore.search_by_isbn('1234'))
+    assert views.as_dict('1234') == bookstore.search_by_isbn('1234').as_dict()
+    assert views.text('0000') is None
+    assert views.stats() == {'size': 1, 'hits': 1, 'misses': 2, 'hit_rate': 1 / 3}
+
+
+def test_book_view_cache_is_invalidated_by_changes(bookstore):
+    views = BookViewCache(bookstore)
+    views.text('1234')
+    bookstore.sell_book('1234', 4)
+    assert views.text('1234').endswith('Quantity: 6')
+    bookstore.supply_book('1234', 1)
+    assert views.as_dict('1234')['quantity'] == 7
+    bookstore.delete_book('1234')
+    assert views.text('1234') is None
+    assert views.hits == 0
+
+
+def test_book_view_cache_evicts_least_recently_used(bookstore):
+    bookstore.add_book('91011', 'Test Book 3', 30.0, 15.0, 30)
+    views = BookViewCache(bookstore, maxsize=2)
+    views.text('1234')
+    views.text('5678')
+    views.text('1234')
+    views.text('91011')
+    assert views.stats()['size'] == 2
+    views.text('1234')
+    assert views.hits == 2
+    views.text('5678')
+    assert views.misses == 4
+
+
+def test_book_view_cache_expires_entries(bookstore, monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr('bookstore.cache.time.monotonic', lambda: clock[0])
+    views = BookViewCache(bookstore, ttl=5)
+    views.text('1234')
+    clock[0] += 4
+    views.text('1234')
+    clock[0] += 2
+    views.text('1234')
+    assert (views.hits, views.misses) == (1, 2)
@@ -0,0 +1,109 @@
+import pytest
+
+from bookstore.batch import BatchRunner
+from bookstore.cache import BookViewCache
+from bookstore.isbn import CanonicalISBNBookstore, InvalidISBN, from_int, is_valid, normalize, to_int
+from bookstore.locking import ThreadSafeBookstore
+from bookstore.storage import FileStorage
+
+
+@pytest.mark.parametrize('isbn', ['9780131103627', '978-0-13-110362-7', '978 0 13 110362 7', '0131103628',
+                                  '0-13-110362-8'])
+def test_normalize_accepts_isbn10_and_isbn13_forms(isbn):
+    assert normalize(isbn) == '9780131103627'
+
+
+def test_normalize_handles_the_x_check_digit():
+    assert normalize('0-8044-2957-x') == '9780804429573'
+
+
+@pytest.mark.parametrize('isbn', ['', '1234', '9780131103628', '0131103627', '9770131103620', '97801311036X7',
+                                  'X131103628', '978013110362'])
+def test_normalize_rejects_invalid_isbns(isbn):
+    with pytest.raises(InvalidISBN):
+        normalize(isbn)
+    assert not is_valid(isbn)
+
+
+def test_isbns_pack_into_64_bit_ints():
+    assert to_int('0-13-110362-8') == 9780131103627
+    assert from_int(9780131103627) == '9780131103627'
+    assert to_int('979-10-90636-07-1') < 2 ** 63
+
+
+@pytest.fixture
+def bookstore():
+    bookstore = CanonicalISBNBookstore()
+    bookstore.add_book('978-0-13-110362-7', 'The C Programming Language', 50.0, 30.0, 10)
+    return bookstore
+
+
+def test_canonical_bookstore_merges_isbn_spellings(bookstore):
+    bookstore.add_book('0131103628', 'The C Programming Language', 50.0, 30.0, 99)
+    assert list(bookstore.catalog) == ['9780131103627']
+    assert bookstore.search_by_isbn('0-13-110362-8').quantity == 10
+    assert bookstore.sell_book('978 0 13 110362 7', 4)
+    assert bookstore.supply_book('0131103628', 1)
+    assert bookstore.sell_many([('9780131103627', 1), ('0131103628', 1)]) == [True, True]
+    assert bookstore.rank_of('0-13-110362-8') == 1
+    assert bookstore.search_by_isbn('9780131103627').copies_sold() == 6
+    assert bookstore.delete_book('0-13-110362-8')
+    assert bookstore.catalog == {}
+
+
+def test_canonical_bookstore_rejects_invalid_isbns_on_add(bookstore):
+    with pytest.raises(InvalidISBN):
+        bookstore.add_book('1234', 'Test Book', 10.0, 5.0, 10)
+    with pytest.raises(InvalidISBN):
+        bookstore.add_books([('9780131103628', 'Test Book', 10.0, 5.0, 10)])
+    assert len(bookstore.catalog) == 1
+
+
+def test_canonical_bookstore_treats_invalid_isbns_as_missing(bookstore):
+    assert bookstore.search_by_isbn('1234') is None
+    assert not bookstore.sell_book('1234', 1)
+    assert bookstore.sell_many([('1234', 1), ('0131103628', 1)]) == [False, True]
+    assert not bookstore.delete_book('1234')
+    assert bookstore.rank_of('1234') is None
+
+
+def test_canonical_bookstore_add_books_skips_duplicate_spellings():
+    bookstore = CanonicalISBNBookstore()
+    result = bookstore.add_books([('0131103628', 'K&R', 50.0, 30.0, 1), ('978-0-13-110362-7', 'K&R', 50.0, 30.0, 1)])
+    assert (result.inserted, result.skipped) == (1, 1)
+
+
+def test_canonical_bookstore_combines_with_thread_safe_bookstore():
+    class Store(CanonicalISBNBookstore, ThreadSafeBookstore):
+        pass
+
+    bookstore = Store()
+    bookstore.add_book('0131103628', 'K&R', 50.0, 30.0, 3)
+    assert bookstore.sell_book('978-0-13-110362-7', 3)
+    assert not bookstore.sell_book('9780131103627', 1)
+
+
+def test_batch_runner_reports_invalid_isbns_and_duplicates(bookstore):
+    summary = BatchRunner(bookstore).run(['add,1234,Bad,1,1,1', 'add,0131103628,Again,1,1,1', 'sell,0131103628,2'])
+    assert (summary['invalid'], summary['failed'], summary['ok']) == (1, 1, 1)
+
+
+def test_canonical_bookstore_loads_a_log_written_with_isbns_as_typed(tmp_path):
+    storage = FileStorage(tmp_path)
+    plain = storage.load()
+    plain.add_book('0131103628', 'K&R', 50.0, 30.0, 10)
+    plain.sell_book('0131103628', 3)
+    storage.close()
+
+    restored = FileStorage(tmp_path).load(CanonicalISBNBookstore())
+    book = restored.search_by_isbn('978-0-13-110362-7')
+    assert (book.isbn, book.quantity, book.copies_sold()) == ('9780131103627', 7, 3)
+
+
+def test_book_view_cache_is_invalidated_whatever_the_isbn_spelling(bookstore):
+    views = BookViewCache(bookstore)
+    assert views.text('0131103628').endswith('Quantity: 10')
+    bookstore.sell_book('978-0-13-110362-7', 4)
+    assert views.text('0131103628').endswith('Quantity: 6')
+    assert views.text('9780131103627').endswith('Quantity: 6')
+    assert views.stats()['size'] == 1 and views.hits == 1
@@ -0,0 +1,36 @@
+import pytest
+
+from bookstore.loaders import read_catalog, read_csv, read_jsonl
+from bookstore.model import Bookstore
+
+
+def test_read_csv_streams_typed_rows_with_any_column_order(tmp_path):
+    path = tmp_path / 'feed.csv'
+    path.write_text('title,isbn,quantity,sale_price,purchase_price\n'
+                    '"Book, One",1234,10,10.0,5.0\n'
+                    '\n'
+                    'Book Two,5678,20,20.5,10.0\n', encoding='utf-8')
+    assert list(read_csv(path)) == [('1234', 'Book, One', 10.0, 5.0, 10), ('5678', 'Book Two', 20.5, 10.0, 20)]
+
+
+def test_read_csv_rejects_missing_columns(tmp_path):
+    path = tmp_path / 'feed.csv'
+    path.write_text('isbn,title\n1234,Book\n', encoding='utf-8')
+    with pytest.raises(ValueError):
+        list(read_csv(path))
+
+
+def test_read_jsonl_streams_typed_rows(tmp_path):
+    path = tmp_path / 'feed.jsonl'
+    path.write_text('{"isbn": 1234, "title": "Book", "sale_price": 10, "purchase_price": 5, "quantity": "3"}\n',
+                    encoding='utf-8')
+    assert list(read_jsonl(path)) == [('1234', 'Book', 10.0, 5.0, 3)]
+
+
+def test_read_catalog_feeds_add_books(tmp_path):
+    path = tmp_path / 'feed.csv'
+    path.write_text('isbn,title,sale_price,purchase_price,quantity\n'
+                    '1234,Book,10.0,5.0,10\n1234,Again,10.0,5.0,10\n', encoding='utf-8')
+    result = Bookstore().add_books(read_catalog(path))
+    assert result.inserted == 1
+    assert result.skipped == 1
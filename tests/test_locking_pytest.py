@@ -0,0 +1,191 @@
+import inspect
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from bookstore.locking import ThreadSafeBookstore
+from bookstore.model import Bookstore
+from bookstore.storage import FileStorage
+
+
+@pytest.fixture
+def fast_switching():
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def run_threads(count: int, target):
+    barrier = threading.Barrier(count)
+
+    def worker(index):
+        barrier.wait()
+        target(index)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_thread_safe_bookstore_keeps_bookstore_signatures():
+    for name in ('best_selling_book', 'search_by_isbn', 'sell_book', 'top_sellers'):
+        assert inspect.signature(getattr(ThreadSafeBookstore(), name)) == inspect.signature(getattr(Bookstore(), name))
+
+
+def test_concurrent_sales_never_oversell(fast_switching):
+    bookstore = ThreadSafeBookstore(stripes=4)
+    isbns = [str(i) for i in range(8)]
+    for isbn in isbns:
+        bookstore.add_book(isbn, f'Book {isbn}', 10.0, 5.0, 500)
+    sold = [0] * 8
+
+    def sell(index):
+        for i in range(2000):
+            isbn = isbns[(index + i) % len(isbns)]
+            if bookstore.sell_book(isbn, 1 + i % 3):
+                sold[index] += 1 + i % 3
+            if i % 500 == 0:
+                bookstore.best_selling_book()
+
+    run_threads(8, sell)
+
+    total = 0
+    for isbn in isbns:
+        book = bookstore.search_by_isbn(isbn)
+        assert book.quantity >= 0
+        assert book.quantity + book.copies_sold() == 500
+        assert book.counters_match()
+        total += book.copies_sold()
+    assert total == sum(sold)
+    expected = max(bookstore.catalog.values(), key=lambda book: book.copies_sold())
+    assert bookstore.best_selling_book().copies_sold() == expected.copies_sold()
+
+
+def test_concurrent_baskets_are_atomic(fast_switching):
+    bookstore = ThreadSafeBookstore(stripes=4)
+    bookstore.add_book('1', 'One', 10.0, 5.0, 300)
+    bookstore.add_book('2', 'Two', 10.0, 5.0, 300)
+
+    def sell(index):
+        for _ in range(200):
+            bookstore.sell_many([('1', 1), ('2', 2)], atomic=True)
+            bookstore.supply_book('1', 0)
+
+    run_threads(6, sell)
+    one, two = bookstore.search_by_isbn('1'), bookstore.search_by_isbn('2')
+    assert two.copies_sold() == 2 * one.copies_sold() == 300
+    assert one.quantity == 150 and two.quantity == 0
+
+
+def test_history_rollup_runs_alongside_sales(fast_switching):
+    bookstore = ThreadSafeBookstore(stripes=4)
+    isbns = [str(i) for i in range(8)]
+    for isbn in isbns:
+        bookstore.add_book(isbn, f'Book {isbn}', 10.0, 5.0, 10_000)
+
+    def work(index):
+        if index == 0:
+            for _ in range(50):
+                bookstore.compact_history(datetime.now() + timedelta(days=1))
+            return
+        for i in range(1000):
+            bookstore.sell_book(isbns[(index + i) % len(isbns)], 1)
+
+    run_threads(4, work)
+
+    assert sum(bookstore.search_by_isbn(isbn).copies_sold() for isbn in isbns) == 3000
+    for isbn in isbns:
+        assert bookstore.search_by_isbn(isbn).counters_match()
+
+
+def test_snapshot_is_consistent_under_concurrent_sales(fast_switching):
+    bookstore = ThreadSafeBookstore(stripes=4)
+    isbns = [str(i) for i in range(8)]
+    for isbn in isbns:
+        bookstore.add_book(isbn, f'Book {isbn}', 10.0, 5.0, 1000)
+    totals = []
+    consistent = []
+
+    def work(index):
+        if index == 0:
+            for _ in range(50):
+                with bookstore.snapshot() as snapshot:
+                    books = list(snapshot.books())
+                    totals.append(sum(book.copies_sold() for book in books))
+                    # Stock and sales of every book add up, and a second pass sees the same sales.
+                    consistent.append(all(book.quantity + book.copies_sold() == 1000 for book in books)
+                                      and sum(book.copies_sold() for book in snapshot.books()) == totals[-1])
+            return
+        for i in range(1000):
+            bookstore.sell_book(isbns[(index + i) % len(isbns)], 1)
+
+    run_threads(4, work)
+
+    assert len(consistent) == 50 and all(consistent)
+    assert totals == sorted(totals)
+    assert sum(bookstore.search_by_isbn(isbn).copies_sold() for isbn in isbns) == 3000
+
+
+def test_storage_compaction_during_concurrent_sales_reloads_exactly(tmp_path, fast_switching):
+    storage = FileStorage(tmp_path, compact_every=50)
+    bookstore = storage.load(ThreadSafeBookstore(stripes=16))
+    isbns = [str(i) for i in range(32)]
+    for isbn in isbns:
+        bookstore.add_book(isbn, f'Book {isbn}', 10.0, 5.0, 1000)
+
+    def sell(index):
+        for i in range(1000):
+            bookstore.sell_book(isbns[(index * 7 + i) % len(isbns)], 1)
+
+    run_threads(8, sell)
+    storage.close()
+
+    restored = FileStorage(tmp_path).load()
+    assert sum(book.copies_sold() for book in restored.catalog.values()) == 8000
+    for isbn in isbns:
+        book, saved = bookstore.search_by_isbn(isbn), restored.search_by_isbn(isbn)
+        assert (saved.quantity, saved.copies_sold()) == (book.quantity, book.copies_sold())
+        assert saved.quantity + saved.copies_sold() == 1000
+
+
+def test_storage_compaction_waits_for_a_sale_in_progress(tmp_path):
+    storage = FileStorage(tmp_path)
+    bookstore = storage.load(ThreadSafeBookstore())
+    bookstore.add_book('1234', 'Test Book', 10.0, 5.0, 10)
+    index_lock = bookstore._index_lock
+    waiting, resume = threading.Event(), threading.Event()
+
+    class PausingLock:
+        # Holds the selling thread after the book has changed but before the sale is
+        # logged, which is when a compaction used to catch it.
+        def __enter__(self):
+            if threading.current_thread().name == 'seller':
+                waiting.set()
+                resume.wait(5)
+            return index_lock.__enter__()
+
+        def __exit__(self, *exc_info):
+            return index_lock.__exit__(*exc_info)
+
+        def __getattr__(self, name):
+            return getattr(index_lock, name)
+
+    bookstore._index_lock = PausingLock()
+    seller = threading.Thread(target=bookstore.sell_book, args=('1234', 3), name='seller')
+    seller.start()
+    assert waiting.wait(5)
+    compaction = threading.Thread(target=storage.compact)
+    compaction.start()
+    compaction.join(0.2)
+    resume.set()
+    seller.join()
+    compaction.join()
+    storage.close()
+
+    restored = FileStorage(tmp_path).load().search_by_isbn('1234')
+    assert (restored.quantity, restored.copies_sold()) == (7, 3)
@@ -0,0 +1,169 @@
+import inspect
+import json
+import threading
+import time
+
+import pytest
+
+from bookstore.isbn import CanonicalISBNBookstore
+from bookstore.locking import ThreadSafeBookstore
+from bookstore.metrics import Histogram, Metrics
+from bookstore.model import Bookstore
+
+
+@pytest.fixture
+def metrics():
+    metrics = Metrics()
+    metrics.enable()
+    yield metrics
+    metrics.disable()
+
+
+@pytest.fixture
+def bookstore():
+    bookstore = Bookstore()
+    bookstore.add_book('1234', 'Test Book', 10.0, 5.0, 10)
+    return bookstore
+
+
+def test_metrics_disable_restores_the_original_methods():
+    originals = {name: Bookstore.__dict__[name] for name in ('sell_book', 'search_by_isbn', 'best_selling_book')}
+    metrics = Metrics()
+    metrics.enable()
+    assert Bookstore.__dict__['sell_book'] is not originals['sell_book']
+    assert inspect.signature(Bookstore.best_selling_book) == inspect.signature(originals['best_selling_book'])
+    metrics.disable()
+    assert not metrics.enabled
+    for name, original in originals.items():
+        assert Bookstore.__dict__[name] is original
+
+
+def test_metrics_disable_restores_subclass_overrides():
+    originals = {cls: cls.__dict__['search_by_isbn'] for cls in (Bookstore, CanonicalISBNBookstore)}
+    original_best = ThreadSafeBookstore.__dict__['best_selling_book']
+    metrics = Metrics()
+    metrics.enable()
+    assert CanonicalISBNBookstore.__dict__['search_by_isbn'] is not originals[CanonicalISBNBookstore]
+    assert ThreadSafeBookstore.__dict__['best_selling_book'] is not original_best
+    metrics.disable()
+    assert {cls: cls.__dict__['search_by_isbn'] for cls in originals} == originals
+    assert ThreadSafeBookstore.__dict__['best_selling_book'] is original_best
+
+
+def test_metrics_record_canonical_isbn_lookups(metrics):
+    bookstore = CanonicalISBNBookstore()
+    bookstore.add_book('978-0-13-110362-7', 'The C Programming Language', 50.0, 30.0, 10)
+    assert bookstore.search_by_isbn('0131103628') is not None
+    assert bookstore.search_by_isbn('9780131103627') is not None
+    assert bookstore.search_by_isbn('9780262033848') is None
+    stats = metrics.as_dict()['Bookstore.search_by_isbn']
+    assert (stats['calls'], stats['misses']) == (3, 1)
+
+
+def test_metrics_record_thread_safe_operations_with_their_lock_waits(metrics):
+    bookstore = ThreadSafeBookstore()
+    bookstore.add_book('1234', 'Test Book', 10.0, 5.0, 10)
+    assert bookstore.best_selling_book() is None
+    holding = threading.Event()
+
+    def hold_stripe():
+        with bookstore._stripe('1234'):
+            holding.set()
+            time.sleep(0.05)
+
+    holder = threading.Thread(target=hold_stripe)
+    holder.start()
+    holding.wait()
+    assert bookstore.sell_book('1234', 1)
+    holder.join()
+    stats = metrics.as_dict()
+    assert stats['Bookstore.best_selling_book']['calls'] == 1
+    assert stats['Bookstore.sell_book']['calls'] == 1
+    assert stats['Bookstore.sell_book']['latency_ns']['max'] >= 30_000_000
+
+
+def test_metrics_count_calls_and_misses(metrics, bookstore):
+    assert bookstore.sell_book('1234', 4)
+    assert not bookstore.sell_book('1234', 100)
+    assert not bookstore.sell_book('0000', 1)
+    assert bookstore.search_by_isbn('0000') is None
+    stats = metrics.as_dict()
+    assert stats['Bookstore.sell_book']['calls'] == 3
+    assert stats['Bookstore.sell_book']['misses'] == 2
+    assert stats['Bookstore.search_by_isbn'] == {**stats['Bookstore.search_by_isbn'], 'calls': 1, 'misses': 1}
+
+
+def test_metrics_record_only_the_outermost_call(metrics, bookstore):
+    bookstore.sell_book('1234', 1)
+    stats = metrics.as_dict()
+    # sell_book looks the book up and sells it, neither is counted on its own.
+    assert 'Bookstore.search_by_isbn' not in stats
+    assert 'Book.copies_sold' not in stats
+    bookstore.search_by_isbn('1234').copies_sold()
+    assert metrics.as_dict()['Book.copies_sold']['calls'] == 1
+
+
+def test_metrics_count_errors(metrics, bookstore):
+    with pytest.raises(TypeError):
+        bookstore.sell_book('1234', 'two')
+    stats = metrics.as_dict()['Bookstore.sell_book']
+    assert (stats['calls'], stats['errors'], stats['misses']) == (1, 1, 0)
+
+
+def test_metrics_reset_keeps_recording(metrics, bookstore):
+    bookstore.sell_book('1234', 1)
+    metrics.reset()
+    assert metrics.as_dict() == {}
+    bookstore.sell_book('1234', 1)
+    assert metrics.as_dict()['Bookstore.sell_book']['calls'] == 1
+
+
+def test_metrics_dump_json_and_prometheus(metrics, bookstore, tmp_path):
+    bookstore.sell_book('1234', 1)
+    bookstore.best_selling_book()
+    metrics.dump(tmp_path / 'metrics.json')
+    data = json.loads((tmp_path / 'metrics.json').read_text())
+    assert set(data) == {'Bookstore.add_book', 'Bookstore.sell_book', 'Bookstore.best_selling_book'}
+    metrics.dump(tmp_path / 'metrics.prom')
+    text = (tmp_path / 'metrics.prom').read_text()
+    assert 'bookstore_operation_calls_total{operation="Bookstore.sell_book"} 1' in text
+    assert 'bookstore_operation_seconds_bucket{operation="Bookstore.sell_book",le="+Inf"} 1' in text
+    assert 'Bookstore.sell_book' in metrics.summary()
+
+
+def test_metrics_prometheus_groups_samples_by_family(metrics, bookstore):
+    bookstore.sell_book('1234', 1)
+    bookstore.best_selling_book()
+    families, current = [], None
+    for line in metrics.to_prometheus().splitlines():
+        if line.startswith('# HELP '):
+            current = line.split()[2]
+            families.append(current)
+        elif line.startswith('# TYPE '):
+            assert line.split()[2] == current
+        else:
+            # Every sample belongs to the family whose block it is in.
+            name = line.split('{')[0]
+            assert name == current or name in (f'{current}_bucket', f'{current}_sum', f'{current}_count')
+    assert len(families) == len(set(families)) == 4
+
+
+def test_histogram_buckets_bound_their_values():
+    previous = -1
+    for value in [*range(200), 1_000, 12_345, 10**6, 10**9 + 7]:
+        index = Histogram._index(value)
+        bound = Histogram.upper_bound(index)
+        assert value <= bound <= value * 1.125 + 1
+        assert Histogram._index(bound) == index
+        assert index >= previous
+        previous = index
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    for value in range(1, 101):
+        histogram.record(value * 1000)
+    assert histogram.count == 100
+    assert 50_000 <= histogram.percentile(50) <= 50_000 * 1.125
+    assert histogram.percentile(100) == 100_000
+    assert Histogram().percentile(50) == 0
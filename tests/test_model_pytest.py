@@ -1,6 +1,9 @@
-from datetime import datetime
+from datetime import date, datetime, timedelta
+import copy
 import inspect
 import math
+import pickle
+import random
 
 import pytest
 
@@ -11,6 +14,7 @@ module_members = [member[0] for member in inspect.getmembers(bookstore.model)]
 trasaction_defined = 'Transaction' in module_members
 book_defined = 'Book' in module_members
 bookstore_defined = 'Bookstore' in module_members
+ledger_defined = 'TransactionLedger' in module_members
 
 
 if trasaction_defined:
@@ -22,6 +26,12 @@ if book_defined:
 if bookstore_defined:
     from bookstore.model import Bookstore
 
+if ledger_defined:
+    from bookstore.model import TransactionLedger
+
+if 'SortedKeys' in module_members:
+    from bookstore.model import SortedKeys
+
 @pytest.fixture
 def transaction():
     return Transaction(Transaction.SELL, 5)
@@ -294,4 +304,510 @@ def test_class_bookstore_best_selling_book_method_returns_book_with_most_copies_
 @pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
 def test_class_bookstore_best_selling_book_method_returns_none_if_no_books_sold(bookstore_with_books):
     assert bookstore_with_books.best_selling_book() is None
-    
\ No newline at end of file
+    
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_best_selling_book_method_matches_full_scan(bookstore_with_books):
+    bookstore_with_books.add_book('91011', 'Test Book 3', 30.0, 15.0, 30)
+    for isbn, copies in [('5678', 4), ('91011', 7), ('1234', 3), ('5678', 3), ('1234', 2)]:
+        bookstore_with_books.sell_book(isbn, copies)
+        expected = max(bookstore_with_books.catalog.values(), key=lambda book: book.copies_sold())
+        assert bookstore_with_books.best_selling_book() is expected
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_best_selling_book_method_tracks_direct_book_sales(bookstore_with_books):
+    bookstore_with_books.search_by_isbn('1234').sell(2)
+    assert bookstore_with_books.best_selling_book().isbn == '1234'
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_best_selling_book_method_ignores_deleted_books(bookstore_with_books):
+    bookstore_with_books.sell_book('1234', 5)
+    bookstore_with_books.sell_book('5678', 1)
+    bookstore_with_books.delete_book('1234')
+    assert bookstore_with_books.best_selling_book().isbn == '5678'
+    bookstore_with_books.delete_book('5678')
+    assert bookstore_with_books.best_selling_book() is None
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_top_sellers_method_returns_books_by_copies_sold(bookstore_with_books):
+    bookstore_with_books.add_book('91011', 'Test Book 3', 30.0, 15.0, 30)
+    bookstore_with_books.sell_book('91011', 2)
+    bookstore_with_books.sell_book('5678', 6)
+    assert [book.isbn for book in bookstore_with_books.top_sellers(5)] == ['5678', '91011']
+    assert [book.isbn for book in bookstore_with_books.top_sellers(1)] == ['5678']
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_top_sellers_method_stays_exact_under_one_hot_title(empty_bookstore):
+    for i in range(50):
+        empty_bookstore.add_book(str(i), f'Book {i}', 10.0, 5.0, 10_000)
+        empty_bookstore.sell_book(str(i), 50 - i)
+    for _ in range(2000):
+        empty_bookstore.sell_book('25', 1)
+        empty_bookstore.top_sellers(3)
+    assert [book.isbn for book in empty_bookstore.top_sellers(3)] == ['25', '0', '1']
+    assert len(empty_bookstore._best_sellers._heap) < 200
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_top_sellers_method_compacts_stale_entries_across_calls(empty_bookstore):
+    empty_bookstore.add_books((str(i), f'Book {i}', 10.0, 5.0, 100) for i in range(300))
+    for i in range(300):
+        empty_bookstore.sell_book(str(i), 1)
+    for _ in range(40):
+        empty_bookstore.sell_book('0', 1)
+    index = empty_bookstore._best_sellers
+    assert len(index._heap) == 340
+    # Each call walks past the same 40 stale entries; together they pay for a rebuild.
+    for _ in range(10):
+        assert [book.isbn for book in empty_bookstore.top_sellers(3)] == ['0', '1', '2']
+    assert len(index._heap) == 300
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_best_seller_heap_is_sized_by_the_books_that_sold(empty_bookstore):
+    empty_bookstore.add_books((str(i), f'Book {i}', 10.0, 5.0, 1000) for i in range(2000))
+    empty_bookstore.sell_book('7', 1)
+    for _ in range(500):
+        empty_bookstore.sell_book('3', 1)
+        empty_bookstore.delete_book('7')
+        empty_bookstore.add_book('7', 'Book 7', 10.0, 5.0, 1000)
+        empty_bookstore.sell_book('7', 1)
+    # Unsold books neither let the heap grow nor get visited when it is compacted.
+    index = empty_bookstore._best_sellers
+    assert index._selling == 2 and len(index._heap) <= 2 * 2 + 65
+    assert [book.isbn for book in empty_bookstore.top_sellers(3)] == ['3', '7']
+
+
+@pytest.mark.skipif(not book_defined, reason='Book class is not defined')
+def test_class_book_running_totals_follow_sell_and_supply(book_without_transaction):
+    book_without_transaction.supply(4)
+    book_without_transaction.sell(6)
+    book_without_transaction.sell(20)
+    assert book_without_transaction.copies_sold() == 6
+    assert book_without_transaction.copies_supplied() == 4
+    assert book_without_transaction.revenue() == 60.0
+    assert book_without_transaction.cost() == 20.0
+    assert book_without_transaction.gross_margin() == 30.0
+    assert book_without_transaction.counters_match()
+
+
+@pytest.mark.skipif(not book_defined, reason='Book class is not defined')
+def test_class_book_totals_follow_direct_edits_of_transactions(book_with_transaction):
+    # The fixture appends to transactions directly, bypassing sell.
+    assert book_with_transaction.copies_sold() == 5
+    assert book_with_transaction.revenue() == 50.0
+    assert book_with_transaction.counters_match()
+    book_with_transaction.transactions.pop()
+    assert book_with_transaction.copies_sold() == 0
+    book_with_transaction.transactions = [Transaction(Transaction.SUPPLY, 2), Transaction(Transaction.SELL, 1)]
+    assert (book_with_transaction.copies_sold(), book_with_transaction.copies_supplied()) == (1, 2)
+
+
+@pytest.mark.skipif(not book_defined, reason='Book class is not defined')
+def test_class_book_recount_method_rebuilds_totals_from_transactions(book_with_transaction):
+    # Replacing a transaction in place keeps the length, so it needs an explicit recount.
+    book_with_transaction.copies_sold()
+    book_with_transaction.transactions[0] = Transaction(Transaction.SELL, 3)
+    assert not book_with_transaction.counters_match()
+    book_with_transaction.recount()
+    assert book_with_transaction.copies_sold() == 3
+    assert book_with_transaction.revenue() == 30.0
+    assert book_with_transaction.counters_match()
+
+
+@pytest.mark.skipif(not ledger_defined, reason='TransactionLedger class is not defined')
+def test_class_transaction_ledger_yields_transaction_views():
+    date = datetime(2024, 2, 29, 13, 45, 12, 345678)
+    ledger = TransactionLedger([Transaction(Transaction.SUPPLY, 4, date), Transaction(Transaction.SELL, 3)])
+    assert len(ledger) == 2
+    assert isinstance(ledger[0], Transaction)
+    assert (ledger[0].type, ledger[0].copies, ledger[0].date) == (Transaction.SUPPLY, 4, date)
+    assert [t.copies for t in ledger] == [4, 3]
+    assert ledger.total(Transaction.SELL) == 3
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_compact_ledger_keeps_book_behaviour():
+    bookstore = Bookstore(compact_ledger=True)
+    bookstore.add_book('1234', 'Test Book', 10.0, 5.0, 10)
+    bookstore.sell_book('1234', 4)
+    bookstore.supply_book('1234', 2)
+    book = bookstore.search_by_isbn('1234')
+    assert isinstance(book.transactions, TransactionLedger)
+    assert [t.type for t in book.transactions] == [Transaction.SELL, Transaction.SUPPLY]
+    assert book.copies_sold() == 4
+    assert book.counters_match()
+    assert bookstore.best_selling_book() is book
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_add_books_method_inserts_new_and_skips_present_isbns(bookstore_with_books):
+    result = bookstore_with_books.add_books([
+        ('1234', 'Duplicate', 1.0, 1.0, 1),
+        ('91011', 'Test Book 3', 30.0, 15.0, 30),
+        ('91011', 'Repeated', 1.0, 1.0, 1),
+        ('121314', 'Test Book 4', 40.0, 20.0, 40),
+    ])
+    assert (result.inserted, result.skipped) == (2, 2)
+    assert bookstore_with_books.search_by_isbn('1234').title == 'Test Book'
+    assert bookstore_with_books.search_by_isbn('91011').title == 'Test Book 3'
+    bookstore_with_books.sell_book('121314', 3)
+    assert bookstore_with_books.best_selling_book().isbn == '121314'
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_sell_many_method_merges_lines_per_isbn(bookstore_with_books):
+    results = bookstore_with_books.sell_many([('1234', 4), ('5678', 5), ('1234', 7), ('0000', 1), ('1234', 6)])
+    assert results == [True, True, False, False, True]
+    book = bookstore_with_books.search_by_isbn('1234')
+    assert book.quantity == 0
+    assert [t.copies for t in book.transactions] == [10]
+    assert bookstore_with_books.search_by_isbn('5678').quantity == 15
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_sell_many_method_atomic_leaves_books_untouched_on_failure(bookstore_with_books):
+    results = bookstore_with_books.sell_many([('1234', 4), ('5678', 21)], atomic=True)
+    assert results == [True, False]
+    for isbn, quantity in [('1234', 10), ('5678', 20)]:
+        book = bookstore_with_books.search_by_isbn(isbn)
+        assert book.quantity == quantity
+        assert book.transactions == []
+    assert bookstore_with_books.sell_many([('1234', 4), ('5678', 20)], atomic=True) == [True, True]
+    assert bookstore_with_books.search_by_isbn('5678').quantity == 0
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_supply_many_method_supplies_known_isbns(bookstore_with_books):
+    assert bookstore_with_books.supply_many([('1234', 2), ('0000', 3)], atomic=True) == [True, False]
+    assert bookstore_with_books.search_by_isbn('1234').quantity == 10
+    assert bookstore_with_books.supply_many([('1234', 2), ('0000', 3), ('1234', 1)]) == [True, False, True]
+    assert bookstore_with_books.search_by_isbn('1234').quantity == 13
+
+
+@pytest.fixture
+def bookstore_with_titles():
+    bookstore = Bookstore()
+    bookstore.add_books([
+        ('1', 'The Pragmatic Programmer', 10.0, 5.0, 1),
+        ('2', 'Programming Pearls', 10.0, 5.0, 1),
+        ('3', 'Cien años de soledad', 10.0, 5.0, 1),
+        ('4', 'The C Programming Language', 10.0, 5.0, 1),
+    ])
+    return bookstore
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_search_by_title_method_matches_every_word(bookstore_with_titles):
+    assert [book.isbn for book in bookstore_with_titles.search_by_title('programming')] == ['2', '4']
+    assert [book.isbn for book in bookstore_with_titles.search_by_title('THE language')] == ['4']
+    assert [book.isbn for book in bookstore_with_titles.search_by_title('anos')] == ['3']
+    assert bookstore_with_titles.search_by_title('missing words') == []
+    assert len(bookstore_with_titles.search_by_title('the', limit=1)) == 1
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_search_by_title_prefix_method_follows_catalog_changes(bookstore_with_titles):
+    assert [book.isbn for book in bookstore_with_titles.search_by_title_prefix('the ')] == ['4', '1']
+    bookstore_with_titles.delete_book('4')
+    bookstore_with_titles.add_book('5', 'The Art of Computer Programming', 10.0, 5.0, 1)
+    assert [book.isbn for book in bookstore_with_titles.search_by_title_prefix('The')] == ['5', '1']
+    assert bookstore_with_titles.search_by_title('language') == []
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_search_by_title_method_orders_common_words_by_title(empty_bookstore):
+    empty_bookstore.add_books((str(i), f'The {"Odd" if i % 2 else "Even"} Book {999 - i:03d}', 10.0, 5.0, 1)
+                              for i in range(300))
+    for i in range(0, 300, 7):
+        empty_bookstore.delete_book(str(i))
+    for i in range(0, 300, 21):
+        empty_bookstore.add_book(str(i), f'The Even Book {999 - i:03d}', 10.0, 5.0, 1)
+    empty_bookstore.add_book('new', 'The Even Book 000', 10.0, 5.0, 1)
+
+    def expected(*words, limit):
+        books = [book for book in empty_bookstore.catalog.values()
+                 if all(word in book.title.lower().split() for word in words)]
+        return [book.isbn for book in sorted(books, key=lambda book: (book.title.lower(), book.isbn))][:limit]
+
+    # 'the' and 'book' match every title and are searched by walking the titles in
+    # order; 'odd' matches half of them.
+    assert [book.isbn for book in empty_bookstore.search_by_title('the', limit=5)] == expected('the', limit=5)
+    assert [book.isbn for book in empty_bookstore.search_by_title('even book', limit=4)] == expected('even', 'book', limit=4)
+    assert [book.isbn for book in empty_bookstore.search_by_title('odd', limit=300)] == expected('odd', limit=300)
+    assert [book.isbn for book in empty_bookstore.search_by_title_prefix('the even book', limit=2)] == ['new', '298']
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_delete_book_method_handles_repeated_title_words(bookstore_with_titles):
+    bookstore_with_titles.add_book('5', 'New York, New York', 10.0, 5.0, 1)
+    assert bookstore_with_titles.delete_book('5')
+    assert bookstore_with_titles.search_by_title('new york') == []
+
+
+@pytest.fixture
+def bookstore_with_dated_sales(bookstore_with_books):
+    bookstore_with_books.add_book('91011', 'Test Book 3', 30.0, 15.0, 30)
+    for isbn, copies, day in [('1234', 4, date(2024, 3, 4)), ('5678', 2, date(2024, 3, 5)),
+                              ('5678', 3, date(2024, 3, 11)), ('91011', 1, date(2024, 3, 12)),
+                              ('1234', 1, date(2024, 3, 12)), ('91011', 5, date(2024, 2, 1))]:
+        book = bookstore_with_books.search_by_isbn(isbn)
+        book.replay(Transaction(Transaction.SELL, copies, datetime.combine(day, datetime.min.time())))
+    bookstore_with_books.search_by_isbn('1234').replay(Transaction(Transaction.SUPPLY, 6, datetime(2024, 3, 5, 9)))
+    return bookstore_with_books
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_best_selling_book_between_method_uses_window(bookstore_with_dated_sales):
+    assert bookstore_with_dated_sales.best_selling_book().isbn == '91011'
+    assert bookstore_with_dated_sales.best_selling_book_between(since=date(2024, 3, 1)).isbn == '1234'
+    assert bookstore_with_dated_sales.best_selling_book_between(date(2024, 3, 5), datetime(2024, 3, 12, 18)).isbn == '5678'
+    assert bookstore_with_dated_sales.best_selling_book_between(until=date(2024, 1, 31)) is None
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_top_sellers_by_week_method_groups_by_monday(bookstore_with_dated_sales):
+    weeks = bookstore_with_dated_sales.top_sellers_by_week(2, since=date(2024, 3, 1))
+    assert {week: [book.isbn for book in books] for week, books in weeks.items()} == {
+        date(2024, 3, 4): ['1234', '5678'],
+        date(2024, 3, 11): ['5678', '1234'],
+    }
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_daily_sales_method_returns_dense_series(bookstore_with_dated_sales):
+    assert bookstore_with_dated_sales.daily_sales('1234', date(2024, 3, 4), date(2024, 3, 6)) == [
+        (date(2024, 3, 4), 4, 0), (date(2024, 3, 5), 0, 6), (date(2024, 3, 6), 0, 0)]
+    bookstore_with_dated_sales.delete_book('1234')
+    assert bookstore_with_dated_sales.daily_sales('1234') == []
+    assert bookstore_with_dated_sales.best_selling_book_between(date(2024, 3, 4), date(2024, 3, 4)) is None
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_daily_sales_method_indexes_only_the_book_asked_for():
+    bookstore = Bookstore()
+    for isbn in ('1', '2'):
+        book = Book(isbn, f'Book {isbn}', 10.0, 5.0, 10)
+        book.transactions.append(Transaction(Transaction.SELL, int(isbn), datetime(2024, 3, 4)))
+        book.recount()
+        bookstore.insert_book(book)
+    timeline = bookstore._timeline
+    assert bookstore.daily_sales('1') == [(date(2024, 3, 4), 1, 0)]
+    assert set(timeline._pending) == {'2'}
+    assert [book.isbn for book in bookstore.top_sellers_between(2, date(2024, 3, 4))] == ['2', '1']
+    assert not timeline._pending
+
+
+@pytest.fixture
+def bookstore_with_ranked_sales():
+    bookstore = Bookstore()
+    bookstore.add_books((str(i), f'Book {i}', 10.0, 5.0, 100) for i in range(6))
+    for isbn, copies in [('3', 5), ('1', 2), ('4', 5), ('0', 2), ('5', 9), ('1', 3)]:
+        bookstore.sell_book(isbn, copies)
+    return bookstore
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_top_sellers_method_breaks_ties_by_catalog_order(bookstore_with_ranked_sales):
+    assert [book.isbn for book in bookstore_with_ranked_sales.top_sellers(10)] == ['5', '1', '3', '4', '0']
+    assert [book.isbn for book in bookstore_with_ranked_sales.top_sellers(3)] == ['5', '1', '3']
+    assert bookstore_with_ranked_sales.top_sellers(0) == []
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_rank_of_method_matches_top_sellers(bookstore_with_ranked_sales):
+    ranking = bookstore_with_ranked_sales.top_sellers(10)
+    assert [bookstore_with_ranked_sales.rank_of(book.isbn) for book in ranking] == [1, 2, 3, 4, 5]
+    assert bookstore_with_ranked_sales.rank_of('2') is None
+    assert bookstore_with_ranked_sales.rank_of('missing') is None
+    bookstore_with_ranked_sales.delete_book('5')
+    assert bookstore_with_ranked_sales.rank_of('1') == 1
+    assert bookstore_with_ranked_sales.best_selling_book().isbn == '1'
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_rank_of_method_follows_sales_and_deletions(empty_bookstore, monkeypatch):
+    monkeypatch.setattr(SortedKeys, 'LOAD', 4)
+    rng = random.Random(7)
+    empty_bookstore.add_books((str(i), f'Book {i}', 10.0, 5.0, 1000) for i in range(60))
+    empty_bookstore.sell_book('0', 1)
+    # The first rank_of builds the ranking; the sales below then keep it up to date.
+    assert empty_bookstore.rank_of('0') == 1
+    for step in range(600):
+        isbn = str(rng.randrange(60))
+        if step % 50 == 49:
+            empty_bookstore.delete_book(isbn)
+            empty_bookstore.add_book(isbn, f'Book {isbn}', 10.0, 5.0, 1000)
+        empty_bookstore.sell_book(isbn, rng.randint(1, 3))
+    ranking = [book.isbn for book in empty_bookstore.top_sellers(60)]
+    assert [empty_bookstore.rank_of(isbn) for isbn in ranking] == list(range(1, len(ranking) + 1))
+
+
+@pytest.mark.skipif('SortedKeys' not in module_members, reason='SortedKeys class is not defined')
+def test_class_sorted_keys_ranks_like_a_sorted_list(monkeypatch):
+    monkeypatch.setattr(SortedKeys, 'LOAD', 2)
+    rng = random.Random(3)
+    keys, expected = SortedKeys(), []
+    for _ in range(500):
+        key = rng.randrange(-400, 0)
+        if key in expected and rng.random() < 0.5:
+            keys.remove(key)
+            expected.remove(key)
+        elif key in expected:
+            moved = rng.randrange(-800, -400)
+            if moved not in expected:
+                keys.move(key, moved)
+                expected[expected.index(key)] = moved
+        else:
+            keys.add(key)
+            expected.append(key)
+        expected.sort()
+        probe = rng.randrange(-801, 1)
+        assert keys.rank(probe) == sum(other < probe for other in expected)
+    assert len(keys) == len(expected)
+    with pytest.raises(KeyError):
+        keys.remove(1)
+    loaded = SortedKeys(expected)
+    assert [loaded.rank(key) for key in expected] == list(range(len(expected)))
+
+
+@pytest.mark.skipif(not book_defined, reason='Book class is not defined')
+def test_class_book_compact_method_rolls_up_old_transactions(book_without_transaction):
+    for hour in (9, 12, 18):
+        book_without_transaction.replay(Transaction(Transaction.SELL, 1, datetime(2024, 3, 4, hour)))
+    book_without_transaction.replay(Transaction(Transaction.SUPPLY, 5, datetime(2024, 3, 4, 10)))
+    book_without_transaction.replay(Transaction(Transaction.SELL, 2, datetime(2024, 3, 5, 8)))
+    book_without_transaction.replay(Transaction(Transaction.SELL, 1, datetime(2024, 3, 6, 8)))
+    assert book_without_transaction.compact(datetime(2024, 3, 6)) == 2
+    assert [(t.type, t.copies, t.date) for t in book_without_transaction.transactions] == [
+        (Transaction.SELL, 3, datetime(2024, 3, 4)), (Transaction.SUPPLY, 5, datetime(2024, 3, 4)),
+        (Transaction.SELL, 2, datetime(2024, 3, 5)), (Transaction.SELL, 1, datetime(2024, 3, 6, 8))]
+    assert book_without_transaction.counters_match()
+    assert book_without_transaction.compact(datetime(2024, 3, 6)) == 0
+    assert book_without_transaction.compact(datetime(2024, 4, 1), 'month') == 2
+    assert len(book_without_transaction.transactions) == 2
+    assert book_without_transaction.copies_sold() == 6
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+@pytest.mark.parametrize('compact_ledger', [False, True])
+def test_class_bookstore_compact_history_method_keeps_query_results(bookstore_with_dated_sales, compact_ledger):
+    bookstore = Bookstore(compact_ledger)
+    for book in bookstore_with_dated_sales.catalog.values():
+        bookstore.add_book(book.isbn, book.title, book.sale_price, book.purchase_price, 100)
+        for transaction in book.transactions:
+            bookstore.search_by_isbn(book.isbn).replay(transaction)
+    bookstore.search_by_isbn('1234').replay(Transaction(Transaction.SELL, 2, datetime(2024, 3, 4, 17)))
+
+    def answers():
+        return ([book.copies_sold() for book in bookstore.catalog.values()],
+                [book.isbn for book in bookstore.top_sellers(3)],
+                [book.isbn for book in bookstore.top_sellers_between(3, date(2024, 3, 4), date(2024, 3, 5))],
+                bookstore.daily_sales('1234'))
+
+    expected = answers()
+    result = bookstore.compact_history(datetime(2024, 3, 11, 15))
+    assert result.books == 1 and result.transactions == 1
+    if not compact_ledger:
+        assert result.bytes_reclaimed > 0
+    assert answers() == expected
+    assert bookstore.compact_history(datetime(2024, 3, 11, 15)).transactions == 0
+    assert all(book.counters_match() for book in bookstore.catalog.values())
+    with pytest.raises(ValueError):
+        bookstore.compact_history(datetime(2024, 3, 11), 'week')
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_iter_compact_history_method_works_in_batches(bookstore_with_ranked_sales):
+    steps = list(bookstore_with_ranked_sales.iter_compact_history(timedelta(0), batch=4))
+    assert len(steps) == 2
+    # Everything was sold today and the cutoff is moved back to the start of the day.
+    assert sum(step.transactions for step in steps) == 0
+    steps = list(bookstore_with_ranked_sales.iter_compact_history(datetime.now() + timedelta(days=1), batch=4))
+    # '1' sold twice, which is folded into one summary.
+    assert [step.transactions for step in steps] == [1, 0]
+    assert bookstore_with_ranked_sales.search_by_isbn('1').copies_sold() == 5
+    assert bookstore_with_ranked_sales.rank_of('1') == 2
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_snapshot_method_keeps_point_in_time_state(bookstore_with_ranked_sales):
+    bookstore = bookstore_with_ranked_sales
+    with bookstore.snapshot() as snapshot:
+        bookstore.sell_book('3', 10)
+        bookstore.supply_book('0', 7)
+        bookstore.sell_many([('2', 1), ('4', 1)])
+        bookstore.delete_book('5')
+        bookstore.add_book('6', 'Book 6', 10.0, 5.0, 100)
+        assert list(snapshot) == ['0', '1', '2', '3', '4', '5']
+        assert len(snapshot) == 6 and '6' not in snapshot
+        assert snapshot.search_by_isbn('3').quantity == 95
+        assert snapshot.search_by_isbn('3').copies_sold() == 5
+        assert len(snapshot.search_by_isbn('3').transactions) == 1
+        assert snapshot.search_by_isbn('0').quantity == 98
+        assert snapshot.search_by_isbn('2').copies_sold() == 0
+        assert snapshot.search_by_isbn('6') is None
+        assert [book.isbn for book in snapshot.top_sellers(10)] == ['5', '1', '3', '4', '0']
+        assert snapshot.best_selling_book().isbn == '5'
+        assert [book.isbn for book in bookstore.top_sellers(2)] == ['3', '4']
+    assert bookstore.search_by_isbn('3').quantity == 85
+    assert bookstore._snapshots == []
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_snapshot_method_can_be_iterated_during_changes(bookstore_with_ranked_sales):
+    bookstore = bookstore_with_ranked_sales
+    snapshot = bookstore.snapshot()
+    seen = []
+    for book in snapshot.books():
+        bookstore.delete_book(book.isbn)
+        bookstore.add_book(book.isbn + 'x', 'Copy', 10.0, 5.0, 1)
+        seen.append((book.isbn, book.quantity))
+    assert seen == [('0', 98), ('1', 95), ('2', 100), ('3', 95), ('4', 95), ('5', 91)]
+    assert len(bookstore.catalog) == 6
+    snapshot.close()
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_snapshot_books_are_read_only(bookstore_with_books):
+    snapshot = bookstore_with_books.snapshot()
+    book = snapshot.search_by_isbn('1234')
+    with pytest.raises(TypeError):
+        book.sell(1)
+    with pytest.raises(AttributeError):
+        book.transactions = []
+    assert str(book) == str(bookstore_with_books.search_by_isbn('1234'))
+    assert book.counters_match()
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_snapshot_books_copy_and_pickle(bookstore_with_books):
+    bookstore_with_books.sell_book('1234', 2)
+    with bookstore_with_books.snapshot() as snapshot:
+        bookstore_with_books.sell_book('1234', 1)
+        frozen = snapshot.search_by_isbn('1234')
+        for copied in (copy.copy(frozen), copy.deepcopy(frozen), pickle.loads(pickle.dumps(frozen))):
+            assert type(copied) is type(frozen)
+            assert str(copied) == str(frozen) and copied.copies_sold() == 2
+            assert [(t.type, t.copies, t.date) for t in copied.transactions] == \
+                [(t.type, t.copies, t.date) for t in frozen.transactions]
+            assert len(copied.transactions) == 1
+            with pytest.raises(TypeError):
+                copied.sell(1)
+
+
+@pytest.mark.skipif(not bookstore_defined, reason='Bookstore class is not defined')
+def test_class_bookstore_snapshot_method_costs_nothing_once_released(bookstore_with_books):
+    catalog = bookstore_with_books.catalog
+    snapshot = bookstore_with_books.snapshot()
+    del snapshot
+    bookstore_with_books.add_book('91011', 'Test Book 3', 30.0, 15.0, 30)
+    assert bookstore_with_books.catalog is catalog
+    with bookstore_with_books.snapshot() as snapshot:
+        bookstore_with_books.add_book('1213', 'Test Book 4', 30.0, 15.0, 30)
+        assert bookstore_with_books.catalog is not catalog
+        assert '1213' not in snapshot
@@ -111,10 +111,11 @@ class TestModel(unittest.TestCase):
     def test_class_book_copies_sold_method_returns_total_copies_sold(self):
         for copies_supplied, copies_sold in [(5, (1, 2, 3)), (8, (2, 1)), (1, (1,))]:
             with self.subTest(copies_supplied=copies_supplied, copies_sold=copies_sold):
-                self.book_without_transaction.supply(copies_supplied)
+                book = Book('1234', 'Test Book', 10.0, 5.0, 10)
+                book.supply(copies_supplied)
                 for copies in copies_sold:
-                    self.book_without_transaction.sell(copies)
-                self.assertEqual(self.book_without_transaction.copies_sold(), sum(copies_sold))
+                    book.sell(copies)
+                self.assertEqual(book.copies_sold(), sum(copies_sold))
 
     @unittest.skipUnless(book_defined, 'Book class is not defined')
     def test_class_book_str_method_returns_string_representation(self):
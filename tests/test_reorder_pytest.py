@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from bookstore.model import Bookstore, Transaction
+from bookstore.reorder import ReorderEngine
+
+
+@pytest.fixture
+def bookstore():
+    bookstore = Bookstore()
+    bookstore.add_book('1234', 'Test Book', 10.0, 5.0, 10)
+    bookstore.add_book('5678', 'Test Book 2', 20.0, 10.0, 20)
+    return bookstore
+
+
+def test_reorder_engine_alerts_once_when_stock_drops_below_threshold(bookstore):
+    engine = ReorderEngine()
+    bookstore.add_observer(engine)
+    received = []
+    engine.subscribe(received.append)
+    engine.set_threshold('1234', 5)
+
+    bookstore.sell_book('1234', 4)
+    assert received == []
+    bookstore.sell_book('1234', 2)
+    bookstore.sell_book('1234', 1)
+    bookstore.sell_book('5678', 19)
+    assert [(alert.isbn, alert.quantity, alert.threshold) for alert in received] == [('1234', 4, 5)]
+
+    bookstore.supply_book('1234', 3)
+    bookstore.sell_book('1234', 4)
+    assert [alert.quantity for alert in engine.drain_alerts()] == [4, 2]
+    assert engine.alerts == []
+
+
+def test_reorder_engine_default_threshold_and_threshold_changes(bookstore):
+    engine = ReorderEngine(default_threshold=15)
+    bookstore.add_observer(engine)
+    assert [alert.isbn for alert in engine.drain_alerts()] == ['1234']
+    engine.set_threshold('5678', 25)
+    assert [alert.isbn for alert in engine.drain_alerts()] == ['5678']
+    bookstore.delete_book('5678')
+    assert engine.suggest('5678') == 0
+
+
+def test_reorder_engine_velocity_follows_dated_sales(bookstore):
+    engine = ReorderEngine(cover_days=10, half_life_days=7)
+    bookstore.add_observer(engine)
+    book = bookstore.search_by_isbn('5678')
+    start = datetime(2024, 1, 1)
+    for day in range(120):
+        book.replay(Transaction(Transaction.SUPPLY, 2, start + timedelta(days=day)))
+        book.replay(Transaction(Transaction.SELL, 2, start + timedelta(days=day)))
+    last = start + timedelta(days=119)
+    assert engine.velocity('5678', last) == pytest.approx(2.0, rel=0.1)
+    assert engine.velocity('5678', last + timedelta(days=7)) == pytest.approx(engine.velocity('5678', last) / 2)
+    engine.set_threshold('5678', 5)
+    assert engine.suggest('5678', last) == pytest.approx(20 + 5 - 20, abs=2)
+    assert engine.velocity('1234') == 0.0
@@ -0,0 +1,75 @@
+import csv
+import io
+
+import pytest
+
+from bookstore import reports
+from bookstore.model import Bookstore
+from bookstore.reports import COLUMNS, InventoryReport
+
+
+@pytest.fixture(params=['numpy', 'lists'])
+def backend(request, monkeypatch):
+    # Runs each test on NumPy arrays (when installed) and on the pure-Python lists.
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(reports, 'numpy', None)
+    return request.param
+
+
+@pytest.fixture
+def report(backend):
+    bookstore = Bookstore()
+    bookstore.add_book('1234', 'Test Book', 10.0, 5.0, 10)
+    bookstore.add_book('5678', 'Test Book 2', 20.0, 10.0, 20)
+    bookstore.add_book('91011', 'Test Book 3', 30.0, 15.0, 0)
+    bookstore.sell_book('1234', 6)
+    bookstore.supply_book('1234', 2)
+    bookstore.sell_book('5678', 1)
+    return InventoryReport.from_bookstore(bookstore, slow_mover_threshold=0.1)
+
+
+def test_inventory_report_columns(report):
+    rows = {row[0]: dict(zip(COLUMNS, row)) for row in report.rows()}
+    first = rows['1234']
+    assert (first['quantity'], first['copies_sold'], first['copies_supplied']) == (6, 6, 2)
+    assert (first['stock_value'], first['retail_value'], first['revenue']) == (30.0, 60.0, 60.0)
+    assert first['gross_margin'] == 30.0
+    assert first['margin_rate'] == 0.5
+    assert first['sell_through'] == 0.5
+    assert rows['5678']['slow_mover']
+    assert not rows['91011']['slow_mover']
+    assert rows['91011']['sell_through'] == 0.0
+
+
+def test_inventory_report_totals_and_slow_movers(report):
+    assert report.totals() == {'titles': 3, 'stock_value': 220.0, 'retail_value': 440.0, 'revenue': 80.0,
+                               'gross_margin': 40.0, 'slow_movers': 1}
+    assert report.slow_movers() == ['5678']
+
+
+def test_inventory_report_orders_slow_movers_by_sell_through_then_isbn(backend):
+    bookstore = Bookstore()
+    for isbn, sold in (('5', 1), ('3', 0), ('4', 1), ('1', 5), ('2', 0)):
+        bookstore.add_book(isbn, f'Book {isbn}', 10.0, 5.0, 20)
+        bookstore.sell_book(isbn, sold)
+    report = InventoryReport.from_bookstore(bookstore, slow_mover_threshold=0.1)
+    assert isinstance(report.sell_through, list) == (backend == 'lists')
+    assert report.slow_movers() == ['2', '3', '4', '5']
+    assert report.slow_movers(limit=3) == ['2', '3', '4']
+    assert report.totals()['slow_movers'] == 4
+    assert InventoryReport([]).slow_movers() == []
+    assert InventoryReport([]).totals()['stock_value'] == 0.0
+
+
+def test_inventory_report_writes_csv(report, tmp_path):
+    path = tmp_path / 'report.csv'
+    report.write_csv(path)
+    with open(path, newline='', encoding='utf-8') as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == list(COLUMNS)
+    assert [row[0] for row in rows[1:]] == ['1234', '5678', '91011']
+    buffer = io.StringIO()
+    report.write_csv(buffer)
+    assert buffer.getvalue().replace('\r\n', '\n') == path.read_text(encoding='utf-8').replace('\r\n', '\n')
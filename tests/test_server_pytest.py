@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+from bookstore.server import BookstoreServer
+
+
+async def exchange(requests: list, raw: bytes = b'') -> list[dict]:
+    server = BookstoreServer()
+    await server.start(port=0)
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        # Every request is written before any response is read.
+        writer.write(b''.join(json.dumps(request).encode() + b'\n' for request in requests) + raw)
+        await writer.drain()
+        expected = len(requests) + raw.count(b'\n')
+        responses = [json.loads(await reader.readline()) for _ in range(expected)]
+        writer.close()
+        await writer.wait_closed()
+        return responses
+    finally:
+        await server.close()
+
+
+def test_server_answers_pipelined_requests_in_order():
+    responses = asyncio.run(exchange([
+        {'id': 1, 'op': 'add_book', 'args': ['1234', 'Test Book', 10.0, 5.0, 10]},
+        {'id': 2, 'op': 'sell_book', 'args': ['1234', 4]},
+        {'id': 3, 'op': 'sell_book', 'args': ['1234', 7]},
+        {'id': 4, 'op': 'supply_book', 'args': ['0000', 1]},
+        {'id': 5, 'op': 'best_selling_book'},
+        {'id': 6, 'op': 'delete_book', 'args': ['1234']},
+        {'id': 7, 'op': 'search_by_isbn', 'args': ['1234']},
+    ]))
+    assert [response['id'] for response in responses] == [1, 2, 3, 4, 5, 6, 7]
+    assert [response['result'] for response in responses[1:4]] == [True, False, False]
+    assert responses[4]['result'] == {'isbn': '1234', 'title': 'Test Book', 'sale_price': 10.0,
+                                      'purchase_price': 5.0, 'quantity': 6}
+    assert responses[5]['result'] is True
+    assert responses[6]['result'] is None
+
+
+def test_server_reports_bad_requests_and_keeps_serving():
+    responses = asyncio.run(exchange([
+        {'id': 1, 'op': 'catalog'},
+        {'id': 2, 'op': 'sell_book', 'args': ['1234']},
+        {'id': 3, 'op': 'best_selling_book'},
+    ], raw=b'not json\n'))
+    assert responses[0]['error'] == 'unknown operation: catalog'
+    assert 'error' in responses[1]
+    assert responses[2] == {'id': 3, 'result': None}
+    assert responses[3] == {'id': None, 'error': 'malformed request'}
+
+
+def test_server_rejects_arguments_of_the_wrong_type():
+    server = BookstoreServer()
+    responses = [server.handle(request) for request in (
+        {'id': 1, 'op': 'add_book', 'args': ['1234', 'Test Book', '9.5', 5.0, 10]},
+        {'id': 2, 'op': 'add_book', 'args': ['1234', 'Test Book', 10, 5.0, 10]},
+        {'id': 3, 'op': 'sell_book', 'args': ['1234', 2.0]},
+        {'id': 4, 'op': 'sell_book', 'args': [1234, 2]},
+        {'id': 5, 'op': 'supply_book', 'args': ['1234', True]},
+        {'id': 6, 'op': 'sell_book', 'args': {'isbn': '1234'}},
+        {'id': 7, 'op': 'sell_book', 'args': ['1234', 2]},
+    )]
+    assert responses[0]['error'] == 'add_book argument 3 must be float, not str'
+    assert responses[1] == {'id': 2, 'result': None}
+    assert all('error' in response for response in responses[2:6])
+    assert responses[6] == {'id': 7, 'result': True}
+    book = server.bookstore.search_by_isbn('1234')
+    assert (book.sale_price, book.quantity, book.copies_sold()) == (10.0, 8, 2)
+    assert server.bookstore.best_selling_book() is book
@@ -0,0 +1,79 @@
+import pytest
+
+from bookstore.model import Bookstore
+from bookstore.sharding import ShardedBookstore
+
+
+@pytest.fixture(scope='module')
+def shards():
+    with ShardedBookstore(shards=3) as bookstore:
+        yield bookstore
+
+
+@pytest.fixture
+def sharded(shards):
+    isbns = [str(1000 + i) for i in range(12)]
+    for isbn in isbns:
+        shards.delete_book(isbn)
+    shards.add_books((isbn, f'Book {isbn}', 10.0, 5.0, 10) for isbn in isbns)
+    return shards
+
+
+def test_sharded_bookstore_spreads_books_over_shards(sharded):
+    assert len({sharded.shard_of(str(1000 + i)) for i in range(12)}) == 3
+
+
+def test_sharded_bookstore_point_operations(sharded):
+    assert sharded.sell_book('1003', 4)
+    assert not sharded.sell_book('1003', 7)
+    assert sharded.supply_book('1003', 1)
+    assert not sharded.supply_book('0000', 1)
+    book = sharded.search_by_isbn('1003')
+    assert (book.quantity, book.copies_sold()) == (7, 4)
+    assert sharded.delete_book('1003')
+    assert sharded.search_by_isbn('1003') is None
+    sharded.add_book('1003', 'Again', 1.0, 1.0, 1)
+    sharded.add_book('1003', 'Ignored', 1.0, 1.0, 1)
+    assert sharded.search_by_isbn('1003').title == 'Again'
+
+
+def test_sharded_bookstore_best_sellers_match_single_bookstore(sharded):
+    single = Bookstore()
+    single.add_books((str(1000 + i), f'Book {1000 + i}', 10.0, 5.0, 10) for i in range(12))
+    assert sharded.best_selling_book() is None
+    sales = [('1005', 3), ('1001', 3), ('1010', 2), ('1007', 3), ('1002', 1)]
+    for isbn, copies in sales:
+        sharded.sell_book(isbn, copies)
+        single.sell_book(isbn, copies)
+    assert sharded.best_selling_book().isbn == single.best_selling_book().isbn == '1001'
+    assert [b.isbn for b in sharded.top_sellers(4)] == [b.isbn for b in single.top_sellers(4)]
+    for isbn in ('1001', '1005', '1007', '1010', '1002', '1003'):
+        assert sharded.rank_of(isbn) == single.rank_of(isbn)
+
+
+def test_sharded_bookstore_ranks_readded_books_by_their_new_order(sharded):
+    single = Bookstore()
+    single.add_books((str(1000 + i), f'Book {1000 + i}', 10.0, 5.0, 10) for i in range(12))
+    for store in (sharded, single):
+        store.delete_book('1001')
+        store.add_book('1001', 'Book 1001', 10.0, 5.0, 10)
+        for isbn in ('1001', '1004', '1009', '1000'):
+            store.sell_book(isbn, 2)
+        store.sell_book('1006', 1)
+    assert [b.isbn for b in sharded.top_sellers(5)] == [b.isbn for b in single.top_sellers(5)]
+    for isbn in ('1000', '1001', '1004', '1006', '1009', '1011'):
+        assert sharded.rank_of(isbn) == single.rank_of(isbn)
+    # Only the winners come back, as full books.
+    best = sharded.top_sellers(1)[0]
+    assert (best.isbn, best.copies_sold(), len(best.transactions)) == ('1000', 2, 1)
+
+
+def test_sharded_bookstore_batches_keep_line_order_and_atomicity(sharded):
+    lines = [('1000', 2), ('1001', 11), ('1002', 3), ('0000', 1)]
+    assert sharded.sell_many(lines) == [True, False, True, False]
+    assert sharded.sell_many([('1000', 1), ('1004', 11)], atomic=True) == [True, False]
+    assert sharded.search_by_isbn('1000').quantity == 8
+    assert sharded.sell_many([('1000', 1), ('1004', 10)], atomic=True) == [True, True]
+    assert sharded.search_by_isbn('1004').quantity == 0
+    assert sharded.supply_many([('1004', 2), ('1006', 1)]) == [True, True]
+    assert sharded.search_by_isbn('1004').quantity == 2
@@ -0,0 +1,68 @@
+import inspect
+
+import pytest
+
+from bookstore.model import Bookstore
+from bookstore.sqlite_store import SQLiteBookstore
+
+
+@pytest.fixture(params=[Bookstore, SQLiteBookstore])
+def bookstore_with_books(request):
+    bookstore = request.param()
+    bookstore.add_book('1234', 'Test Book', 10.0, 5.0, 10)
+    bookstore.add_book('5678', 'Test Book 2', 20.0, 10.0, 20)
+    return bookstore
+
+
+@pytest.mark.parametrize('method_name', [
+    'add_book', 'delete_book', 'search_by_isbn', 'sell_book', 'supply_book', 'best_selling_book'
+])
+def test_sqlite_bookstore_has_bookstore_signatures(method_name):
+    expected = inspect.signature(getattr(Bookstore(), method_name))
+    assert inspect.signature(getattr(SQLiteBookstore(), method_name)) == expected
+
+
+def test_add_book_keeps_first_book_for_an_isbn(bookstore_with_books):
+    bookstore_with_books.add_book('1234', 'Other', 1.0, 1.0, 1)
+    assert bookstore_with_books.search_by_isbn('1234').title == 'Test Book'
+
+
+def test_sell_and_supply_book_update_quantity_and_history(bookstore_with_books):
+    assert not bookstore_with_books.sell_book('1234', 11)
+    assert not bookstore_with_books.sell_book('0000', 1)
+    assert not bookstore_with_books.supply_book('0000', 1)
+    assert bookstore_with_books.sell_book('1234', 4)
+    assert bookstore_with_books.supply_book('1234', 2)
+    book = bookstore_with_books.search_by_isbn('1234')
+    assert book.quantity == 8
+    assert [(t.type, t.copies) for t in book.transactions] == [(1, 4), (2, 2)]
+    assert book.copies_sold() == 4
+
+
+def test_best_selling_book_and_ties(bookstore_with_books):
+    assert bookstore_with_books.best_selling_book() is None
+    bookstore_with_books.sell_book('5678', 3)
+    bookstore_with_books.sell_book('1234', 3)
+    assert bookstore_with_books.best_selling_book().isbn == '1234'
+    bookstore_with_books.sell_book('5678', 1)
+    assert [book.isbn for book in bookstore_with_books.top_sellers(2)] == ['5678', '1234']
+    assert [bookstore_with_books.rank_of(isbn) for isbn in ('5678', '1234', '0000')] == [1, 2, None]
+
+
+def test_delete_book_removes_book_and_its_sales(bookstore_with_books):
+    bookstore_with_books.sell_book('1234', 3)
+    assert bookstore_with_books.delete_book('1234')
+    assert not bookstore_with_books.delete_book('1234')
+    assert bookstore_with_books.search_by_isbn('1234') is None
+    assert bookstore_with_books.best_selling_book() is None
+
+
+def test_sqlite_bookstore_persists_to_file(tmp_path):
+    path = tmp_path / 'bookstore.db'
+    bookstore = SQLiteBookstore(path)
+    bookstore.add_book('1234', 'Test Book', 10.0, 5.0, 10)
+    bookstore.sell_book('1234', 2)
+    bookstore.close()
+    reopened = SQLiteBookstore(path)
+    assert reopened.copies_sold('1234') == 2
+    assert reopened.search_by_isbn('1234').quantity == 8
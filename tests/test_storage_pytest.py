@@ -0,0 +1,143 @@
+import shutil
+import threading
+
+import pytest
+
+from bookstore.archive import ArchivedHistory
+from bookstore.model import Bookstore, TransactionLedger
+from bookstore.storage import FileStorage, Storage
+
+
+def fill(bookstore):
+    bookstore.add_book('1234', 'Test Book', 10.0, 5.0, 10)
+    bookstore.add_book('5678', 'Test Book 2', 20.0, 10.0, 20)
+    bookstore.add_book('91011', 'Test Book 3', 30.0, 15.0, 30)
+    bookstore.sell_book('1234', 4)
+    bookstore.supply_book('5678', 5)
+    bookstore.sell_book('5678', 12)
+    bookstore.delete_book('91011')
+
+
+def state(bookstore):
+    return {isbn: (str(book), [(t.type, t.copies, t.date) for t in book.transactions], book.copies_sold())
+            for isbn, book in bookstore.catalog.items()}
+
+
+def test_storage_backends_must_implement_load():
+    with pytest.raises(TypeError):
+        Storage()
+
+
+def test_file_storage_replays_log_on_load(tmp_path):
+    storage = FileStorage(tmp_path)
+    bookstore = storage.load()
+    fill(bookstore)
+    storage.close()
+
+    restored = FileStorage(tmp_path).load()
+    assert state(restored) == state(bookstore)
+    assert restored.best_selling_book().isbn == '5678'
+
+
+def test_file_storage_compaction_writes_snapshot_and_starts_new_log(tmp_path):
+    storage = FileStorage(tmp_path, compact_every=3)
+    bookstore = storage.load()
+    fill(bookstore)
+    bookstore.sell_book('1234', 1)
+    storage.close()
+
+    assert (tmp_path / FileStorage.SNAPSHOT).exists()
+    assert len(list(tmp_path.glob('transactions.*.log'))) == 1
+    restored = FileStorage(tmp_path).load()
+    assert state(restored) == state(bookstore)
+
+
+def test_file_storage_ignores_torn_last_record(tmp_path):
+    storage = FileStorage(tmp_path)
+    fill(storage.load())
+    storage.close()
+    with open(tmp_path / 'transactions.0.log', 'a', encoding='utf-8') as log:
+        log.write('["t","1234",1,')
+
+    storage = FileStorage(tmp_path)
+    bookstore = storage.load()
+    assert bookstore.search_by_isbn('1234').quantity == 6
+    bookstore.sell_book('1234', 1)
+    storage.close()
+    assert FileStorage(tmp_path).load().search_by_isbn('1234').quantity == 5
+
+
+def test_file_storage_loads_into_compact_ledger_bookstore(tmp_path):
+    storage = FileStorage(tmp_path)
+    fill(storage.load())
+    storage.compact()
+    storage.close()
+
+    restored = FileStorage(tmp_path).load(Bookstore(compact_ledger=True))
+    assert isinstance(restored.search_by_isbn('5678').transactions, TransactionLedger)
+    assert restored.search_by_isbn('5678').copies_sold() == 12
+
+
+def test_file_storage_archive_keeps_histories_in_a_mapped_file(tmp_path):
+    storage = FileStorage(tmp_path, archive=True)
+    bookstore = storage.load()
+    fill(bookstore)
+    storage.compact()
+    assert isinstance(bookstore.search_by_isbn('5678').transactions, ArchivedHistory)
+    bookstore.sell_book('5678', 2)
+    expected = state(bookstore)
+    storage.close()
+    assert [path.name for path in tmp_path.glob('transactions.*.archive')] == ['transactions.1.archive']
+
+    storage = FileStorage(tmp_path, archive=True)
+    restored = storage.load()
+    assert state(restored) == expected
+    assert restored.best_selling_book().isbn == '5678'
+    assert restored.daily_sales('5678')[-1][1:] == (14, 5)
+    storage.compact()
+    archive = storage._archive
+    storage.close()
+    assert archive._map.closed and storage._archive is None
+    assert restored.search_by_isbn('5678').copies_sold() == 14
+    assert [path.name for path in tmp_path.glob('transactions.*.archive')] == ['transactions.2.archive']
+    assert state(FileStorage(tmp_path).load()) == expected
+
+
+def test_file_storage_compacts_in_the_background(tmp_path):
+    storage = FileStorage(tmp_path, compact_every=3)
+    bookstore = storage.load()
+    write_snapshot, started, resume = storage._write_snapshot, threading.Event(), threading.Event()
+
+    def paused(*args):
+        started.set()
+        assert resume.wait(5)
+        write_snapshot(*args)
+
+    storage._write_snapshot = paused
+    fill(bookstore)
+    # The change that reached compact_every returned without waiting for the snapshot.
+    assert started.wait(5) and not (tmp_path / FileStorage.SNAPSHOT).exists()
+    bookstore.sell_book('5678', 1)
+    storage.sync()
+    # A crash now leaves logs 0 and 1, which load replays in turn.
+    shutil.copytree(tmp_path, tmp_path / 'copy')
+    assert state(FileStorage(tmp_path / 'copy').load()) == state(bookstore)
+
+    resume.set()
+    storage.close()
+    assert [path.name for path in tmp_path.glob('transactions.*.log')] == ['transactions.1.log']
+    assert state(FileStorage(tmp_path).load()) == state(bookstore)
+
+
+def test_file_storage_background_compaction_moves_histories_to_the_archive(tmp_path):
+    storage = FileStorage(tmp_path, compact_every=5, archive=True)
+    bookstore = storage.load()
+    fill(bookstore)
+    storage._writer.join()
+    bookstore.sell_book('5678', 1)
+    # The supply made it into the snapshot; both sales came after it and stay in memory.
+    history = bookstore.search_by_isbn('5678').transactions
+    assert isinstance(history, ArchivedHistory) and history._archived == 1 and len(history) == 3
+    expected = state(bookstore)
+    storage.close()
+    assert state(FileStorage(tmp_path, archive=True).load()) == expected